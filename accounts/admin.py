@@ -1,3 +1,18 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from ustoziya_platform.admin import ScalableModelAdmin
+
+from .models import User
+
 
 # Register your models here.
+@admin.register(User)
+class UserAdmin(BaseUserAdmin, ScalableModelAdmin):
+    list_display = ['username', 'email', 'first_name', 'last_name', 'role', 'is_staff', 'date_joined']
+    list_filter = ['role', 'subject', 'is_verified', 'is_staff', 'is_active']
+    search_fields = ['username', 'first_name', 'last_name', 'email']
+    ordering = ['-pk']
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ("O'qituvchi ma'lumotlari", {'fields': ('role', 'subject', 'school', 'phone', 'avatar', 'bio', 'is_verified')}),
+    )
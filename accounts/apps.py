@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from ustoziya_platform import thumbnails
+
+        from .models import User
+
+        thumbnails.register(User, 'avatar')
@@ -59,6 +59,13 @@ class User(AbstractUser):
         verbose_name='Avatar'
     )
     
+    avatar_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Avatar nusxalari'
+    )
+    
     bio = models.TextField(
         blank=True,
         null=True,
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User
+from ustoziya_platform.thumbnails import thumbnail_url
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -92,13 +93,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     subject_display = serializers.SerializerMethodField()
     role_display = serializers.SerializerMethodField()
+    avatar_thumbnail_url = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
             'full_name', 'role', 'role_display', 'subject', 'subject_display',
-            'school', 'phone', 'avatar', 'bio', 'is_verified',
+            'school', 'phone', 'avatar', 'avatar_thumbnail_url', 'bio', 'is_verified',
             'date_joined', 'last_login'
         ]
         read_only_fields = ['id', 'date_joined', 'last_login']
@@ -114,6 +116,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
     def get_role_display(self, obj):
         """Rol nomini qaytaradi"""
         return obj.get_role_display()
+    
+    def get_avatar_thumbnail_url(self, obj):
+        """Avatarning kichik nusxasi URL ini qaytaradi"""
+        return thumbnail_url(obj, 'avatar', size=64)
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
@@ -1,7 +1,19 @@
-from django.contrib import admin
+import zipfile
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from ustoziya_platform.admin import ScalableModelAdmin
+
+from . import bulk_import
+from .search import search_queryset
 from .models import (
     Material, MaterialCategory, MaterialRating, MaterialDownload,
-    Assignment, StudentSubmission, VideoLesson, Model3D
+    Assignment, StudentSubmission, VideoLesson, Model3D, Tag
 )
 
 
@@ -9,60 +21,124 @@ from .models import (
 class MaterialCategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'description', 'icon']
     search_fields = ['name', 'description']
-    list_filter = ['name']
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
+
+
+class IndexedSearchMixin:
+    """Admin qidiruvi to'liq matnli indeks orqali (``LIKE '%...%'`` butun jadvalni o'qiydi)"""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        matches = search_queryset(self.model._default_manager.all(), search_term).order_by().values('pk')
+        return queryset.filter(pk__in=matches), False
+
+
+class MaterialImportForm(forms.Form):
+    archive = forms.FileField(label='ZIP arxiv', help_text="Fayllar va (manifest alohida yuklanmasa) manifest.csv")
+    manifest = forms.FileField(label='CSV manifest', required=False)
+    category = forms.ModelChoiceField(
+        MaterialCategory.objects.all(), required=False, label='Kategoriya',
+        help_text="Manifestda kategoriya ko'rsatilmagan qatorlar uchun"
+    )
+    is_public = forms.BooleanField(label='Umumiy foydalanish', required=False, initial=True)
+
+    def clean_archive(self):
+        archive = self.cleaned_data['archive']
+        if not zipfile.is_zipfile(archive):
+            raise forms.ValidationError("Fayl ZIP arxiv emas")
+        return archive
 
 
 @admin.register(Material)
-class MaterialAdmin(admin.ModelAdmin):
+class MaterialAdmin(IndexedSearchMixin, ScalableModelAdmin):
     list_display = ['title', 'material_type', 'category', 'author', 'grade_level', 'is_public', 'download_count', 'rating', 'created_at']
-    list_filter = ['material_type', 'category', 'is_public', 'grade_level', 'created_at']
+    list_filter = ['material_type', 'category', 'is_public', 'created_at']
     search_fields = ['title', 'description', 'tags']
-    readonly_fields = ['download_count', 'rating', 'created_at', 'updated_at']
+    autocomplete_fields = ['category', 'author']
+    readonly_fields = ['download_count', 'rating', 'rating_sum', 'rating_count', 'created_at', 'updated_at']
+    ordering = ['-pk']
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='materials_material_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Arxivdagi materiallarni ommaviy import qilish (fon oqimida, natija jurnalga yoziladi)"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = MaterialImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            bulk_import.start(
+                form.cleaned_data['archive'], form.cleaned_data['manifest'], request.user,
+                category=form.cleaned_data['category'], is_public=form.cleaned_data['is_public']
+            )
+            messages.success(request, "Import boshlandi - natija server jurnalida ko'rsatiladi")
+            return redirect('admin:materials_material_changelist')
+        return TemplateResponse(request, 'admin/materials/material/import.html', dict(
+            self.admin_site.each_context(request), opts=self.model._meta, form=form, title='Materiallarni import qilish'
+        ))
 
 
 @admin.register(MaterialRating)
-class MaterialRatingAdmin(admin.ModelAdmin):
+class MaterialRatingAdmin(ScalableModelAdmin):
     list_display = ['material', 'user', 'rating', 'created_at']
     list_filter = ['rating', 'created_at']
-    search_fields = ['material__title', 'user__first_name', 'user__last_name']
+    search_fields = ['material__title', 'user__username']
+    autocomplete_fields = ['material', 'user']
+    ordering = ['-pk']
 
 
 @admin.register(MaterialDownload)
-class MaterialDownloadAdmin(admin.ModelAdmin):
+class MaterialDownloadAdmin(ScalableModelAdmin):
     list_display = ['material', 'user', 'downloaded_at', 'ip_address']
     list_filter = ['downloaded_at']
-    search_fields = ['material__title', 'user__first_name', 'user__last_name']
+    search_fields = ['material__title', 'user__username']
+    autocomplete_fields = ['material', 'user']
+    ordering = ['-pk']
 
 
 @admin.register(Assignment)
-class AssignmentAdmin(admin.ModelAdmin):
+class AssignmentAdmin(ScalableModelAdmin):
     list_display = ['title', 'assignment_type', 'teacher', 'grade_level', 'subject', 'due_date', 'max_points', 'is_active', 'created_at']
-    list_filter = ['assignment_type', 'grade_level', 'subject', 'is_active', 'created_at']
+    list_filter = ['assignment_type', 'is_active', 'created_at']
     search_fields = ['title', 'description', 'instructions']
-    filter_horizontal = ['materials']
+    autocomplete_fields = ['teacher', 'category', 'materials']
     readonly_fields = ['created_at', 'updated_at']
+    ordering = ['-pk']
 
 
 @admin.register(StudentSubmission)
-class StudentSubmissionAdmin(admin.ModelAdmin):
+class StudentSubmissionAdmin(ScalableModelAdmin):
     list_display = ['assignment', 'student_name', 'student_class', 'status', 'grade', 'submitted_at', 'graded_at']
-    list_filter = ['status', 'grade', 'submitted_at', 'graded_at']
+    list_filter = ['status', 'submitted_at', 'graded_at']
     search_fields = ['student_name', 'student_email', 'assignment__title']
-    filter_horizontal = ['attached_files']
+    autocomplete_fields = ['assignment', 'attached_files', 'graded_by']
     readonly_fields = ['created_at', 'submitted_at', 'graded_at']
+    ordering = ['-pk']
 
 
 @admin.register(VideoLesson)
-class VideoLessonAdmin(admin.ModelAdmin):
+class VideoLessonAdmin(IndexedSearchMixin, ScalableModelAdmin):
     list_display = ['title', 'author', 'category', 'grade_level', 'subject', 'duration', 'view_count', 'rating', 'is_public', 'created_at']
-    list_filter = ['grade_level', 'subject', 'is_public', 'created_at']
+    list_filter = ['is_public', 'hls_status', 'created_at']
     search_fields = ['title', 'description', 'tags']
-    readonly_fields = ['view_count', 'rating', 'created_at']
+    autocomplete_fields = ['category', 'author']
+    readonly_fields = ['view_count', 'rating', 'rating_sum', 'rating_count', 'created_at']
+    ordering = ['-pk']
 
 
 @admin.register(Model3D)
-class Model3DAdmin(admin.ModelAdmin):
+class Model3DAdmin(IndexedSearchMixin, ScalableModelAdmin):
     list_display = ['title', 'model_type', 'author', 'category', 'grade_level', 'subject', 'file_size', 'is_interactive', 'is_public', 'download_count', 'rating', 'created_at']
-    list_filter = ['model_type', 'grade_level', 'subject', 'is_interactive', 'is_public', 'created_at']
+    list_filter = ['model_type', 'is_interactive', 'is_public', 'created_at']
     search_fields = ['title', 'description']
-    readonly_fields = ['download_count', 'rating', 'created_at']
+    autocomplete_fields = ['category', 'author']
+    readonly_fields = ['download_count', 'rating', 'rating_sum', 'rating_count', 'created_at']
+    ordering = ['-pk']
@@ -1,6 +1,32 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class MaterialsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'materials'
+
+    def ready(self):
+        from ustoziya_platform import thumbnails
+        from ustoziya_platform.cache import invalidate_on_change
+
+        from . import author_stats, hls, meshes, ratings, storage, tags, video_metadata
+        from .models import (
+            Material, MaterialCategory, MaterialRating, MaterialTag, Model3D, VideoLesson, VideoLessonTag
+        )
+        from .search import ensure_search_triggers
+        from .serializers import CATEGORY_CACHE_KEY
+
+        post_migrate.connect(ensure_search_triggers, sender=self)
+        ratings.register(MaterialRating, 'material')
+        author_stats.connect()
+        tags.register(Material, MaterialTag, 'material')
+        tags.register(VideoLesson, VideoLessonTag, 'video')
+        storage.track_all()
+        hls.connect()
+        video_metadata.connect()
+        meshes.connect()
+        for model in (Material, VideoLesson, Model3D):
+            thumbnails.register(model, 'thumbnail')
+        invalidate_on_change(MaterialCategory, CATEGORY_CACHE_KEY, fields=['name', 'description', 'icon'])
+        invalidate_on_change(Material, CATEGORY_CACHE_KEY, fields=['is_public', 'category'])
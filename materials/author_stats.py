@@ -0,0 +1,209 @@
+"""Muallif materiallari statistikasini (``AuthorStats``) yangilab borish.
+
+``material_stats`` har so'rovda muallifning barcha materiallarini yig'ish
+o'rniga bitta qatorni o'qiydi. Qator hodisalar bo'yicha farq (delta) bilan
+yangilanadi:
+
+- material yaratilganda, o'chirilganda yoki boshqa muallifga o'tkazilganda
+  (post_save/post_delete);
+- yuklab olishlar hisoblagichi bazaga yozilganda (``counters_flushed``);
+- material reytingi o'zgarganda (``rating_changed``).
+
+Mavjud materialni saqlash hisoblagich va reyting maydonlarini yozmaydi
+(``AggregateFieldsMixin``), shuning uchun ular faqat yaratishda xotiradan,
+muallif almashganda esa bazadan olinadi. O'rtacha reyting faqat bahosi bor
+materiallar bo'yicha (``rated_materials``).
+
+Muallifning qatori hali bo'lmasa, birinchi materiali yaratilganda to'liq
+hisoblanadi. Barcha qatorlarni qayta hisoblash uchun
+``python manage.py rebuild_author_stats``.
+"""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, FloatField, IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.utils import timezone
+
+from .counters import counters_flushed
+from .models import AuthorStats, Material
+from .ratings import rating_changed
+
+User = get_user_model()
+
+# Statistikada ko'rsatiladigan eng ko'p yuklab olingan materiallar soni
+TOP_MATERIALS = 5
+
+
+def get_stats(author):
+    """Muallif statistikasi (materiallari bo'lmasa - saqlanmagan bo'sh qator)"""
+    return AuthorStats.objects.filter(author=author).first() or AuthorStats(author=author)
+
+
+def top_material_ids(author_id):
+    """Muallifning eng ko'p yuklab olingan materiallari (author, -download_count indeksi bo'yicha)"""
+    return list(
+        Material.objects.filter(author_id=author_id)
+        .order_by('-download_count', '-id')
+        .values_list('pk', flat=True)[:TOP_MATERIALS]
+    )
+
+
+def refresh_top_materials(author_ids):
+    """``top_material_ids`` ro'yxatini yangilash"""
+    for author_id in set(author_ids):
+        AuthorStats.objects.filter(author_id=author_id).update(top_material_ids=top_material_ids(author_id))
+
+
+def rebuild(author_ids):
+    """Mualliflar statistikasini materiallardan to'liq qayta hisoblash"""
+    author_ids = list(author_ids)
+    totals = {
+        row['author']: row
+        for row in Material.objects.filter(author_id__in=author_ids).order_by().values('author').annotate(
+            materials=Count('pk'),
+            rated=Count('pk', filter=Q(rating_count__gt=0)),
+            downloads=Coalesce(Sum('download_count'), Value(0), output_field=IntegerField()),
+            ratings=Coalesce(Sum('rating'), Value(0.0), output_field=FloatField())
+        )
+    }
+    rows = [
+        AuthorStats(
+            author_id=author_id,
+            total_materials=totals.get(author_id, {}).get('materials', 0),
+            total_downloads=totals.get(author_id, {}).get('downloads', 0),
+            rating_total=totals.get(author_id, {}).get('ratings', 0.0),
+            rated_materials=totals.get(author_id, {}).get('rated', 0),
+            top_material_ids=top_material_ids(author_id) if author_id in totals else [],
+            updated_at=timezone.now()
+        )
+        for author_id in author_ids
+    ]
+    AuthorStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['author'],
+        update_fields=[
+            'total_materials', 'total_downloads', 'rating_total', 'rated_materials', 'top_material_ids', 'updated_at'
+        ]
+    )
+
+
+def apply_stats_change(author_id, materials=0, downloads=0, rating=0.0, rated=0, create=True):
+    """Muallif statistikasiga farqni qo'shish (qator bo'lmasa va create=True - to'liq hisoblash).
+
+    Qator mavjud bo'lib yangilangan bo'lsa True qaytaradi.
+    """
+    changes = {}
+    if materials:
+        changes['total_materials'] = F('total_materials') + materials
+    if downloads:
+        changes['total_downloads'] = F('total_downloads') + downloads
+    if rating:
+        changes['rating_total'] = F('rating_total') + rating
+    if rated:
+        changes['rated_materials'] = F('rated_materials') + rated
+    if not changes:
+        return True
+    updated = AuthorStats.objects.filter(author_id=author_id).update(updated_at=timezone.now(), **changes)
+    if not updated and create:
+        rebuild([author_id])
+    return bool(updated)
+
+
+def _material_rating(rating_sum, rating_count):
+    # ratings.rating_expression bilan bir xil formula
+    return rating_sum / rating_count if rating_count > 0 else 0.0
+
+
+def _remember(sender, instance, **kwargs):
+    # Yuklanmagan (kechiktirilgan) muallif - None
+    instance._stats_author = instance.__dict__.get('author_id')
+
+
+def _change(row, sign=1):
+    """(yuklab olishlar, reyting, rating_count) qatoridan ``apply_stats_change`` argumentlari"""
+    downloads, rating, rating_count = row
+    return {
+        'downloads': sign * (downloads or 0), 'rating': sign * (rating or 0.0), 'rated': sign * int(bool(rating_count)),
+    }
+
+
+def _on_material_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    author_id, old_author_id = instance.__dict__.get('author_id'), instance._stats_author
+    instance._stats_author = author_id
+
+    if created:
+        # INSERT barcha maydonlarni yozadi - xotiradagi qiymatlar bazadagi bilan bir xil
+        row = (instance.download_count, instance.rating, instance.rating_count)
+        if apply_stats_change(author_id, 1, **_change(row)):
+            refresh_top_materials([author_id])
+    elif old_author_id is not None and author_id is not None and old_author_id != author_id:
+        # Hisoblagichlar saqlashda yozilmaydi - bazadagi qiymatlar ko'chiriladi
+        row = Material.objects.filter(pk=instance.pk).values_list('download_count', 'rating', 'rating_count').first()
+        if row is None:
+            return
+        if apply_stats_change(old_author_id, -1, create=False, **_change(row, -1)):
+            refresh_top_materials([old_author_id])
+        if apply_stats_change(author_id, 1, **_change(row)):
+            refresh_top_materials([author_id])
+
+
+def _deleting_author(origin):
+    # Muallifning o'zi o'chirilayotgan bo'lsa (CASCADE), statistika ham o'chadi
+    return isinstance(origin, User) or getattr(origin, 'model', None) is User
+
+
+def _before_material_delete(sender, instance, origin=None, **kwargs):
+    if _deleting_author(origin):
+        return
+    # Xotiradagi qiymatlar eskirgan bo'lishi mumkin (hisoblagichlar F() bilan yoziladi)
+    instance._stats_deleted = Material.objects.filter(pk=instance.pk).values_list(
+        'author_id', 'download_count', 'rating', 'rating_count'
+    ).first()
+
+
+def _on_material_delete(sender, instance, origin=None, **kwargs):
+    row = None if _deleting_author(origin) else getattr(instance, '_stats_deleted', None)
+    if row is None:
+        return
+    author_id, *values = row
+    if apply_stats_change(author_id, -1, create=False, **_change(values, -1)):
+        refresh_top_materials([author_id])
+
+
+def _on_downloads_flushed(sender, field, deltas, **kwargs):
+    if field != 'download_count':
+        return
+    per_author = defaultdict(int)
+    for pk, author_id in Material.objects.filter(pk__in=list(deltas)).values_list('pk', 'author_id'):
+        per_author[author_id] += deltas[pk]
+    for author_id, amount in per_author.items():
+        apply_stats_change(author_id, downloads=amount)
+    refresh_top_materials(per_author)
+
+
+def _on_rating_changed(sender, pk, sum_delta, count_delta, **kwargs):
+    row = Material.objects.filter(pk=pk).values('author_id', 'rating_sum', 'rating_count').first()
+    if row is None:
+        return
+    old_count = row['rating_count'] - count_delta
+    new_rating = _material_rating(row['rating_sum'], row['rating_count'])
+    old_rating = _material_rating(row['rating_sum'] - sum_delta, old_count)
+    apply_stats_change(
+        row['author_id'], rating=new_rating - old_rating, rated=int(row['rating_count'] > 0) - int(old_count > 0)
+    )
+
+
+def connect():
+    """Hodisalarni statistikani yangilashga ulash (MaterialsConfig.ready dan chaqiriladi)"""
+    uid = 'author_stats'
+    post_init.connect(_remember, sender=Material, dispatch_uid=uid)
+    post_save.connect(_on_material_save, sender=Material, dispatch_uid=uid)
+    pre_delete.connect(_before_material_delete, sender=Material, dispatch_uid=uid)
+    post_delete.connect(_on_material_delete, sender=Material, dispatch_uid=uid)
+    counters_flushed.connect(_on_downloads_flushed, sender=Material, dispatch_uid=uid)
+    rating_changed.connect(_on_rating_changed, sender=Material, dispatch_uid=uid)
@@ -0,0 +1,396 @@
+"""Materiallarni papka yoki ZIP arxivdan ommaviy import qilish (hamkor nashriyotlar fayllari).
+
+Manba - fayllar papkasi yoki ZIP arxiv va CSV manifest (standart: manbadagi
+``manifest.csv``). Manifest ustunlari::
+
+    file,title,description,material_type,category,author,tags,grade_level,is_public
+
+``file`` (manbaga nisbatan yo'l) va ``title`` majburiy. ``material_type``
+bo'lmasa fayl kengaytmasidan aniqlanadi, ``category`` - nomi yoki ID si (yo'q
+nomlar yaratiladi), ``author`` - foydalanuvchi nomi; bo'sh ustunlar o'rniga
+buyruqda berilgan standart qiymatlar olinadi.
+
+Fayllar parallel oqimlarda (``MATERIAL_IMPORT_WORKERS``) bazaga murojaat
+qilmasdan xeshlanib kontent bo'yicha saqlanadi, asosiy oqim esa tayyor
+fayllar uchun ``Material`` qatorlarini ``MATERIAL_IMPORT_BATCH_SIZE`` talik
+to'plamlarda ``bulk_create`` bilan yozadi. ``bulk_create`` signallarni
+chaqirmaydi - signal ishlari (fayl havolalari, teglar indeksi, muallif
+statistikasi, kategoriyalar keshi) har bir to'plam uchun ommaviy bajariladi.
+
+Har bir to'plam tranzaksiyasi yakunlangach uning manifest qatorlari holat
+fayliga (``<manba>.import-state``) yoziladi. Import to'xtab qolsa, xuddi shu
+buyruq qayta ishga tushiriladi - bajarilgan qatorlar o'qilmaydi, xato
+bergan qatorlar qayta uriniladi. Holat fayliga yozilmay qolgan to'plam
+takrorlanmaydi: muallifi, fayli va sarlavhasi bir xil material qayta
+yaratilmaydi.
+
+Buyruq: ``python manage.py import_materials <papka|arxiv.zip>``; admin
+panelida - materiallar ro'yxatidagi "Ommaviy import" (fon oqimida).
+"""
+import csv
+import hashlib
+import io
+import logging
+import os
+import posixpath
+import shutil
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from ustoziya_platform import background
+from ustoziya_platform.cache import invalidate
+
+from . import author_stats, storage, tags
+from .models import Material, MaterialCategory, MaterialTag
+from .serializers import CATEGORY_CACHE_KEY
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+MANIFEST_NAME = 'manifest.csv'
+STATE_SUFFIX = '.import-state'
+
+# material_type ko'rsatilmaganda fayl kengaytmasi bo'yicha tur
+EXTENSION_TYPES = {
+    '.ppt': 'presentation', '.pptx': 'presentation', '.odp': 'presentation',
+    '.doc': 'document', '.docx': 'document', '.odt': 'document', '.rtf': 'document', '.pdf': 'document',
+    '.mp4': 'video', '.webm': 'video', '.mp3': 'audio', '.wav': 'audio',
+    '.jpg': 'image', '.jpeg': 'image', '.png': 'image',
+}
+
+TRUE_VALUES = {'1', 'true', 'yes', 'ha', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', "yo'q", 'off'}
+
+
+class ImportSourceError(ValueError):
+    """Manba yoki manifestni o'qib bo'lmadi"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _member_name(name):
+    """Manifestdagi yo'lni manba ichidagi nomga keltirish (manbadan tashqariga chiqmasdan)"""
+    name = posixpath.normpath(name.strip().replace('\\', '/')).lstrip('/')
+    if name in ('', '.') or name == '..' or name.startswith('../'):
+        raise FileNotFoundError(f"Noto'g'ri fayl yo'li: {name}")
+    return name
+
+
+class DirectorySource:
+    """Fayllar papkasi"""
+
+    def __init__(self, path):
+        self.root = os.path.realpath(path)
+
+    def open(self, name):
+        return open(os.path.join(self.root, *_member_name(name).split('/')), 'rb')
+
+    def close(self):
+        pass
+
+
+class ZipSource:
+    """ZIP arxiv - har bir oqim arxivni o'zi ochadi (ZipFile oqimlar orasida bo'linmaydi)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._archives = []
+        with zipfile.ZipFile(path) as archive:
+            self.members = {
+                posixpath.normpath(info.filename): info
+                for info in archive.infolist() if not info.is_dir()
+            }
+
+    def open(self, name):
+        info = self.members.get(_member_name(name))
+        if info is None:
+            raise FileNotFoundError(f"Arxivda yo'q: {name}")
+        archive = getattr(self._local, 'archive', None)
+        if archive is None:
+            archive = self._local.archive = zipfile.ZipFile(self.path)
+            self._archives.append(archive)
+        return archive.open(info)
+
+    def close(self):
+        for archive in self._archives:
+            archive.close()
+
+
+def open_source(path):
+    if os.path.isdir(path):
+        return DirectorySource(path)
+    if zipfile.is_zipfile(path):
+        return ZipSource(path)
+    raise ImportSourceError(f"Manba papka yoki ZIP arxiv emas: {path}")
+
+
+def read_manifest(source, manifest_path=None):
+    """Manifest qatorlari va xeshi: ([(qator raqami, {ustun: qiymat}), ...], xesh)"""
+    try:
+        if manifest_path:
+            with open(manifest_path, 'rb') as f:
+                data = f.read()
+        else:
+            with source.open(MANIFEST_NAME) as f:
+                data = f.read()
+    except FileNotFoundError:
+        raise ImportSourceError(f"Manifest topilmadi: {manifest_path or MANIFEST_NAME}")
+
+    reader = csv.DictReader(io.StringIO(data.decode('utf-8-sig'), newline=''))
+    missing = {'file', 'title'} - set(reader.fieldnames or ())
+    if missing:
+        raise ImportSourceError(f"Manifestda majburiy ustunlar yo'q: {', '.join(sorted(missing))}")
+    rows = [
+        (reader.line_num, {key: (value or '').strip() for key, value in row.items() if key})
+        for row in reader
+    ]
+    return rows, hashlib.sha256(data).hexdigest()
+
+
+def load_state(path, manifest_hash):
+    """Bajarilgan manifest qatorlari (holat fayli yo'q yoki boshqa manifestniki bo'lsa - yangisi yoziladi)"""
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.readline().strip() == manifest_hash:
+                return {int(line) for line in f if line.strip()}
+    with open(path, 'w') as f:
+        f.write(f'{manifest_hash}\n')
+    return set()
+
+
+def _append_state(path, lines):
+    with open(path, 'a') as f:
+        f.write(''.join(f'{line}\n' for line in lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def is_id(value):
+    """Kategoriya qiymati ID mi (ASCII raqamlar, bigint chegarasida) - aks holda nomi"""
+    return value.isascii() and value.isdigit() and len(value) <= 18
+
+
+def _parse_bool(value, default):
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    if value:
+        raise ValidationError(f"Noto'g'ri is_public qiymati: {value}")
+    return default
+
+
+class _Lookups:
+    """Mualliflar va kategoriyalar - butun manifest uchun oldindan bir necha so'rov bilan"""
+
+    def __init__(self, rows, author, category):
+        usernames = {row.get('author') for _, row in rows} - {'', None}
+        self.authors = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+        self.default_author = author.pk if author else None
+
+        values = {row.get('category') for _, row in rows} - {'', None}
+        self.category_ids = set(MaterialCategory.objects.filter(
+            pk__in=[int(value) for value in values if is_id(value)]
+        ).values_list('pk', flat=True))
+        self.categories = dict(MaterialCategory.objects.filter(
+            name__in=[value for value in values if not is_id(value)]
+        ).values_list('name', 'pk'))
+        self.default_category = category.pk if category else None
+
+    def author(self, username):
+        if not username:
+            if self.default_author is None:
+                raise ValidationError("Muallif ko'rsatilmagan")
+            return self.default_author
+        if username not in self.authors:
+            raise ValidationError(f"Foydalanuvchi topilmadi: {username}")
+        return self.authors[username]
+
+    def category(self, value):
+        if not value:
+            if self.default_category is None:
+                raise ValidationError("Kategoriya ko'rsatilmagan")
+            return self.default_category
+        if is_id(value):
+            if int(value) not in self.category_ids:
+                raise ValidationError(f"Kategoriya topilmadi: {value}")
+            return int(value)
+        if value not in self.categories:
+            self.categories[value] = MaterialCategory.objects.get_or_create(name=value)[0].pk
+        return self.categories[value]
+
+
+def build_material(row, lookups, is_public):
+    """Manifest qatoridan saqlanmagan ``Material`` (faylsiz)"""
+    material_type = row.get('material_type') or EXTENSION_TYPES.get(
+        posixpath.splitext(row['file'].lower())[1], 'other'
+    )
+    material = Material(
+        title=row['title'],
+        description=row.get('description', ''),
+        material_type=material_type,
+        category_id=lookups.category(row.get('category')),
+        author_id=lookups.author(row.get('author')),
+        tags=row.get('tags') or None,
+        grade_level=row.get('grade_level') or None,
+        is_public=_parse_bool(row.get('is_public', ''), is_public),
+    )
+    material.clean_fields(exclude=['description', 'category', 'author', 'file', 'thumbnail'])
+    return material
+
+
+def _store(file_storage, source, name):
+    with source.open(name) as f:
+        return file_storage.write_blob(f, name)
+
+
+def save_batch(stored):
+    """Fayli saqlangan materiallarni bitta tranzaksiyada yozish: [(Material, (nom, xesh, hajm)), ...]
+
+    Yaratilgan materiallar sonini qaytaradi (avval import qilinganlari o'tkazib yuboriladi).
+    """
+    with transaction.atomic():
+        storage.register_blobs([blob for _, blob in stored])
+        existing = set(
+            Material.objects.filter(
+                author_id__in={material.author_id for material, _ in stored},
+                file__in={name for _, (name, _, _) in stored}
+            ).values_list('author_id', 'file', 'title')
+        )
+        materials = []
+        for material, (name, _, _) in stored:
+            key = (material.author_id, name, material.title)
+            if key in existing:
+                continue
+            existing.add(key)
+            material.file = name
+            materials.append(material)
+        if not materials:
+            return 0
+
+        Material.objects.bulk_create(materials)
+        storage.add_references(
+            (material.file.name for material in materials), Material._meta.get_field('file').storage
+        )
+        tags.index(materials, MaterialTag, 'material')
+        author_stats.rebuild({material.author_id for material in materials})
+        invalidate(CATEGORY_CACHE_KEY)
+    return len(materials)
+
+
+def run(source_path, manifest_path=None, author=None, category=None, is_public=True,
+        state_path=None, batch_size=None, workers=None, progress=None):
+    """Manbadagi materiallarni import qilish
+
+    ``author``/``category`` - manifestda ko'rsatilmagan qatorlar uchun, ``progress(bajarilgan, jami)``
+    har bir to'plamdan keyin chaqiriladi. Natija: {'total', 'created', 'skipped', 'failed': [(qator, xato)]}.
+    """
+    batch_size = batch_size or _setting('MATERIAL_IMPORT_BATCH_SIZE', 500)
+    workers = workers or _setting('MATERIAL_IMPORT_WORKERS', 4)
+    state_path = state_path or os.path.normpath(source_path) + STATE_SUFFIX
+    file_storage = Material._meta.get_field('file').storage
+
+    source = open_source(source_path)
+    try:
+        rows, manifest_hash = read_manifest(source, manifest_path)
+        done = load_state(state_path, manifest_hash)
+        pending = [(line, row) for line, row in rows if line not in done]
+        result = {'total': len(rows), 'created': 0, 'skipped': len(rows) - len(pending), 'failed': []}
+
+        lookups = _Lookups(pending, author, category)
+        prepared = []
+        for line, row in pending:
+            try:
+                prepared.append((line, row['file'], build_material(row, lookups, is_public)))
+            except ValidationError as e:
+                result['failed'].append((line, '; '.join(e.messages)))
+        batches = [prepared[i:i + batch_size] for i in range(0, len(prepared), batch_size)]
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='material-import')
+        try:
+            def submit(batch):
+                return [executor.submit(_store, file_storage, source, name) for _, name, _ in batch]
+
+            # Keyingi to'plam fayllari joriy to'plam bazaga yozilayotganda saqlanadi
+            futures = submit(batches[0]) if batches else []
+            processed = len(pending) - len(prepared)
+            for index, batch in enumerate(batches):
+                current = futures
+                futures = submit(batches[index + 1]) if index + 1 < len(batches) else []
+                stored = []
+                for (line, name, material), future in zip(batch, current):
+                    try:
+                        stored.append((line, material, future.result()))
+                    except Exception as e:
+                        result['failed'].append((line, f'{name}: {e}'))
+                if stored:
+                    created = save_batch([(material, blob) for _, material, blob in stored])
+                    result['created'] += created
+                    result['skipped'] += len(stored) - created
+                    _append_state(state_path, [line for line, _, _ in stored])
+                processed += len(batch)
+                if progress:
+                    progress(processed, len(pending))
+        finally:
+            executor.shutdown(cancel_futures=True)
+    finally:
+        source.close()
+
+    result['failed'].sort()
+    return result
+
+
+def _write_upload(upload, path):
+    with open(path, 'wb') as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+    return path
+
+
+def start(archive, manifest, author, category=None, is_public=True):
+    """Yuklangan arxivni fon oqimida import qilish (admin panel uchun)"""
+    job_dir = os.path.join(_setting('MATERIAL_IMPORT_DIR', os.path.join(settings.BASE_DIR, 'imports')), uuid.uuid4().hex)
+    os.makedirs(job_dir)
+    archive_path = _write_upload(archive, os.path.join(job_dir, 'archive.zip'))
+    manifest_path = _write_upload(manifest, os.path.join(job_dir, MANIFEST_NAME)) if manifest else None
+
+    background.schedule(
+        'material-import', _run_job, job_dir, archive_path, manifest_path,
+        author.pk, category.pk if category else None, is_public,
+        run_async=_setting('MATERIAL_IMPORT_ASYNC', True)
+    )
+    return job_dir
+
+
+def _run_job(job_dir, archive_path, manifest_path, author_id, category_id, is_public):
+    try:
+        result = run(
+            archive_path, manifest_path,
+            author=User.objects.get(pk=author_id),
+            category=MaterialCategory.objects.get(pk=category_id) if category_id else None,
+            is_public=is_public,
+        )
+    except Exception:
+        logger.exception(f"Materiallarni import qilishda xatolik: {job_dir}")
+        return
+    logger.info(
+        f"Materiallar importi: {result['created']} ta yaratildi, {result['skipped']} ta o'tkazib yuborildi, "
+        f"{len(result['failed'])} ta xato ({job_dir})"
+    )
+    for line, error in result['failed']:
+        logger.warning(f"Import, {line}-qator: {error}")
+    # Xato bergan qatorlar bo'lsa arxiv va holat qayta urinish uchun qoldiriladi
+    if not result['failed']:
+        shutil.rmtree(job_dir, ignore_errors=True)
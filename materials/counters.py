@@ -0,0 +1,221 @@
+"""Hisoblagichlar va yuklab olish tarixini buferlab yozish.
+
+``download_count``/``view_count`` kabi hisoblagichlar har bir so'rovda
+``save()`` qilinmaydi: o'sishlar jarayon xotirasida yig'iladi va vaqti-vaqti
+bilan ``F()`` orqali bitta UPDATE bilan qo'shiladi. Bir nechta worker
+jarayonlari bir-birining qiymatini ustidan yozmaydi, chunki har biri faqat
+o'z farqini (delta) qo'shadi. Voqealar (masalan ``MaterialDownload``)
+``bulk_create`` bilan yoziladi.
+
+Buferda model obyektlari emas, maydon qiymatlari (``material_id`` kabi)
+saqlanadi. Hisoblagichlar va har bir modelning voqealari alohida
+tranzaksiyalarda yoziladi; tashqi kaliti o'chirilgan yozuvga ishora qilgan
+voqealar tashlab yuboriladi. Yozib bo'lmagan yozuvlar buferga qaytariladi,
+``COUNTER_FLUSH_MAX_ATTEMPTS`` urinishdan keyin esa jurnalga yozilib
+tashlanadi - bitta buzuq yozuv butun buferni to'xtatib qo'ymaydi.
+
+Sozlamalar:
+    COUNTER_FLUSH_INTERVAL - yozish oralig'i (soniya), 0 - darhol yozish
+    COUNTER_FLUSH_BATCH_SIZE - shuncha yozuv yig'ilsa, kutmasdan yoziladi
+    COUNTER_FLUSH_MAX_ATTEMPTS - yozuvni yozishga urinishlar soni
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Hisoblagichlar bazaga yozilgandan keyin (o'sha tranzaksiya ichida) yuboriladi:
+# sender - model, field - maydon nomi, deltas - {pk: o'sish}
+counters_flushed = Signal()
+
+
+def _flush_interval():
+    return getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5)
+
+
+def _batch_size():
+    return getattr(settings, 'COUNTER_FLUSH_BATCH_SIZE', 500)
+
+
+def _max_attempts():
+    return getattr(settings, 'COUNTER_FLUSH_MAX_ATTEMPTS', 3)
+
+
+class CounterBuffer:
+    """Jarayon ichidagi hisoblagich va voqealar buferi"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        # Yozilmay qolgan hisoblagichlar uchun muvaffaqiyatsiz urinishlar soni
+        self._count_attempts = {}
+        # (model nomi, maydon qiymatlari, muvaffaqiyatsiz urinishlar soni)
+        self._events = []
+        self._timer = None
+
+    def _size(self):
+        return len(self._counts) + len(self._events)
+
+    def increment(self, instance, field, amount=1):
+        """Model obyektining hisoblagich maydonini oshirish"""
+        key = (instance._meta.label, field, instance.pk)
+        with self._lock:
+            self._counts[key] += amount
+        self._after_write()
+
+    def add_event(self, event):
+        """Saqlanmagan model obyektini keyinroq bulk_create qilish uchun qo'shish"""
+        values = {
+            field.attname: getattr(event, field.attname)
+            for field in event._meta.concrete_fields if not field.primary_key
+        }
+        with self._lock:
+            self._events.append((event._meta.label, values, 0))
+        self._after_write()
+
+    def pending(self, instance, field):
+        """Hali bazaga yozilmagan o'sish miqdori (shu jarayon uchun)"""
+        with self._lock:
+            return self._counts.get((instance._meta.label, field, instance.pk), 0)
+
+    def _after_write(self):
+        interval = _flush_interval()
+        with self._lock:
+            full = self._size() >= _batch_size()
+            schedule = not full and interval > 0 and self._timer is None
+            if schedule:
+                self._timer = threading.Timer(interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full or interval <= 0:
+            self.flush()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # Timer o'z oqimida ishlaydi, ulanish ochiq qolmasligi kerak
+            connection.close()
+
+    def flush(self):
+        """Yig'ilgan barcha o'zgarishlarni bazaga yozish"""
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+            attempts, self._count_attempts = self._count_attempts, {}
+            events, self._events = self._events, []
+
+        if counts:
+            try:
+                with transaction.atomic():
+                    self._write_counts(counts)
+            except Exception as e:
+                logger.error(f"Hisoblagichlarni yozishda xatolik: {e}")
+                self._requeue_counts(counts, attempts)
+
+        by_label = defaultdict(list)
+        for event in events:
+            by_label[event[0]].append(event)
+        for label, batch in by_label.items():
+            try:
+                with transaction.atomic():
+                    self._write_events(apps.get_model(label), [values for _, values, _ in batch])
+            except Exception as e:
+                logger.error(f"{label} voqealarini yozishda xatolik: {e}")
+                self._requeue_events(batch)
+
+    def _requeue_counts(self, counts, attempts):
+        """Yozilmagan o'sishlarni buferga qaytarish (urinishlar tugaganlari tashlanadi)"""
+        limit = _max_attempts()
+        with self._lock:
+            for key, amount in counts.items():
+                failed = attempts.get(key, 0) + 1
+                if failed >= limit:
+                    logger.error(f"Hisoblagich {key} ga +{amount} {failed} urinishda yozilmadi, tashlandi")
+                    continue
+                self._counts[key] += amount
+                self._count_attempts[key] = max(failed, self._count_attempts.get(key, 0))
+
+    def _requeue_events(self, events):
+        limit = _max_attempts()
+        kept = [(label, values, failed + 1) for label, values, failed in events if failed + 1 < limit]
+        if len(kept) < len(events):
+            logger.error(f"{events[0][0]}: {len(events) - len(kept)} ta voqea {limit} urinishda yozilmadi, tashlandi")
+        with self._lock:
+            self._events = kept + self._events
+
+    def _write_counts(self, counts):
+        grouped = defaultdict(dict)
+        for (label, field, pk), amount in counts.items():
+            grouped[(label, field)][pk] = amount
+
+        batch_size = _batch_size()
+        for (label, field), deltas in grouped.items():
+            model = apps.get_model(label)
+            pks = list(deltas)
+            for start in range(0, len(pks), batch_size):
+                chunk = pks[start:start + batch_size]
+                delta = Case(
+                    *[When(pk=pk, then=Value(deltas[pk])) for pk in chunk],
+                    default=Value(0),
+                    output_field=IntegerField()
+                )
+                model.objects.filter(pk__in=chunk).update(**{field: F(field) + delta})
+            counters_flushed.send(sender=model, field=field, deltas=deltas)
+
+    def _existing_targets(self, model, rows):
+        """Tashqi kaliti o'chirilgan obyektga ishora qiladigan qatorlarni chiqarib tashlash"""
+        batch_size = _batch_size()
+        for field in model._meta.concrete_fields:
+            if not field.is_relation:
+                continue
+            ids = list({row[field.attname] for row in rows} - {None})
+            existing = set()
+            for start in range(0, len(ids), batch_size):
+                existing.update(field.related_model._base_manager.filter(
+                    pk__in=ids[start:start + batch_size]
+                ).order_by().values_list('pk', flat=True))
+            if len(existing) < len(ids):
+                kept = [row for row in rows if row[field.attname] is None or row[field.attname] in existing]
+                logger.warning(
+                    f"{model._meta.label}: {len(rows) - len(kept)} ta voqea o'chirilgan {field.name} ga ishora qiladi, tashlandi"
+                )
+                rows = kept
+        return rows
+
+    def _write_events(self, model, rows):
+        rows = self._existing_targets(model, rows)
+        model.objects.bulk_create([model(**values) for values in rows], batch_size=_batch_size())
+
+
+counter_buffer = CounterBuffer()
+atexit.register(counter_buffer.flush)
+
+
+def increment(instance, field, amount=1):
+    """Hisoblagichni buferlab oshirish"""
+    counter_buffer.increment(instance, field, amount)
+
+
+def record_event(event):
+    """Voqeani buferlab saqlash"""
+    counter_buffer.add_event(event)
+
+
+def current_count(instance, field):
+    """Bazadagi qiymat va shu jarayonda yozilmagan o'sish yig'indisi"""
+    return getattr(instance, field) + counter_buffer.pending(instance, field)
+
+
+def flush():
+    """Buferni darhol bazaga yozish"""
+    counter_buffer.flush()
@@ -0,0 +1,254 @@
+"""Yuklab olishlar tarixini (``MaterialDownload``) vaqt bo'yicha jamlash va tozalash.
+
+Har bir yuklab olish alohida qator bo'lib yoziladi, statistika esa
+``DownloadRollup`` dan o'qiladi: material, muallif va kategoriya kesimida
+har bir soat va kun uchun yuklab olishlar va noyob foydalanuvchilar soni.
+
+Jamlash navbatma-navbat (``python manage.py rollup_downloads``, cron orqali
+masalan har 10 daqiqada) bajariladi: oxirgi ishga tushirishdan beri
+qo'shilgan yozuvlar (``RollupCheckpoint.last_id`` dan keyingilari) qaysi
+soatlarga tegishli ekanligi aniqlanadi va faqat shu soatlar manba
+yozuvlaridan qayta hisoblanadi. Kunlik yuklab olishlar soni soatlik
+qatorlar yig'indisidan olinadi. Noyob foydalanuvchilar sonini qo'shib
+bo'lmaydi, shuning uchun kunlik qiymat manba yozuvlaridan faqat kun
+yopilganda (``RollupCheckpoint.closed_day``) yoki kechikib tasdiqlangan
+yozuvlar topilganda hisoblanadi; ochiq kun uchun u soatlik qiymatlarning
+eng kattasi (pastki chegara). Qayta hisoblash natijani o'zgartirmaydi -
+ishni istalgan vaqtda takrorlash xavfsiz.
+
+ID tranzaksiya boshida beriladi, tasdiqlanish esa kechroq bo'lishi mumkin:
+``last_id`` dan kichik ID li yozuv keyin paydo bo'ladi. Buning uchun
+``last_id`` oldidagi oxirgi ``DOWNLOAD_ROLLUP_LATE_WINDOW`` ta ID oynasidagi
+yozuvlar soni va ID lar yig'indisi eslab qolinadi; keyingi safar ular
+o'zgargan bo'lsa, oynadagi yozuvlar soatlari va kunlari ham qayta hisoblanadi.
+
+Saqlash muddati: jamlangan manba yozuvlari ``DOWNLOAD_HISTORY_RETENTION_DAYS``
+kundan keyin, soatlik statistika ``DOWNLOAD_HOURLY_ROLLUP_RETENTION_DAYS``
+kundan keyin qismlab (``DOWNLOAD_HISTORY_DELETE_BATCH``) o'chiriladi.
+Muddat kun boshiga tekislanadi - kun yozuvlari to'liq qoladi yoki to'liq
+o'chiriladi. Kunlik statistika o'chirilmaydi.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import DownloadRollup, MaterialDownload, RollupCheckpoint
+
+CHECKPOINT = 'material_downloads'
+
+PERIODS = {
+    'hour': (TruncHour, timedelta(hours=1)),
+    'day': (TruncDay, timedelta(days=1)),
+}
+
+# Kesim -> MaterialDownload dagi obyekt maydoni
+SCOPES = {
+    'material': 'material_id',
+    'author': 'material__author_id',
+    'category': 'material__category_id',
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _day_ranges(days):
+    """Ketma-ket kunlarni [boshi, oxiri) oraliqlariga birlashtirish"""
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    return [(_day_start(start), _day_start(end)) for start, end in ranges]
+
+
+def _hour_ranges(hours):
+    """Ketma-ket soatlarni [boshi, oxiri) oraliqlariga birlashtirish"""
+    ranges = []
+    # UTC da - soat qo'shish mahalliy vaqt o'tishlariga bog'liq emas
+    for hour in sorted(hour.astimezone(dt_timezone.utc) for hour in hours):
+        if ranges and ranges[-1][1] == hour:
+            ranges[-1][1] = hour + timedelta(hours=1)
+        else:
+            ranges.append([hour, hour + timedelta(hours=1)])
+    return ranges
+
+
+def _rollups(period, start, end):
+    """[start, end) oralig'idagi ``period`` statistikasi manba yozuvlaridan"""
+    trunc, _ = PERIODS[period]
+    downloads = MaterialDownload.objects.filter(downloaded_at__gte=start, downloaded_at__lt=end).order_by()
+    rollups = []
+    for scope, field in SCOPES.items():
+        rows = downloads.values(object=F(field), period_start=trunc('downloaded_at')).annotate(
+            total=Count('pk'), users=Count('user', distinct=True)
+        )
+        rollups.extend(
+            DownloadRollup(
+                scope=scope, object_id=row['object'], period=period, bucket=row['period_start'],
+                downloads=row['total'], unique_users=row['users']
+            )
+            for row in rows if row['object'] is not None
+        )
+    return rollups
+
+
+def _replace(period, start, end, rollups):
+    DownloadRollup.objects.filter(period=period, bucket__gte=start, bucket__lt=end).delete()
+    DownloadRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def rebuild(start, end):
+    """[start, end) oralig'idagi statistikani manba yozuvlaridan qayta hisoblash"""
+    return sum(_replace(period, start, end, _rollups(period, start, end)) for period in PERIODS)
+
+
+def _rebuild_day(day, exact):
+    """Kunlik qatorlarni soatlik qatorlardan olish (``exact`` - noyob foydalanuvchilar manba yozuvlaridan)"""
+    start, end = _day_start(day), _day_start(day + timedelta(days=1))
+    hourly_days = getattr(settings, 'DOWNLOAD_HOURLY_ROLLUP_RETENTION_DAYS', 90)
+    if hourly_days and start < _cutoff(hourly_days):
+        # Soatlik statistika o'chirilgan - faqat manba yozuvlaridan
+        return rebuild(start, end)
+
+    hourly = DownloadRollup.objects.filter(period='hour', bucket__gte=start, bucket__lt=end).order_by()
+    totals = hourly.values('scope', 'object_id').annotate(total=Sum('downloads'), users=Max('unique_users'))
+    if exact:
+        users = {
+            (rollup.scope, rollup.object_id): rollup.unique_users for rollup in _rollups('day', start, end)
+        }
+    else:
+        users = {
+            (scope, object_id): unique_users for scope, object_id, unique_users in
+            DownloadRollup.objects.filter(period='day', bucket=start).values_list('scope', 'object_id', 'unique_users')
+        }
+    return _replace('day', start, end, [
+        DownloadRollup(
+            scope=row['scope'], object_id=row['object_id'], period='day', bucket=start, downloads=row['total'],
+            unique_users=users.get((row['scope'], row['object_id']), 0) if exact
+            else max(users.get((row['scope'], row['object_id']), 0), row['users'])
+        )
+        for row in totals
+    ])
+
+
+def _window(last_id):
+    """``last_id`` oldidagi oyna: (yozuvlar soni, ID lar yig'indisi)"""
+    size = getattr(settings, 'DOWNLOAD_ROLLUP_LATE_WINDOW', 10000)
+    state = MaterialDownload.objects.filter(pk__gt=last_id - size, pk__lte=last_id).aggregate(
+        rows=Count('pk'), id_sum=Sum('pk')
+    )
+    return state['rows'], state['id_sum'] or 0
+
+
+def update():
+    """Oxirgi ishga tushirishdan beri qo'shilgan (va kechikib tasdiqlangan) yozuvlarni statistikaga qo'shish"""
+    RollupCheckpoint.objects.get_or_create(name=CHECKPOINT)
+    today = timezone.localdate()
+    with transaction.atomic():
+        # Bir vaqtda ikkita ish bir soatni qayta hisoblamasligi uchun
+        checkpoint = RollupCheckpoint.objects.select_for_update().get(name=CHECKPOINT)
+        rows, id_sum = _window(checkpoint.last_id)
+        late = max(rows - checkpoint.window_rows, 0)
+        rescan = (rows, id_sum) != (checkpoint.window_rows, checkpoint.window_id_sum)
+        closed_day = checkpoint.closed_day or today - timedelta(days=1)
+
+        new = MaterialDownload.objects.filter(pk__gt=checkpoint.last_id)
+        last_id = new.aggregate(last=Max('pk'))['last']
+        if last_id is None and not rescan and closed_day >= today - timedelta(days=1):
+            return 0
+        last_id = last_id or checkpoint.last_id
+
+        start_id = checkpoint.last_id - getattr(settings, 'DOWNLOAD_ROLLUP_LATE_WINDOW', 10000) \
+            if rescan else checkpoint.last_id
+        hours = list(
+            MaterialDownload.objects.filter(pk__gt=start_id, pk__lte=last_id).datetimes('downloaded_at', 'hour')
+        ) if last_id > start_id else []
+        for start, end in _hour_ranges(hours):
+            _replace('hour', start, end, _rollups('hour', start, end))
+
+        # Tegilgan kunlar; kechikkan yozuvlar bo'lsa yoki kun yopilgan bo'lsa - aniq hisob
+        days = {day: rescan or day < today for day in {timezone.localtime(hour).date() for hour in hours}}
+        for bucket in DownloadRollup.objects.filter(
+            period='day', bucket__gte=_day_start(closed_day + timedelta(days=1)), bucket__lt=_day_start(today)
+        ).dates('bucket', 'day'):
+            days[bucket] = True
+        for day, exact in sorted(days.items()):
+            _rebuild_day(day, exact)
+
+        count = new.filter(pk__lte=last_id).count() + late
+        checkpoint.last_id = last_id
+        checkpoint.window_rows, checkpoint.window_id_sum = _window(last_id)
+        checkpoint.closed_day = today - timedelta(days=1)
+        checkpoint.save(update_fields=['last_id', 'window_rows', 'window_id_sum', 'closed_day', 'updated_at'])
+    return count
+
+
+def _cutoff(days):
+    return _day_start(timezone.localdate() - timedelta(days=days))
+
+
+def _delete_in_batches(queryset):
+    batch_size = getattr(settings, 'DOWNLOAD_HISTORY_DELETE_BATCH', 5000)
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        # Har bir qism alohida tranzaksiyada - jadval uzoq bloklanmaydi
+        deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
+
+
+def prune():
+    """Saqlash muddati o'tgan manba yozuvlari va soatlik statistikani o'chirish"""
+    deleted = {'downloads': 0, 'hourly_rollups': 0}
+
+    days = getattr(settings, 'DOWNLOAD_HISTORY_RETENTION_DAYS', 365)
+    if days:
+        checkpoint = RollupCheckpoint.objects.filter(name=CHECKPOINT).first()
+        # Faqat statistikaga qo'shilgan yozuvlar o'chiriladi
+        last_id = checkpoint.last_id if checkpoint else 0
+        deleted['downloads'] = _delete_in_batches(
+            MaterialDownload.objects.filter(downloaded_at__lt=_cutoff(days), pk__lte=last_id)
+        )
+
+    days = getattr(settings, 'DOWNLOAD_HOURLY_ROLLUP_RETENTION_DAYS', 90)
+    if days:
+        deleted['hourly_rollups'] = _delete_in_batches(
+            DownloadRollup.objects.filter(period='hour', bucket__lt=_cutoff(days))
+        )
+    return deleted
+
+
+def series(scope, object_id, period, count):
+    """Oxirgi ``count`` ta oraliq statistikasi (yozuvi yo'q oraliqlar - nol bilan)"""
+    _, step = PERIODS[period]
+    now = timezone.localtime()
+    last = now.replace(minute=0, second=0, microsecond=0)
+    if period == 'day':
+        last = _day_start(now.date())
+    first = last - step * (count - 1)
+
+    rows = {
+        row['bucket']: row
+        for row in DownloadRollup.objects.filter(
+            scope=scope, object_id=object_id, period=period, bucket__gte=first
+        ).values('bucket', 'downloads', 'unique_users')
+    }
+    result = []
+    for i in range(count):
+        bucket = first + step * i
+        row = rows.get(bucket, {})
+        result.append({
+            'bucket': bucket,
+            'downloads': row.get('downloads', 0),
+            'unique_users': row.get('unique_users', 0),
+        })
+    return result
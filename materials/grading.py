@@ -0,0 +1,96 @@
+"""O'quvchi ishlarini ommaviy baholash.
+
+Sinf ishlarini bittalab (``grade_submission``) baholash har bir ish uchun
+alohida so'rov, qidiruv va to'liq ``save()`` talab qiladi. ``grade_submissions``
+butun ro'yxatni bitta so'rov bilan o'qiydi (topshiriqlarning ``max_points``
+qiymati bilan birga), tekshiradi va to'g'ri baholarni bitta tranzaksiyada
+``bulk_update`` bilan yozadi. Har bir element uchun alohida natija
+qaytariladi - xato elementlar qolganlarini to'xtatmaydi.
+
+O'qituvchi faqat o'z topshiriqlariga kelgan ishlarni baholaydi
+(administratorlar - barchasini).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import StudentSubmission
+
+
+# Butun son ustunlari chegarasi (bigint) - kattaroq qiymat bazada xatolik beradi
+MAX_INT = 2 ** 63 - 1
+
+
+def _non_negative_int(value):
+    """Manfiy bo'lmagan butun son (int yoki o'nlik raqamli matn), aks holda None"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    if isinstance(value, str):
+        # isdigit() '²' kabi belgilarni ham qabul qiladi, int() esa ularni o'qiy olmaydi
+        if not value.isdecimal():
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            return None
+    return value if 0 <= value <= MAX_INT else None
+
+
+def _parse_item(item):
+    """Element: (id, ball, izoh) yoki xato matni"""
+    if not isinstance(item, dict):
+        return "Element {id, grade, feedback} ko'rinishida bo'lishi kerak"
+    pk, grade = _non_negative_int(item.get('id')), _non_negative_int(item.get('grade'))
+    feedback = item.get('feedback') or ''
+    if pk is None:
+        return "id noto'g'ri"
+    if grade is None:
+        return "Ball manfiy bo'lmagan butun son bo'lishi kerak"
+    if not isinstance(feedback, str):
+        return "Izoh matn bo'lishi kerak"
+    return pk, grade, feedback
+
+
+def grade_submissions(teacher, items):
+    """Ishlarni baholash: [{'id', 'grade', 'feedback'}, ...] -> har bir element uchun natija"""
+    results = [{'id': item.get('id') if isinstance(item, dict) else None} for item in items]
+    parsed = {}
+    for result, item in zip(results, items):
+        value = _parse_item(item)
+        if isinstance(value, str):
+            result['error'] = value
+        elif value[0] in parsed:
+            result['error'] = 'Ish ro\'yxatda takrorlangan'
+        else:
+            parsed[value[0]] = (result, value)
+
+    queryset = StudentSubmission.objects.filter(pk__in=list(parsed)).select_related('assignment').only(
+        'pk', 'assignment__max_points'
+    ).order_by()
+    if not teacher.is_staff:
+        queryset = queryset.filter(assignment__teacher=teacher)
+    submissions = {submission.pk: submission for submission in queryset}
+
+    now = timezone.now()
+    graded = []
+    for pk, (result, (_, grade, feedback)) in parsed.items():
+        submission = submissions.get(pk)
+        if submission is None:
+            result['error'] = 'Ish topilmadi'
+            continue
+        max_points = submission.assignment.max_points
+        if grade > max_points:
+            result['error'] = f'Ball 0 dan {max_points} gacha bo\'lishi kerak'
+            continue
+        submission.grade = grade
+        submission.feedback = feedback
+        graded.append(submission)
+        result.update(status='graded', grade=grade)
+
+    if graded:
+        with transaction.atomic():
+            # Har bir ishda farq qiladigan maydonlar - bulk_update (CASE), umumiylari - bitta oddiy UPDATE
+            StudentSubmission.objects.bulk_update(graded, ['grade', 'feedback'])
+            StudentSubmission.objects.filter(pk__in=[submission.pk for submission in graded]).update(
+                status='graded', graded_by=teacher, graded_at=now
+            )
+    return results
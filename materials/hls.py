@@ -0,0 +1,277 @@
+"""Video darsliklarni HLS (moslashuvchan bitreyt) ko'rinishida tayyorlash.
+
+Yuklangan video fonda ffmpeg bilan bir nechta sifatga (``HLS_RENDITIONS``,
+masalan 240p/480p/720p) o'tkaziladi va segmentlarga bo'linadi::
+
+    hls/<kalit>/master.m3u8           - barcha sifatlar ro'yxati
+    hls/<kalit>/<balandlik>p/index.m3u8
+    hls/<kalit>/<balandlik>p/seg_00000.ts
+
+Kalit - video faylining kontent xeshi (qarang: storage.py), shuning uchun bir
+xil videolar bitta paketni ishlatadi. Manbadan katta sifatlar yaratilmaydi.
+Paket avval vaqtinchalik papkada yig'iladi va tayyor bo'lgach bir urinishda
+joyiga ko'chiriladi - tayyor paket fayllari o'zgarmaydi va uzoq muddat
+keshlanadi (``video_hls_file``).
+
+Jarayon ``VideoLesson`` qatorida kuzatiladi: ``hls_status``,
+``hls_progress`` (%), ``hls_playlist``, ``hls_error``. Video fayli
+o'zgarganda paket qaytadan tayyorlanadi. Mavjud videolar uchun:
+``python manage.py package_videos``.
+
+Ish navbatda va ishlayotganda ``hls_heartbeat_at`` yangilab boriladi. Jarayon
+qayta ishga tushsa, navbatdagi ish yo'qoladi va holat ``pending``/``processing``
+da qolib ketadi - ``python manage.py requeue_stale_jobs`` bunday ishlarni
+(``stale_videos``) qaytadan navbatga qo'yadi.
+
+Sozlamalar:
+    HLS_FFMPEG, HLS_FFPROBE - dasturlar yo'li
+    HLS_RENDITIONS - (balandlik, video kbit/s, audio kbit/s) ro'yxati
+    HLS_SEGMENT_SECONDS - segment davomiyligi
+    HLS_DIR - paketlar papkasi (MEDIA_ROOT ichida)
+    HLS_ASYNC - False bo'lsa tranzaksiyadan keyin shu oqimda bajariladi
+    HLS_WORKERS - fon oqimlari soni
+    HLS_HEARTBEAT_SECONDS - foiz o'zgarmasa ham faollik yoziladigan oraliq
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
+
+from ustoziya_platform import background
+
+from .models import VideoLesson
+from .storage import content_hash
+
+logger = logging.getLogger(__name__)
+
+MASTER_PLAYLIST = 'master.m3u8'
+KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+# Paket ichidagi fayllar: master.m3u8, 480p/index.m3u8, 480p/seg_00012.ts
+FILE_NAME_RE = re.compile(r'^(?:master\.m3u8|\d{2,4}p/(?:index\.m3u8|seg_\d{5}\.ts))$')
+CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+
+# Progress bazaga shu qadam (%) bilan yoziladi
+PROGRESS_STEP = 5
+
+def _renditions():
+    return sorted(getattr(settings, 'HLS_RENDITIONS', ((240, 400, 64), (480, 1000, 96), (720, 2500, 128))))
+
+
+def _hls_dir():
+    return getattr(settings, 'HLS_DIR', 'hls')
+
+
+def package_key(name):
+    """Video fayli uchun paket kaliti (kontent xeshi; eski fayllar uchun nom xeshi)"""
+    return content_hash(name) or hashlib.sha256(name.encode()).hexdigest()
+
+
+def package_path(key):
+    """Paketning diskdagi papkasi"""
+    return os.path.join(settings.MEDIA_ROOT, _hls_dir(), key)
+
+
+def playlist_name(key):
+    return f'{_hls_dir()}/{key}/{MASTER_PLAYLIST}'
+
+
+def playlist_url(video):
+    """Master playlist URL manzili (paket tayyor bo'lmasa - None)"""
+    if video.hls_status != 'ready' or not video.hls_playlist:
+        return None
+    key = video.hls_playlist.split('/')[-2]
+    return reverse('video_hls_file', kwargs={'key': key, 'name': MASTER_PLAYLIST})
+
+
+def probe(path):
+    """Video haqida ma'lumot: (davomiylik soniyada, balandlik, audio bormi)"""
+    result = subprocess.run(
+        [getattr(settings, 'HLS_FFPROBE', 'ffprobe'), '-v', 'error', '-print_format', 'json',
+         '-show_format', '-show_streams', path],
+        capture_output=True, text=True, check=True, timeout=120
+    )
+    info = json.loads(result.stdout or '{}')
+    streams = info.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    if video is None:
+        raise ValueError('Faylda video oqimi topilmadi')
+    duration = float(info.get('format', {}).get('duration') or video.get('duration') or 0)
+    has_audio = any(s.get('codec_type') == 'audio' for s in streams)
+    return duration, int(video.get('height') or 0), has_audio
+
+
+def ladder_for(height):
+    """Manbadan katta bo'lmagan sifatlar (kamida eng kichigi)"""
+    renditions = _renditions()
+    if not height:
+        return renditions
+    return [r for r in renditions if r[0] <= height] or renditions[:1]
+
+
+def ffmpeg_command(source, out_dir, ladder, has_audio):
+    """Bitta o'qishda barcha sifatlarni kodlaydigan ffmpeg buyrug'i"""
+    segment = getattr(settings, 'HLS_SEGMENT_SECONDS', 6)
+    count = len(ladder)
+    scale = ';'.join(f'[v{i}]scale=-2:{height}[v{i}out]' for i, (height, _, _) in enumerate(ladder))
+    command = [
+        getattr(settings, 'HLS_FFMPEG', 'ffmpeg'), '-hide_banner', '-nostdin', '-loglevel', 'error', '-y',
+        '-i', source,
+        '-filter_complex', f'[0:v]split={count}' + ''.join(f'[v{i}]' for i in range(count)) + ';' + scale,
+    ]
+    for i in range(count):
+        command += ['-map', f'[v{i}out]']
+        if has_audio:
+            command += ['-map', '0:a:0']
+    command += [
+        '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main', '-sc_threshold', '0',
+        # Barcha sifatlarda kalit kadrlar bir joyda - pleyer sifatni segment chegarasida almashtiradi
+        '-force_key_frames', f'expr:gte(t,n_forced*{segment})',
+    ]
+    for i, (_, video_kbps, audio_kbps) in enumerate(ladder):
+        command += [
+            f'-b:v:{i}', f'{video_kbps}k', f'-maxrate:v:{i}', f'{int(video_kbps * 1.07)}k',
+            f'-bufsize:v:{i}', f'{video_kbps * 2}k',
+        ]
+        if has_audio:
+            command += [f'-b:a:{i}', f'{audio_kbps}k']
+    if has_audio:
+        command += ['-c:a', 'aac', '-ac', '2']
+    stream_map = ' '.join(
+        (f'v:{i},a:{i}' if has_audio else f'v:{i}') + f',name:{height}p'
+        for i, (height, _, _) in enumerate(ladder)
+    )
+    command += [
+        '-f', 'hls', '-hls_time', str(segment), '-hls_playlist_type', 'vod',
+        '-hls_flags', 'independent_segments',
+        '-hls_segment_filename', os.path.join(out_dir, '%v', 'seg_%05d.ts'),
+        '-master_pl_name', MASTER_PLAYLIST,
+        '-var_stream_map', stream_map,
+        '-progress', 'pipe:1', '-nostats',
+        os.path.join(out_dir, '%v', 'index.m3u8'),
+    ]
+    return command
+
+
+def run_ffmpeg(command, duration, on_progress):
+    """ffmpeg ni ishga tushirish, ``-progress`` chiqishidan foizni hisoblab borish"""
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        key, _, value = line.strip().partition('=')
+        if key in ('out_time_us', 'out_time_ms') and value.isdigit() and duration > 0:
+            on_progress(min(99, int(int(value) / 1_000_000 / duration * 100)))
+    error = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(error.strip()[-2000:] or f'ffmpeg {process.returncode} kodi bilan tugadi')
+
+
+def package(pk):
+    """Video uchun HLS paketini tayyorlash (paket allaqachon bo'lsa - faqat biriktirish)"""
+    video = VideoLesson.objects.filter(pk=pk).only('pk', 'video_file').first()
+    if video is None or not video.video_file:
+        return False
+
+    name = video.video_file.name
+    # Shu orada video almashtirilgan bo'lsa, eski fayl uchun holat yozilmaydi
+    rows = VideoLesson.objects.filter(pk=pk, video_file=name)
+    key = package_key(name)
+    out_dir = package_path(key)
+
+    if not os.path.exists(os.path.join(out_dir, MASTER_PLAYLIST)):
+        rows.update(hls_status='processing', hls_progress=0, hls_error='', hls_heartbeat_at=timezone.now())
+        duration, height, has_audio = probe(video.video_file.path)
+        ladder = ladder_for(height)
+
+        work_dir = f'{out_dir}.tmp-{uuid.uuid4().hex}'
+        for rendition_height, _, _ in ladder:
+            os.makedirs(os.path.join(work_dir, f'{rendition_height}p'))
+        reported = [0, time.monotonic()]
+        heartbeat = getattr(settings, 'HLS_HEARTBEAT_SECONDS', 60)
+
+        def on_progress(percent):
+            if percent >= reported[0] + PROGRESS_STEP or time.monotonic() - reported[1] >= heartbeat:
+                reported[:] = [max(percent, reported[0]), time.monotonic()]
+                rows.update(hls_progress=reported[0], hls_heartbeat_at=timezone.now())
+
+        try:
+            run_ffmpeg(ffmpeg_command(video.video_file.path, work_dir, ladder, has_audio), duration, on_progress)
+            try:
+                os.rename(work_dir, out_dir)
+            except OSError:
+                # Bir xil video boshqa oqimda tayyorlanib bo'lgan
+                if not os.path.exists(os.path.join(out_dir, MASTER_PLAYLIST)):
+                    raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    rows.update(hls_status='ready', hls_progress=100, hls_playlist=playlist_name(key), hls_error='')
+    return True
+
+
+def delete_unused_package(storage, name):
+    """Video fayli boshqa obyektlarda ishlatilmayotgan bo'lsa, paketini o'chirish"""
+    if not storage.exists(name):
+        shutil.rmtree(package_path(package_key(name)), ignore_errors=True)
+
+
+def _run_job(pk):
+    try:
+        package(pk)
+    except Exception as e:
+        logger.exception(f"HLS paketini tayyorlashda xatolik: video #{pk}")
+        VideoLesson.objects.filter(pk=pk).update(hls_status='failed', hls_error=str(e)[:2000])
+
+
+def schedule(pk):
+    """Tranzaksiya yakunlangach paketlashni navbatga qo'yish"""
+    background.schedule(
+        'hls', _run_job, pk,
+        workers=getattr(settings, 'HLS_WORKERS', 1),
+        run_async=getattr(settings, 'HLS_ASYNC', True)
+    )
+
+
+def stale_videos(cutoff):
+    """Navbatda yoki ishlayotgan, lekin ``cutoff`` dan beri faollik bo'lmagan videolar"""
+    return VideoLesson.objects.exclude(video_file='').filter(
+        hls_status__in=('pending', 'processing')
+    ).alias(
+        last_seen=Coalesce('hls_heartbeat_at', 'created_at')
+    ).filter(last_seen__lt=cutoff)
+
+
+def _on_video_change(instance, name, old_name, created):
+    if not created:
+        values = {'hls_status': 'pending', 'hls_progress': 0, 'hls_playlist': '', 'hls_error': '',
+                  'hls_heartbeat_at': timezone.now()}
+        VideoLesson.objects.filter(pk=instance.pk).update(**values)
+        for field, value in values.items():
+            setattr(instance, field, value)
+    if old_name:
+        storage = instance.video_file.storage
+        transaction.on_commit(lambda: delete_unused_package(storage, old_name))
+    if name:
+        schedule(instance.pk)
+
+
+def _on_video_delete(instance, name):
+    storage = instance.video_file.storage
+    transaction.on_commit(lambda: delete_unused_package(storage, name))
+
+
+def connect():
+    """Video fayli o'zgarishini paketlashga ulash (MaterialsConfig.ready dan chaqiriladi)"""
+    background.on_file_change(VideoLesson, 'video_file', 'hls', _on_video_change, _on_video_delete)
@@ -0,0 +1,115 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from materials.models import Material, MaterialCategory
+from materials.search import search_queryset
+
+User = get_user_model()
+
+SUBJECT_WORDS = [
+    'matematika', 'fizika', 'kimyo', 'biologiya', 'geografiya', 'tarix',
+    'adabiyot', 'informatika', 'algebra', 'geometriya', 'tenglama', 'funksiya',
+    'hujayra', 'molekula', 'energiya', 'harakat', 'kuch', 'tezlik', 'atom',
+    'element', 'reaksiya', 'iqlim', 'daryo', 'davlat', 'sivilizatsiya',
+    'sheriyat', 'roman', 'dastur', 'algoritm', 'massiv', 'taqdimot', 'dars',
+    'mashq', 'nazorat', 'mavzu', 'sinf', 'oquvchi', 'qoida', 'misol', 'masala',
+]
+
+QUERIES = ['fizika', 'algebra tenglama', 'hujayra', 'algor', 'daryo iqlim', 'molekula reaksiya']
+
+
+class Command(BaseCommand):
+    help = (
+        "Qidiruv tezligini solishtirish: icontains va to'liq matnli indeks. "
+        "Ma'lumotlar vaqtinchalik yaratiladi va oxirida bekor qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Yaratiladigan materiallar soni')
+        parser.add_argument('--repeat', type=int, default=20, help='Har bir so\'rov necha marta bajariladi')
+        parser.add_argument('--limit', type=int, default=50, help='Sahifadagi natijalar soni')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Tasodifiy to'ldiruvchi lug'at: mavzu so'zlari har bir yozuvda kam uchraydi
+        self.filler = [self._word(rng) for _ in range(5000)]
+
+        with transaction.atomic():
+            self._seed(rng, options['rows'])
+
+            header = ('So\'rov', 'icontains (ms)', 'indeks (ms)')
+            self.stdout.write(f'{header[0]:<22}{header[1]:>24}{header[2]:>24}')
+            for query in QUERIES:
+                legacy = self._measure(lambda: self._icontains(query), options)
+                indexed = self._measure(lambda: search_queryset(self._base(), query), options)
+                self.stdout.write(
+                    f"{query:<22}"
+                    f"{self._format(legacy):>24}"
+                    f"{self._format(indexed):>24}"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark tugadi, vaqtinchalik ma\'lumotlar o\'chirildi'))
+
+    def _seed(self, rng, rows):
+        """Vaqtinchalik katalog yaratish"""
+        self.stdout.write(f'{rows} ta material yaratilmoqda...')
+        author = User.objects.create_user(username='benchmark_search_author', password=None, subject='other')
+        category = MaterialCategory.objects.create(name='Benchmark')
+
+        def sentence(count, topics):
+            words = [rng.choice(self.filler) for _ in range(count)] + rng.sample(SUBJECT_WORDS, topics)
+            rng.shuffle(words)
+            return ' '.join(words)
+
+        batch = []
+        for i in range(rows):
+            batch.append(Material(
+                title=sentence(3, 1),
+                description=sentence(40, 2),
+                tags=', '.join(rng.sample(SUBJECT_WORDS, 2)),
+                material_type='document',
+                category=category,
+                author=author,
+                file=f'materials/benchmark_{i}.pdf',
+            ))
+            if len(batch) >= 5000:
+                Material.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Material.objects.bulk_create(batch)
+
+    def _word(self, rng):
+        return ''.join(rng.choice('abdefghijklmnopqrstuvxyz') for _ in range(rng.randint(4, 9)))
+
+    def _base(self):
+        return Material.objects.filter(is_public=True)
+
+    def _icontains(self, query):
+        """Oldingi qidiruv usuli"""
+        return self._base().filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(tags__icontains=query)
+        ).order_by('-created_at')
+
+    def _measure(self, build, options):
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            list(build().values_list('id', flat=True)[:options['limit']])
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def _format(self, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        return f'{statistics.median(timings):.1f} / p95 {p95:.1f}'
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from materials import uploads
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan (tugallanmagan yoki biriktirilmagan) bo'laklab yuklashlarni o'chirish"
+
+    def handle(self, *args, **options):
+        count = 0
+        for upload in uploads.expired_uploads().iterator():
+            uploads.discard(upload)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"{count} ta eski yuklash o'chirildi"))
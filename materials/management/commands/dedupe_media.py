@@ -0,0 +1,51 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from materials import storage
+
+
+class Command(BaseCommand):
+    help = ("Eski (nomi bo'yicha saqlangan) fayllarni kontent bo'yicha saqlashga o'tkazish "
+            "va hech bir obyektga biriktirilmagan fayllarni o'chirish")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Faqat nechta fayl o'tkazilishini ko'rsatish")
+
+    def handle(self, *args, **options):
+        moved = 0
+        legacy_files = {}
+        for model, field_name in storage.tracked_fields():
+            queryset = (
+                model._default_manager.exclude(**{f'{field_name}__isnull': True})
+                .exclude(**{field_name: ''})
+                .exclude(**{f'{field_name}__startswith': f'{storage.BLOB_DIR}/'})
+            )
+            for obj in queryset.iterator():
+                file = getattr(obj, field_name)
+                if not file.storage.exists(file.name):
+                    self.stderr.write(f"Fayl topilmadi: {file.name} ({model._meta.label} #{obj.pk})")
+                    continue
+                moved += 1
+                if options['dry_run']:
+                    continue
+                legacy_files[file.name] = file.storage
+                with transaction.atomic(), file.storage.open(file.name) as content:
+                    # Saqlashda xesh hisoblanadi - bir xil fayllardan bitta nusxa qoladi
+                    setattr(obj, field_name, file.storage.save(file.name, content))
+                    obj.save(update_fields=[field_name])
+
+        # O'tkazilgan eski fayllar endi hech qayerda ishlatilmaydi
+        for name, file_storage in legacy_files.items():
+            file_storage.delete(name)
+
+        orphans = 0
+        if not options['dry_run']:
+            for name in list(storage.orphan_blobs().values_list('name', flat=True)):
+                default_storage.delete(name)
+                orphans += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved} ta fayl o'tkazildi, {len(legacy_files)} ta eski fayl va "
+            f"{orphans} ta biriktirilmagan fayl o'chirildi"
+        ))
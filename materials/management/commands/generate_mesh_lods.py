@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from materials import meshes
+from materials.models import Model3D
+
+
+class Command(BaseCommand):
+    help = "3D modellar hajmi, uchlar/yoqlar soni va soddalashtirilgan nusxalarini yaratish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Qayta ishlangan modellarni ham qaytadan ishlash")
+
+    def handle(self, *args, **options):
+        queryset = Model3D.objects.exclude(model_file='').only('pk').order_by('pk')
+        if not options['force']:
+            queryset = queryset.filter(lods={})
+
+        done = skipped = failed = 0
+        for model in queryset.iterator():
+            try:
+                if meshes.process(model.pk):
+                    done += 1
+                else:
+                    skipped += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'Model #{model.pk}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{done} ta model qayta ishlandi, {skipped} tasi o'qilmadi, {failed} ta xatolik"
+        ))
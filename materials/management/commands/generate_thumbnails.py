@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from ustoziya_platform import thumbnails
+
+
+class Command(BaseCommand):
+    help = "Rasmlarning (muqova, avatar) kichik nusxalarini yaratish - nusxasi yo'q yoki eskirganlar uchun"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Tayyor nusxalarni ham qaytadan yaratish')
+
+    def handle(self, *args, **options):
+        for model, field_names in thumbnails.REGISTRY.items():
+            for field_name in field_names:
+                rfield = thumbnails.renditions_field(field_name)
+                queryset = model._default_manager.exclude(**{field_name: ''}).exclude(
+                    **{f'{field_name}__isnull': True}
+                ).only('pk', field_name, rfield).order_by('pk')
+
+                done = failed = 0
+                for obj in queryset.iterator():
+                    source = getattr(obj, field_name).name
+                    if not options['force'] and (getattr(obj, rfield) or {}).get('source') == source:
+                        continue
+                    try:
+                        thumbnails.generate(model, obj.pk, field_name)
+                        done += 1
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'{model._meta.label} #{obj.pk}: {e}')
+
+                self.stdout.write(self.style.SUCCESS(
+                    f'{model._meta.verbose_name_plural} ({field_name}): {done} ta yaratildi, {failed} ta xatolik'
+                ))
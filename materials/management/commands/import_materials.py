@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from materials import bulk_import
+from materials.models import MaterialCategory
+
+
+class Command(BaseCommand):
+    help = ("Papka yoki ZIP arxivdagi fayllarni CSV manifest bo'yicha materiallar sifatida import qilish "
+            "(to'xtab qolsa, qayta ishga tushirilganda davom etadi)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Fayllar papkasi yoki ZIP arxiv")
+        parser.add_argument('--manifest', help=f"CSV manifest (standart: manbadagi {bulk_import.MANIFEST_NAME})")
+        parser.add_argument('--author', help="Manifestda muallif ko'rsatilmagan qatorlar uchun foydalanuvchi nomi")
+        parser.add_argument('--category', help="Manifestda kategoriya ko'rsatilmagan qatorlar uchun nomi yoki ID si")
+        parser.add_argument('--private', action='store_true', help="Materiallar standart holatda yopiq bo'ladi")
+        parser.add_argument('--state', help=f"Holat fayli (standart: <manba>{bulk_import.STATE_SUFFIX})")
+        parser.add_argument('--batch-size', type=int, help="Bitta tranzaksiyada yoziladigan materiallar soni")
+        parser.add_argument('--workers', type=int, help="Fayllarni xeshlab saqlaydigan oqimlar soni")
+
+    def handle(self, *args, **options):
+        author = category = None
+        if options['author']:
+            author = get_user_model().objects.filter(username=options['author']).first()
+            if author is None:
+                raise CommandError(f"Foydalanuvchi topilmadi: {options['author']}")
+        if options['category']:
+            value = options['category']
+            category = MaterialCategory.objects.filter(
+                **({'pk': int(value)} if bulk_import.is_id(value) else {'name': value})
+            ).first()
+            if category is None:
+                raise CommandError(f"Kategoriya topilmadi: {value}")
+
+        started = time.monotonic()
+
+        def progress(done, total):
+            rate = done / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f"{done}/{total} ({done * 100 // max(total, 1)}%), {rate:.0f} fayl/s")
+
+        try:
+            result = bulk_import.run(
+                options['source'], options['manifest'], author=author, category=category,
+                is_public=not options['private'], state_path=options['state'],
+                batch_size=options['batch_size'], workers=options['workers'], progress=progress
+            )
+        except bulk_import.ImportSourceError as e:
+            raise CommandError(str(e))
+
+        for line, error in result['failed']:
+            self.stderr.write(f"{line}-qator: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} ta material yaratildi, {result['skipped']} tasi avval import qilingan, "
+            f"{len(result['failed'])} ta xato ({time.monotonic() - started:.1f} s)"
+        ))
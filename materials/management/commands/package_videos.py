@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from materials import hls
+from materials.models import VideoLesson
+
+
+class Command(BaseCommand):
+    help = "Video darsliklarni HLS ga o'tkazish - paketi tayyor bo'lmaganlar uchun"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Tayyor videolarni ham qaytadan tekshirish')
+
+    def handle(self, *args, **options):
+        queryset = VideoLesson.objects.exclude(video_file='').only('pk', 'hls_status').order_by('pk')
+        if not options['force']:
+            queryset = queryset.exclude(hls_status='ready')
+
+        done = failed = 0
+        for video in queryset.iterator():
+            try:
+                hls.package(video.pk)
+                done += 1
+            except Exception as e:
+                failed += 1
+                VideoLesson.objects.filter(pk=video.pk).update(hls_status='failed', hls_error=str(e)[:2000])
+                self.stderr.write(f'Video #{video.pk}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'{done} ta video tayyorlandi, {failed} ta xatolik'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from materials import author_stats
+from materials.models import AuthorStats, Material
+
+
+class Command(BaseCommand):
+    help = "Mualliflar statistikasini (AuthorStats) materiallardan qaytadan hisoblash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Bir tranzaksiyada hisoblanadigan mualliflar soni')
+        parser.add_argument('--author', type=int, action='append', help='Faqat shu muallif(lar) uchun (ID)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['author']:
+            author_ids = sorted(set(options['author']))
+        else:
+            # Materiali bor mualliflar va eski statistikasi qolganlar
+            author_ids = sorted(
+                set(Material.objects.order_by().values_list('author_id', flat=True).distinct())
+                | set(AuthorStats.objects.values_list('author_id', flat=True))
+            )
+
+        for start in range(0, len(author_ids), batch_size):
+            with transaction.atomic():
+                author_stats.rebuild(author_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(author_ids)} ta muallif statistikasi qayta hisoblandi'
+        ))
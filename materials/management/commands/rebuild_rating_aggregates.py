@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from materials.ratings import RATING_SOURCES, refresh_ratings
+
+
+class Command(BaseCommand):
+    help = "Reyting agregatlarini (rating_sum/rating_count/rating) baholardan qaytadan hisoblash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Bir tranzaksiyada yangilanadigan obyektlar soni')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for rating_model, target_field in RATING_SOURCES:
+            target_model = rating_model._meta.get_field(target_field).related_model
+            pks = list(target_model.objects.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(pks), batch_size):
+                # Faqat farqi bor obyektlar yangilanadi (rating_changed ham yuboriladi)
+                refresh_ratings(rating_model, target_field, pks[start:start + batch_size])
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{target_model._meta.verbose_name_plural}: {len(pks)} ta obyekt qayta hisoblandi'
+            ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from materials import recommendations
+
+
+class Command(BaseCommand):
+    help = "O'xshash materiallar tavsiyasini yuklab olishlar tarixidan qayta hisoblash (cron uchun)"
+
+    def handle(self, *args, **options):
+        count = recommendations.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{count} ta tavsiya saqlandi"))
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from materials import hls, meshes, video_metadata
+from materials.models import Model3D, VideoLesson
+
+
+class Command(BaseCommand):
+    help = "Jarayon qayta ishga tushganda yo'qolgan fon ishlarini (HLS, video ma'lumotlari, 3D modellar) qayta navbatga qo'yish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes', type=int, default=getattr(settings, 'BACKGROUND_JOB_STALE_MINUTES', 30),
+            help="Shuncha daqiqa faollik bo'lmagan ish to'xtab qolgan hisoblanadi"
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(minutes=options['minutes'])
+
+        videos = list(hls.stale_videos(cutoff).values_list('pk', 'width'))
+        VideoLesson.objects.filter(pk__in=[pk for pk, _ in videos]).update(
+            hls_status='pending', hls_progress=0, hls_error='', hls_heartbeat_at=now
+        )
+        for pk, width in videos:
+            hls.schedule(pk)
+            # Ma'lumotlarni aniqlash ishi ham shu paytda navbatga qo'yilgan edi
+            if not width:
+                video_metadata.schedule(pk)
+
+        models = list(meshes.stale_models(cutoff).values_list('pk', flat=True))
+        Model3D.objects.filter(pk__in=models).update(lods_queued_at=now)
+        for pk in models:
+            meshes.schedule(pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(videos)} ta video va {len(models)} ta 3D model qayta navbatga qo'yildi"
+        ))
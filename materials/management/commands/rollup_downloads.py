@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from materials import download_rollups
+
+
+class Command(BaseCommand):
+    help = "Yangi yuklab olishlarni statistikaga qo'shish va muddati o'tgan yozuvlarni o'chirish (cron uchun)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-prune', action='store_true', help="Eski yozuvlarni o'chirmaslik")
+
+    def handle(self, *args, **options):
+        count = download_rollups.update()
+        self.stdout.write(f"{count} ta yangi yuklab olish statistikaga qo'shildi")
+
+        if not options['no_prune']:
+            deleted = download_rollups.prune()
+            self.stdout.write(
+                f"{deleted['downloads']} ta eski yuklab olish va "
+                f"{deleted['hourly_rollups']} ta soatlik statistika o'chirildi"
+            )
+        self.stdout.write(self.style.SUCCESS('Tayyor'))
@@ -0,0 +1,569 @@
+"""3D modellarni qayta ishlash: hajm, uchlar/yoqlar soni va yengil (LOD) nusxalar.
+
+Model fayli yuklanganda yoki almashtirilganda, tranzaksiya yakunlangach fon
+oqimida mesh NumPy bilan o'qiladi (OBJ, STL, PLY, glTF/GLB). Haqiqiy fayl
+hajmi va uchlar/yoqlar soni ``Model3D`` qatoriga yoziladi. Mesh
+soddalashtirilgan nusxalari (``MESH_LOD_RATIOS`` - yoqlarning masalan 5% va
+25%) ixcham binar glTF (GLB) ko'rinishida saqlanadi::
+
+    lods/<kalit>/5.glb
+    lods/<kalit>/25.glb
+
+Soddalashtirish - uchlarni panjara kataklari bo'yicha birlashtirish (vertex
+clustering): katak o'lchami kerakli yoqlar soniga erishguncha tanlanadi.
+Kalit - model faylining kontent xeshi, bir xil modellar nusxalarni
+birgalikda ishlatadi. Brauzer avval kichik nusxani, so'ralganda to'liq
+modelni yuklaydi (serializer dagi ``lods``).
+
+FBX/DAE va siqilgan (Draco) glTF o'qilmaydi - faqat fayl hajmi yoziladi.
+Mavjud modellar uchun: ``python manage.py generate_mesh_lods``. Jarayon qayta
+ishga tushib, navbatdagi ish yo'qolgan bo'lsa (``lods_queued_at`` eskirgan,
+natija yo'q) - ``python manage.py requeue_stale_jobs``.
+
+Mesh fayldan o'qiladi: binar STL/PLY/GLB ma'lumotlari ``np.memmap`` orqali,
+OBJ va matnli formatlar qatorma-qator. ``MESH_PROCESS_MAX_SIZE`` dan katta
+fayllar o'qilmaydi - faqat hajmi yoziladi.
+
+Sozlamalar:
+    MESH_LOD_RATIOS - nusxalardagi yoqlar ulushi
+    MESH_LOD_MIN_FACES - shundan kam yoqli modellar uchun nusxa yaratilmaydi
+    MESH_LOD_ASYNC - False bo'lsa tranzaksiyadan keyin shu oqimda bajariladi
+    MESH_LOD_WORKERS - fon oqimlari soni
+    MESH_PROCESS_MAX_SIZE - qayta ishlanadigan fayl hajmi chegarasi (bayt, 0 - cheklanmagan)
+"""
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import posixpath
+import struct
+from array import array
+
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ustoziya_platform import background
+
+from .models import Model3D
+from .storage import content_hash
+
+logger = logging.getLogger(__name__)
+
+LOD_DIR = 'lods'
+
+
+class UnsupportedMesh(ValueError):
+    """Fayl formati o'qilmaydi (FBX, DAE, Draco va h.k.)"""
+
+
+# Buzuq fayl o'qilganda chiqadigan xatolar - qayta urinish natijani o'zgartirmaydi
+PARSE_ERRORS = (ValueError, struct.error, IndexError, KeyError, TypeError, EOFError)
+
+
+# ============ O'QISH ============
+
+def _unique_vertices(vertices, faces):
+    """Takrorlangan uchlarni birlashtirish (STL da har bir yoq o'z uchlariga ega)"""
+    vertices, inverse = np.unique(vertices, axis=0, return_inverse=True)
+    return vertices, inverse.reshape(-1)[faces]
+
+
+def _fan(polygon):
+    # Ko'pburchakni uchburchaklarga bo'lish (yelpig'ich)
+    return [(polygon[0], polygon[i], polygon[i + 1]) for i in range(1, len(polygon) - 1)]
+
+
+def _file_length(f):
+    position = f.seek(0, io.SEEK_END)
+    f.seek(0)
+    return position
+
+
+def _read_array(f, dtype, count):
+    """Joriy o'rindan ``count`` ta yozuv: diskdagi fayl uchun np.memmap, aks holda faqat shu qism o'qiladi"""
+    dtype = np.dtype(dtype)
+    size = dtype.itemsize * count
+    offset = f.tell()
+    try:
+        f.fileno()
+        mapped = np.memmap(f, dtype=dtype, mode='r', offset=offset, shape=(count,)) if count else np.empty(0, dtype)
+    except (AttributeError, OSError, ValueError):
+        data = f.read(size)
+        if len(data) < size:
+            raise ValueError("Fayl kutilganidan qisqa")
+        return np.frombuffer(data, dtype=dtype, count=count)
+    f.seek(offset + size)
+    return mapped
+
+
+def _lines(f):
+    # Matnli formatlar qatorma-qator o'qiladi - fayl xotiraga to'liq yuklanmaydi
+    for line in iter(f.readline, b''):
+        yield line.decode('utf-8', errors='ignore')
+
+
+def load_obj(f):
+    vertices, faces = array('f'), array('q')
+    for line in _lines(f):
+        if line.startswith('v '):
+            vertices.extend(map(float, line.split()[1:4]))
+        elif line.startswith('f '):
+            count = len(vertices) // 3
+            polygon = []
+            for token in line.split()[1:]:
+                index = int(token.split('/')[0])
+                # Manfiy indeks - oxirgi o'qilgan uchlarga nisbatan
+                polygon.append(index - 1 if index > 0 else count + index)
+            for triangle in _fan(polygon):
+                faces.extend(triangle)
+    return np.frombuffer(vertices, dtype=np.float32).reshape(-1, 3), np.frombuffer(faces, dtype=np.int64).reshape(-1, 3)
+
+
+def load_stl(f):
+    length = _file_length(f)
+    if length >= 84:
+        f.seek(80)
+        count = struct.unpack('<I', f.read(4))[0]
+        if length == 84 + count * 50:
+            record = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attr', '<u2')])
+            triangles = _read_array(f, record, count)['vertices']
+            faces = np.arange(count * 3, dtype=np.int64).reshape(-1, 3)
+            return _unique_vertices(triangles.reshape(-1, 3), faces)
+        f.seek(0)
+
+    coords = array('f')
+    for line in _lines(f):
+        parts = line.split()
+        if parts[:1] == ['vertex']:
+            coords.extend(map(float, parts[1:4]))
+    vertices = np.frombuffer(coords, dtype=np.float32).reshape(-1, 3)
+    faces = np.arange(len(vertices), dtype=np.int64).reshape(-1, 3)
+    return _unique_vertices(vertices, faces)
+
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+
+def load_ply(f):
+    if f.readline().strip() != b'ply':
+        raise UnsupportedMesh("PLY sarlavhasi topilmadi")
+    header = []
+    for line in iter(f.readline, b''):
+        if line.strip() == b'end_header':
+            break
+        header.append(line.decode('ascii', errors='ignore'))
+    else:
+        raise UnsupportedMesh("PLY sarlavhasi topilmadi")
+
+    fmt, elements = 'ascii', []
+    for line in header:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == 'format':
+            fmt = parts[1]
+        elif parts[0] == 'element':
+            elements.append({'name': parts[1], 'count': int(parts[2]), 'props': []})
+        elif parts[0] == 'property' and elements:
+            if parts[1] == 'list':
+                elements[-1]['props'].append((parts[4], PLY_TYPES[parts[2]], PLY_TYPES[parts[3]]))
+            else:
+                elements[-1]['props'].append((parts[2], PLY_TYPES[parts[1]], None))
+
+    vertices = faces = None
+    if fmt == 'ascii':
+        rows = _lines(f)
+        for element in elements:
+            if element['name'] == 'vertex':
+                names = [name for name, _, _ in element['props']]
+                axes = [names.index(axis) for axis in ('x', 'y', 'z')]
+                vertices = np.empty((element['count'], 3), dtype=np.float32)
+                for i in range(element['count']):
+                    values = next(rows).split()
+                    vertices[i] = [float(values[axis]) for axis in axes]
+            elif element['name'] == 'face':
+                faces = array('q')
+                for _ in range(element['count']):
+                    values = [int(v) for v in next(rows).split()]
+                    for triangle in _fan(values[1:values[0] + 1]):
+                        faces.extend(triangle)
+            else:
+                for _ in range(element['count']):
+                    next(rows)
+    else:
+        order = '<' if fmt == 'binary_little_endian' else '>'
+        for element in elements:
+            lists = [prop for prop in element['props'] if prop[2]]
+            if not lists:
+                dtype = np.dtype([(name, order + kind) for name, kind, _ in element['props']])
+                table = _read_array(f, dtype, element['count'])
+                if element['name'] == 'vertex':
+                    vertices = np.stack([table['x'], table['y'], table['z']], axis=1).astype(np.float32)
+                continue
+            if element['name'] != 'face' or len(element['props']) != 1:
+                raise UnsupportedMesh("PLY faylidagi elementlar tuzilishi qo'llab-quvvatlanmaydi")
+            _, count_kind, index_kind = lists[0]
+            # Tez yo'l: barcha yoqlar uchburchak
+            start = f.tell()
+            dtype = np.dtype([('n', order + count_kind), ('i', order + index_kind, 3)])
+            try:
+                table = _read_array(f, dtype, element['count'])
+            except ValueError:
+                table = None
+            if table is not None and np.all(table['n'] == 3):
+                faces = table['i'].astype(np.int64)
+                continue
+            f.seek(start)
+            faces = array('q')
+            count_type, index_type = np.dtype(order + count_kind), np.dtype(order + index_kind)
+            for _ in range(element['count']):
+                n = int(np.frombuffer(f.read(count_type.itemsize), count_type)[0])
+                indices = np.frombuffer(f.read(n * index_type.itemsize), index_type, n).tolist()
+                for triangle in _fan(indices):
+                    faces.extend(triangle)
+
+    if vertices is None or faces is None:
+        raise UnsupportedMesh("PLY faylida uchlar yoki yoqlar yo'q")
+    return vertices, np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+
+
+GLTF_COMPONENTS = {5120: 'i1', 5121: 'u1', 5122: 'i2', 5123: 'u2', 5125: 'u4', 5126: 'f4'}
+GLTF_SIZES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT4': 16}
+
+
+def _node_matrix(node):
+    if 'matrix' in node:
+        return np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T
+    x, y, z, w = node.get('rotation', (0, 0, 0, 1))
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.array(node.get('scale', (1, 1, 1)))
+    matrix[:3, 3] = node.get('translation', (0, 0, 0))
+    return matrix
+
+
+def load_gltf(f):
+    if f.read(4) == b'glTF':
+        # Binar qism (BIN) o'qilmaydi - kerakli accessor lar uning ichidan olinadi
+        f.seek(12)
+        json_length = struct.unpack('<I', f.read(8)[:4])[0]
+        gltf = json.loads(f.read(json_length))
+        chunk = f.read(8)
+        binary = _read_array(f, np.uint8, struct.unpack_from('<I', chunk)[0]) if len(chunk) == 8 else b''
+    else:
+        f.seek(0)
+        gltf = json.loads(f.read())
+        binary = b''
+
+    if set(gltf.get('extensionsRequired', [])) & {'KHR_draco_mesh_compression', 'EXT_meshopt_compression'}:
+        raise UnsupportedMesh("Siqilgan glTF qo'llab-quvvatlanmaydi")
+
+    buffers = []
+    for buffer in gltf.get('buffers', []):
+        uri = buffer.get('uri')
+        if uri is None:
+            buffers.append(binary)
+        elif uri.startswith('data:'):
+            buffers.append(base64.b64decode(uri.split(',', 1)[1]))
+        else:
+            raise UnsupportedMesh("Tashqi .bin faylli glTF qo'llab-quvvatlanmaydi")
+
+    def accessor(index):
+        acc = gltf['accessors'][index]
+        view = gltf['bufferViews'][acc['bufferView']]
+        kind = np.dtype('<' + GLTF_COMPONENTS[acc['componentType']])
+        size = GLTF_SIZES[acc['type']]
+        stride = view.get('byteStride') or kind.itemsize * size
+        start = view.get('byteOffset', 0) + acc.get('byteOffset', 0)
+        raw = np.frombuffer(buffers[view['buffer']], dtype=np.uint8, count=stride * (acc['count'] - 1) + kind.itemsize * size, offset=start)
+        rows = np.lib.stride_tricks.as_strided(raw, shape=(acc['count'], kind.itemsize * size), strides=(stride, 1))
+        return np.ascontiguousarray(rows).view(kind).reshape(acc['count'], size)
+
+    all_vertices, all_faces, base = [], [], 0
+
+    def visit(node_index, parent):
+        node = gltf['nodes'][node_index]
+        matrix = parent @ _node_matrix(node)
+        nonlocal base
+        for primitive in gltf['meshes'][node['mesh']]['primitives'] if 'mesh' in node else []:
+            if primitive.get('mode', 4) != 4 or 'POSITION' not in primitive.get('attributes', {}):
+                continue
+            positions = accessor(primitive['attributes']['POSITION']).astype(np.float64)
+            positions = positions @ matrix[:3, :3].T + matrix[:3, 3]
+            if 'indices' in primitive:
+                faces = accessor(primitive['indices']).astype(np.int64).reshape(-1, 3)
+            else:
+                faces = np.arange(len(positions), dtype=np.int64).reshape(-1, 3)
+            all_vertices.append(positions.astype(np.float32))
+            all_faces.append(faces + base)
+            base += len(positions)
+        for child in node.get('children', []):
+            visit(child, matrix)
+
+    scene = gltf.get('scenes', [{}])[gltf.get('scene', 0)] if gltf.get('scenes') else {}
+    roots = scene.get('nodes', range(len(gltf.get('nodes', []))))
+    for root in roots:
+        visit(root, np.eye(4))
+
+    if not all_faces:
+        raise UnsupportedMesh("glTF faylida uchburchakli mesh topilmadi")
+    return np.concatenate(all_vertices), np.concatenate(all_faces)
+
+
+LOADERS = {
+    '.obj': load_obj,
+    '.stl': load_stl,
+    '.ply': load_ply,
+    '.gltf': load_gltf,
+    '.glb': load_gltf,
+}
+
+
+def load_mesh(name, f):
+    """Fayl kengaytmasi bo'yicha meshni ochiq binar fayldan o'qish: (uchlar (N, 3), yoqlar (M, 3))"""
+    loader = LOADERS.get(posixpath.splitext(name)[1].lower())
+    if loader is None:
+        raise UnsupportedMesh(f"{posixpath.splitext(name)[1]} formati qo'llab-quvvatlanmaydi")
+    vertices, faces = loader(f)
+    if len(faces) and (faces.min() < 0 or faces.max() >= len(vertices)):
+        raise ValueError("Yoq indekslari uchlar sonidan oshib ketadi")
+    return vertices, faces
+
+
+# ============ SODDALASHTIRISH ============
+
+def cluster(vertices, faces, resolution):
+    """Uchlarni ``resolution``^3 panjara kataklari bo'yicha birlashtirish"""
+    low = vertices.min(axis=0)
+    span = float((vertices.max(axis=0) - low).max()) or 1.0
+    cells = np.minimum(((vertices - low) / span * resolution).astype(np.int64), resolution - 1)
+    keys = (cells[:, 0] * resolution + cells[:, 1]) * resolution + cells[:, 2]
+    _, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    # Katak uchi - undagi uchlarning o'rtachasi
+    counts = np.bincount(inverse)
+    merged = np.stack(
+        [np.bincount(inverse, weights=vertices[:, axis]) for axis in range(3)], axis=1
+    ) / counts[:, None]
+
+    new_faces = inverse[faces]
+    keep = (
+        (new_faces[:, 0] != new_faces[:, 1])
+        & (new_faces[:, 1] != new_faces[:, 2])
+        & (new_faces[:, 0] != new_faces[:, 2])
+    )
+    new_faces = new_faces[keep]
+    # Bir xil uchburchaklardan bittasi qoladi (aylanish yo'nalishi saqlanadi)
+    _, first = np.unique(np.sort(new_faces, axis=1), axis=0, return_index=True)
+    new_faces = new_faces[np.sort(first)]
+
+    # Ishlatilmay qolgan uchlarni olib tashlash
+    used, remap = np.unique(new_faces, return_inverse=True)
+    return merged[used].astype(np.float32), remap.reshape(-1, 3)
+
+
+def decimate(vertices, faces, target_faces):
+    """Yoqlari ``target_faces`` dan oshmaydigan eng batafsil soddalashtirish"""
+    best = None
+    low, high = 2, 1024
+    while low <= high:
+        resolution = (low + high) // 2
+        result = cluster(vertices, faces, resolution)
+        if len(result[1]) <= target_faces:
+            best = result
+            low = resolution + 1
+        else:
+            high = resolution - 1
+    return best if best is not None else cluster(vertices, faces, 2)
+
+
+def to_glb(vertices, faces):
+    """Meshni binar glTF (GLB) ga yozish"""
+    index_type, index_kind = (5123, '<u2') if len(vertices) < 65536 else (5125, '<u4')
+    indices = faces.astype(index_kind).tobytes()
+    indices += b'\0' * (-len(indices) % 4)
+    positions = vertices.astype('<f4').tobytes()
+    binary = indices + positions
+
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'ustoziya'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'mesh': 0}],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 1}, 'indices': 0, 'mode': 4}]}],
+        'buffers': [{'byteLength': len(binary)}],
+        'bufferViews': [
+            {'buffer': 0, 'byteOffset': 0, 'byteLength': faces.size * np.dtype(index_kind).itemsize, 'target': 34963},
+            {'buffer': 0, 'byteOffset': len(indices), 'byteLength': len(positions), 'target': 34962},
+        ],
+        'accessors': [
+            {'bufferView': 0, 'componentType': index_type, 'count': int(faces.size), 'type': 'SCALAR'},
+            {'bufferView': 1, 'componentType': 5126, 'count': len(vertices), 'type': 'VEC3',
+             'min': vertices.min(axis=0).tolist(), 'max': vertices.max(axis=0).tolist()},
+        ],
+    }
+    header = json.dumps(gltf, separators=(',', ':')).encode()
+    header += b' ' * (-len(header) % 4)
+    total = 12 + 8 + len(header) + 8 + len(binary)
+    return b''.join([
+        struct.pack('<4sII', b'glTF', 2, total),
+        struct.pack('<I4s', len(header), b'JSON'), header,
+        struct.pack('<I4s', len(binary), b'BIN\0'), binary,
+    ])
+
+
+# ============ SAQLASH ============
+
+def lod_storage():
+    return storages['lods']
+
+
+def lod_key(name):
+    """Model fayli uchun nusxalar kaliti (kontent xeshi; eski fayllar uchun nom xeshi)"""
+    return content_hash(name) or hashlib.sha256(name.encode()).hexdigest()
+
+
+def lod_name(key, ratio):
+    return f'{LOD_DIR}/{key}/{round(ratio * 100)}.glb'
+
+
+def lod_urls(obj):
+    """Tayyor nusxalar: [{ratio, faces, vertices, size, url}] (kichigidan boshlab)"""
+    lods = obj.lods or {}
+    if not obj.model_file or lods.get('source') != obj.model_file.name:
+        return []
+    key = lod_key(obj.model_file.name)
+    storage = lod_storage()
+    return [dict(level, url=storage.url(lod_name(key, level['ratio']))) for level in lods.get('levels', [])]
+
+
+def process(pk):
+    """Model faylini o'qib, hajm, uchlar/yoqlar soni va nusxalarni yozish"""
+    obj = Model3D.objects.filter(pk=pk).only('pk', 'model_file').first()
+    if obj is None or not obj.model_file:
+        return False
+
+    name = obj.model_file.name
+    # Shu orada fayl almashtirilgan bo'lsa, eski fayl natijasi yozilmaydi
+    rows = Model3D.objects.filter(pk=pk, model_file=name)
+    size = _file_size(obj.model_file)
+    limit = getattr(settings, 'MESH_PROCESS_MAX_SIZE', 200 * 1024 * 1024)
+    if limit and size > limit:
+        rows.update(file_size=size, lods={'source': name, 'levels': [], 'error': "Fayl qayta ishlash uchun juda katta"})
+        return False
+
+    try:
+        with obj.model_file.open('rb') as f:
+            vertices, faces = load_mesh(name, f)
+    except UnsupportedMesh as e:
+        rows.update(file_size=size, lods={'source': name, 'levels': [], 'error': str(e)})
+        return False
+    except PARSE_ERRORS as e:
+        # Natija yozilmasa, model requeue_stale_jobs da qayta-qayta navbatga tushadi
+        logger.warning(f"3D model faylini o'qib bo'lmadi: model #{pk}: {e!r}")
+        rows.update(file_size=size, lods={'source': name, 'levels': [], 'error': f"Faylni o'qib bo'lmadi: {e}"})
+        return False
+
+    key = lod_key(name)
+    storage = lod_storage()
+    levels = []
+    if len(faces) >= getattr(settings, 'MESH_LOD_MIN_FACES', 1000):
+        for ratio in sorted(getattr(settings, 'MESH_LOD_RATIOS', (0.05, 0.25))):
+            lod_vertices, lod_faces = decimate(vertices, faces, max(int(len(faces) * ratio), 1))
+            content = to_glb(lod_vertices, lod_faces)
+            lod = lod_name(key, ratio)
+            if storage.exists(lod):
+                storage.delete(lod)
+            storage.save(lod, ContentFile(content))
+            levels.append({'ratio': ratio, 'faces': len(lod_faces), 'vertices': len(lod_vertices), 'size': len(content)})
+
+    rows.update(
+        file_size=size, vertex_count=len(vertices), face_count=len(faces),
+        lods={'source': name, 'levels': levels}
+    )
+    return True
+
+
+def delete_unused_lods(storage, name):
+    """Model fayli boshqa obyektlarda ishlatilmayotgan bo'lsa, nusxalarini o'chirish"""
+    if storage.exists(name):
+        return
+    lods = lod_storage()
+    directory = f'{LOD_DIR}/{lod_key(name)}'
+    if lods.exists(directory):
+        for file_name in lods.listdir(directory)[1]:
+            lods.delete(f'{directory}/{file_name}')
+        os.rmdir(lods.path(directory))
+
+
+def _run_job(pk):
+    try:
+        process(pk)
+    except Exception:
+        logger.exception(f"3D modelni qayta ishlashda xatolik: model #{pk}")
+
+
+def schedule(pk):
+    """Tranzaksiya yakunlangach modelni qayta ishlashni navbatga qo'yish"""
+    background.schedule(
+        'meshes', _run_job, pk,
+        workers=getattr(settings, 'MESH_LOD_WORKERS', 1),
+        run_async=getattr(settings, 'MESH_LOD_ASYNC', True)
+    )
+
+
+def _file_size(file):
+    try:
+        return file.size
+    except OSError:
+        return 0
+
+
+def stale_models(cutoff):
+    """Qayta ishlash navbatga qo'yilgan, lekin ``cutoff`` gacha natija yozilmagan modellar"""
+    return Model3D.objects.exclude(model_file='').filter(lods={}).filter(
+        Q(lods_queued_at__lt=cutoff) | Q(lods_queued_at__isnull=True)
+    )
+
+
+def _on_model_change(instance, name, old_name, created):
+    # Haqiqiy hajm darhol, uchlar/yoqlar va nusxalar - fonda
+    values = {
+        'file_size': _file_size(instance.model_file) if name else 0, 'vertex_count': 0, 'face_count': 0, 'lods': {},
+        'lods_queued_at': timezone.now(),
+    }
+    Model3D.objects.filter(pk=instance.pk).update(**values)
+    for field, value in values.items():
+        setattr(instance, field, value)
+    if old_name:
+        storage = instance.model_file.storage
+        transaction.on_commit(lambda: delete_unused_lods(storage, old_name))
+    if name:
+        schedule(instance.pk)
+
+
+def _on_model_delete(instance, name):
+    storage = instance.model_file.storage
+    transaction.on_commit(lambda: delete_unused_lods(storage, name))
+
+
+def connect():
+    """Model fayli o'zgarishini qayta ishlashga ulash (MaterialsConfig.ready dan chaqiriladi)"""
+    background.on_file_change(Model3D, 'model_file', 'meshes', _on_model_change, _on_model_delete)
@@ -0,0 +1,86 @@
+from django.db import migrations
+
+SEARCH_FIELDS = {
+    'materials_material': ['title', 'description', 'tags'],
+    'materials_videolesson': ['title', 'description', 'tags'],
+    'materials_model3d': ['title', 'description'],
+}
+
+SEARCH_WEIGHTS = {
+    'title': 'A',
+    'tags': 'B',
+    'description': 'C',
+}
+
+
+def fts_table_name(table):
+    return f'{table}_fts'
+
+
+def _sqlite_statements(table, columns):
+    fts = fts_table_name(table)
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    old_values = ', '.join(f'old.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        # Faqat matnli ustunlar o'zgarganda indeks yangilanadi
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _postgres_statements(table, columns):
+    vector = ' || '.join(
+        f"setweight(to_tsvector('simple', coalesce({c}, '')), '{SEARCH_WEIGHTS[c]}')"
+        for c in columns
+    )
+    return [
+        f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX {table}_search_vector_gin ON {table} USING GIN (search_vector)",
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in SEARCH_FIELDS.items():
+        if vendor == 'sqlite':
+            statements = _sqlite_statements(table, columns)
+        elif vendor == 'postgresql':
+            statements = _postgres_statements(table, columns)
+        else:
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_FIELDS:
+        if vendor == 'sqlite':
+            fts = fts_table_name(table)
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {fts}')
+        elif vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_vector_gin')
+            schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0002_alter_material_material_type_videolesson_model3d_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='materialdownload',
+            name='downloaded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Yuklab olingan vaqt'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:41
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_material_ratings(apps, schema_editor):
+    Material = apps.get_model('materials', 'Material')
+    MaterialRating = apps.get_model('materials', 'MaterialRating')
+
+    totals = MaterialRating.objects.order_by().values('material').annotate(
+        total=Sum('rating'), count=Count('pk')
+    )
+    for row in totals.iterator():
+        Material.objects.filter(pk=row['material']).update(
+            rating_sum=row['total'],
+            rating_count=row['count'],
+            rating=row['total'] / row['count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0004_alter_materialdownload_downloaded_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Baholar soni'),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name="Baholar yig'indisi"),
+        ),
+        migrations.AddField(
+            model_name='model3d',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Baholar soni'),
+        ),
+        migrations.AddField(
+            model_name='model3d',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name="Baholar yig'indisi"),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Baholar soni'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name="Baholar yig'indisi"),
+        ),
+        migrations.RunPython(backfill_material_ratings, migrations.RunPython.noop),
+    ]
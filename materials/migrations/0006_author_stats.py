@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def backfill_author_stats(apps, schema_editor):
+    Material = apps.get_model('materials', 'Material')
+    AuthorStats = apps.get_model('materials', 'AuthorStats')
+
+    totals = Material.objects.order_by().values('author').annotate(
+        materials=Count('pk'), downloads=Sum('download_count'), ratings=Sum('rating')
+    )
+    stats = []
+    for row in totals.iterator():
+        top = Material.objects.filter(author_id=row['author']).order_by('-download_count', '-id')
+        stats.append(AuthorStats(
+            author_id=row['author'],
+            total_materials=row['materials'],
+            total_downloads=row['downloads'] or 0,
+            rating_total=row['ratings'] or 0.0,
+            top_material_ids=list(top.values_list('pk', flat=True)[:5])
+        ))
+    AuthorStats.objects.bulk_create(stats, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('materials', '0005_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='material_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Muallif')),
+                ('total_materials', models.PositiveIntegerField(default=0, verbose_name='Materiallar soni')),
+                ('total_downloads', models.PositiveIntegerField(default=0, verbose_name='Yuklab olishlar soni')),
+                ('rating_total', models.FloatField(default=0.0, verbose_name="Materiallar reytinglari yig'indisi")),
+                ('top_material_ids', models.JSONField(default=list, verbose_name="Eng ko'p yuklab olingan materiallar")),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan vaqt')),
+            ],
+            options={
+                'verbose_name': 'Muallif statistikasi',
+                'verbose_name_plural': 'Mualliflar statistikasi',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['author', '-download_count'], name='material_author_downloads_idx'),
+        ),
+        migrations.RunPython(backfill_author_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0006_author_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='thumbnail_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Kichik rasm nusxalari'),
+        ),
+        migrations.AddField(
+            model_name='model3d',
+            name='thumbnail_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Kichik rasm nusxalari'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='thumbnail_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Kichik rasm nusxalari'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('materials', '0007_thumbnail_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Fayl nomi')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Fayl hajmi (bayt)')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Qabul qilingan baytlar')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan vaqt')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan vaqt')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': "Bo'laklab yuklash",
+                'verbose_name_plural': "Bo'laklab yuklashlar",
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0009_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videolesson',
+            name='hls_error',
+            field=models.TextField(blank=True, editable=False, verbose_name='HLS xatoligi'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='hls_playlist',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='HLS master playlist'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='hls_progress',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='HLS tayyorlanishi (%)'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='hls_status',
+            field=models.CharField(choices=[('pending', 'Navbatda'), ('processing', 'Tayyorlanmoqda'), ('ready', 'Tayyor'), ('failed', 'Xatolik')], default='pending', editable=False, max_length=20, verbose_name='HLS holati'),
+        ),
+    ]
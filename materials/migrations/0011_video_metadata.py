@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0010_video_hls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videolesson',
+            name='bitrate',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Bitreyt (kbit/s)'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='height',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Balandligi (px)'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='width',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Kengligi (px)'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0011_video_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='model3d',
+            name='face_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Yoqlar soni'),
+        ),
+        migrations.AddField(
+            model_name='model3d',
+            name='lods',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Soddalashtirilgan nusxalar'),
+        ),
+        migrations.AddField(
+            model_name='model3d',
+            name='vertex_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Uchlar soni'),
+        ),
+    ]
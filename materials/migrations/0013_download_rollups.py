@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0012_model3d_mesh_lods'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DownloadRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('material', 'Material'), ('author', 'Muallif'), ('category', 'Kategoriya')], max_length=10, verbose_name='Kesim')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Obyekt ID')),
+                ('period', models.CharField(choices=[('hour', 'Soat'), ('day', 'Kun')], max_length=4, verbose_name='Oraliq')),
+                ('bucket', models.DateTimeField(verbose_name='Oraliq boshi')),
+                ('downloads', models.PositiveIntegerField(default=0, verbose_name='Yuklab olishlar soni')),
+                ('unique_users', models.PositiveIntegerField(default=0, verbose_name='Foydalanuvchilar soni')),
+            ],
+            options={
+                'verbose_name': 'Yuklab olishlar statistikasi',
+                'verbose_name_plural': 'Yuklab olishlar statistikasi',
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Nomi')),
+                ('last_id', models.PositiveBigIntegerField(default=0, verbose_name='Oxirgi yozuv ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan vaqt')),
+            ],
+            options={
+                'verbose_name': 'Statistika holati',
+                'verbose_name_plural': 'Statistika holatlari',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='materialdownload',
+            index=models.Index(fields=['downloaded_at'], name='material_download_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='downloadrollup',
+            index=models.Index(fields=['period', 'bucket'], name='download_rollup_bucket_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='downloadrollup',
+            constraint=models.UniqueConstraint(fields=('scope', 'object_id', 'period', 'bucket'), name='download_rollup_unique'),
+        ),
+    ]
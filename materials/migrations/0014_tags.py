@@ -0,0 +1,103 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _parse(value):
+    # tags.parse bilan bir xil: kichik harflar, bitta bo'shliq, takrorlanmasdan
+    names = (' '.join(tag.split()).lower()[:100] for tag in (value or '').split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def backfill_tags(apps, schema_editor):
+    Tag = apps.get_model('materials', 'Tag')
+    for model_name, through_name, field in (
+        ('Material', 'MaterialTag', 'material_id'),
+        ('VideoLesson', 'VideoLessonTag', 'video_id'),
+    ):
+        model = apps.get_model('materials', model_name)
+        through = apps.get_model('materials', through_name)
+        rows = model.objects.exclude(tags__isnull=True).exclude(tags='').values_list('pk', 'tags')
+        pairs = [(pk, name) for pk, value in rows.iterator() for name in _parse(value)]
+
+        names = {name for _, name in pairs}
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True, batch_size=1000)
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk')) if names else {}
+        through.objects.bulk_create(
+            [through(**{field: pk, 'tag_id': tag_ids[name]}) for pk, name in pairs],
+            ignore_conflicts=True, batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0013_download_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Teg')),
+            ],
+            options={
+                'verbose_name': 'Teg',
+                'verbose_name_plural': 'Teglar',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VideoLessonTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='materials.tag', verbose_name='Teg')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='materials.videolesson', verbose_name='Video darslik')),
+            ],
+            options={
+                'verbose_name': 'Video darslik tegi',
+                'verbose_name_plural': 'Video darslik teglari',
+            },
+        ),
+        migrations.CreateModel(
+            name='MaterialTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='materials.material', verbose_name='Material')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='materials.tag', verbose_name='Teg')),
+            ],
+            options={
+                'verbose_name': 'Material tegi',
+                'verbose_name_plural': 'Material teglari',
+            },
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='tag_index',
+            field=models.ManyToManyField(blank=True, related_name='materials', through='materials.MaterialTag', to='materials.tag', verbose_name='Teglar indeksi'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='tag_index',
+            field=models.ManyToManyField(blank=True, related_name='video_lessons', through='materials.VideoLessonTag', to='materials.tag', verbose_name='Teglar indeksi'),
+        ),
+        migrations.AddIndex(
+            model_name='videolessontag',
+            index=models.Index(fields=['tag', 'video'], name='video_lesson_tag_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='videolessontag',
+            constraint=models.UniqueConstraint(fields=('video', 'tag'), name='video_lesson_tag_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='materialtag',
+            index=models.Index(fields=['tag', 'material'], name='material_tag_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='materialtag',
+            constraint=models.UniqueConstraint(fields=('material', 'tag'), name='material_tag_unique'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0014_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedMaterial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name="O'rni")),
+                ('score', models.FloatField(verbose_name="O'xshashlik")),
+                ('co_downloads', models.PositiveIntegerField(verbose_name='Birga yuklab olganlar soni')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='materials.material', verbose_name='Material')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_for', to='materials.material', verbose_name="O'xshash material")),
+            ],
+            options={
+                'verbose_name': "O'xshash material",
+                'verbose_name_plural': "O'xshash materiallar",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='relatedmaterial',
+            constraint=models.UniqueConstraint(fields=('material', 'rank'), name='related_material_rank_unique'),
+        ),
+    ]
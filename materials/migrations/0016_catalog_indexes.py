@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0015_related_materials'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='assignment_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['teacher', '-created_at'], name='assignment_teacher_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['author', '-created_at'], name='material_author_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='material_public_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['category', '-created_at', '-id'], name='material_public_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['material_type', '-created_at', '-id'], name='material_public_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-download_count', '-id'], name='material_public_downloads_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-rating', '-id'], name='material_public_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['title', 'id'], name='material_public_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='model3d',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='model3d_public_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='model3d',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['category', '-created_at', '-id'], name='model3d_public_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentsubmission',
+            index=models.Index(fields=['assignment', '-submitted_at'], name='submission_assignment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videolesson',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='video_public_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videolesson',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['category', '-created_at', '-id'], name='video_public_category_idx'),
+        ),
+    ]
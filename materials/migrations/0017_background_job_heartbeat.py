@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0016_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='model3d',
+            name='lods_queued_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name="Qayta ishlash navbatga qo'yilgan vaqt"),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='hls_heartbeat_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='HLS ishi oxirgi faolligi'),
+        ),
+    ]
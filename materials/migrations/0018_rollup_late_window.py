@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0017_background_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rollupcheckpoint',
+            name='window_id_sum',
+            field=models.PositiveBigIntegerField(default=0, verbose_name="Oynadagi ID lar yig'indisi"),
+        ),
+        migrations.AddField(
+            model_name='rollupcheckpoint',
+            name='window_rows',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Oynadagi yozuvlar soni'),
+        ),
+    ]
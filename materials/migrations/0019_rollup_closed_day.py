@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0018_rollup_late_window'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rollupcheckpoint',
+            name='closed_day',
+            field=models.DateField(blank=True, null=True, verbose_name='Yopilgan oxirgi kun'),
+        ),
+        migrations.AlterField(
+            model_name='downloadrollup',
+            name='object_id',
+            field=models.PositiveBigIntegerField(verbose_name='Obyekt ID'),
+        ),
+    ]
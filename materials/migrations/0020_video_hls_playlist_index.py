@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0019_rollup_closed_day'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='videolesson',
+            index=models.Index(fields=['hls_playlist'], name='video_hls_playlist_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:21
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rated_materials(apps, schema_editor):
+    Material = apps.get_model('materials', 'Material')
+    AuthorStats = apps.get_model('materials', 'AuthorStats')
+
+    rated = Material.objects.filter(rating_count__gt=0).order_by().values('author').annotate(rated=Count('pk'))
+    for row in rated.iterator():
+        AuthorStats.objects.filter(author_id=row['author']).update(rated_materials=row['rated'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0020_video_hls_playlist_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='rated_materials',
+            field=models.PositiveIntegerField(default=0, verbose_name='Baholangan materiallar soni'),
+        ),
+        migrations.RunPython(backfill_rated_materials, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -5,6 +7,26 @@ from django.utils import timezone
 User = get_user_model()
 
 
+class AggregateFieldsMixin:
+    """Hisoblagich va reyting maydonlari faqat atomar ``UPDATE`` bilan yoziladi.
+
+    Mavjud obyektning oddiy ``save()`` i bu maydonlarni xotiradagi (eskirgan)
+    qiymatlar bilan qayta yozmasligi uchun ``update_fields`` ulardan boshqa
+    yuklangan maydonlar bilan to'ldiriladi.
+    """
+    AGGREGATE_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if not args and not self._state.adding and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.AGGREGATE_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
 class MaterialCategory(models.Model):
     """Material kategoriyalari"""
     
@@ -21,8 +43,24 @@ class MaterialCategory(models.Model):
         return self.name
 
 
-class Material(models.Model):
+class Tag(models.Model):
+    """Teg (kichik harflarda, ortiqcha bo'shliqlarsiz; qarang: tags.py)"""
+    
+    name = models.CharField(max_length=100, unique=True, verbose_name='Teg')
+    
+    class Meta:
+        verbose_name = 'Teg'
+        verbose_name_plural = 'Teglar'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class Material(AggregateFieldsMixin, models.Model):
     """Ta'lim materiallari"""
+
+    AGGREGATE_FIELDS = ('download_count', 'rating', 'rating_sum', 'rating_count')
     
     MATERIAL_TYPE_CHOICES = [
         ('presentation', 'PPT taqdimot'),
@@ -71,12 +109,25 @@ class Material(models.Model):
         null=True,
         verbose_name='Kichik rasm'
     )
+    thumbnail_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Kichik rasm nusxalari'
+    )
     tags = models.CharField(
         max_length=500,
         blank=True,
         null=True,
         verbose_name='Teglar (vergul bilan ajrating)'
     )
+    tag_index = models.ManyToManyField(
+        Tag,
+        through='MaterialTag',
+        related_name='materials',
+        blank=True,
+        verbose_name='Teglar indeksi'
+    )
     grade_level = models.CharField(
         max_length=50,
         blank=True,
@@ -95,6 +146,14 @@ class Material(models.Model):
         default=0.0,
         verbose_name='Reyting'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Baholar yig\'indisi'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Baholar soni'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Yaratilgan vaqt'
@@ -108,6 +167,29 @@ class Material(models.Model):
         verbose_name = 'Material'
         verbose_name_plural = 'Materiallar'
         ordering = ['-created_at']
+        indexes = [
+            # Muallifning eng ko'p yuklab olingan materiallari (AuthorStats.top_material_ids)
+            models.Index(fields=['author', '-download_count'], name='material_author_downloads_idx'),
+            # Foydalanuvchining materiallari (my-materials)
+            models.Index(fields=['author', '-created_at'], name='material_author_recent_idx'),
+            # Umumiy katalog: filtrlar va ruxsat etilgan tartiblar (qarang: views.MATERIAL_SORTS).
+            # Kalit bo'yicha sahifalash tartibga id ni qo'shadi - u ham indeksda
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_public=True), name='material_public_recent_idx'),
+            models.Index(
+                fields=['category', '-created_at', '-id'], condition=models.Q(is_public=True),
+                name='material_public_category_idx'
+            ),
+            models.Index(
+                fields=['material_type', '-created_at', '-id'], condition=models.Q(is_public=True),
+                name='material_public_type_idx'
+            ),
+            models.Index(
+                fields=['-download_count', '-id'], condition=models.Q(is_public=True),
+                name='material_public_downloads_idx'
+            ),
+            models.Index(fields=['-rating', '-id'], condition=models.Q(is_public=True), name='material_public_rating_idx'),
+            models.Index(fields=['title', 'id'], condition=models.Q(is_public=True), name='material_public_title_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -157,6 +239,78 @@ class MaterialRating(models.Model):
         return f"{self.material.title} - {self.user.get_full_name()} ({self.rating})"
 
 
+class MaterialTag(models.Model):
+    """Material va teg bog'lanishi (``Material.tags`` satridan, qarang: tags.py)"""
+    
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, verbose_name='Material')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, verbose_name='Teg')
+    
+    class Meta:
+        verbose_name = 'Material tegi'
+        verbose_name_plural = 'Material teglari'
+        constraints = [
+            models.UniqueConstraint(fields=['material', 'tag'], name='material_tag_unique'),
+        ]
+        indexes = [
+            # Teg bo'yicha aniq filtrlash
+            models.Index(fields=['tag', 'material'], name='material_tag_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.material_id} - {self.tag_id}"
+
+
+class AuthorStats(models.Model):
+    """Muallif materiallari statistikasi (oldindan hisoblangan, qarang: author_stats.py)"""
+    
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='material_stats',
+        verbose_name='Muallif'
+    )
+    total_materials = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Materiallar soni'
+    )
+    total_downloads = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Yuklab olishlar soni'
+    )
+    rating_total = models.FloatField(
+        default=0.0,
+        verbose_name='Materiallar reytinglari yig\'indisi'
+    )
+    # Bahosi bor (rating_count > 0) materiallar - o'rtacha reyting shular bo'yicha
+    rated_materials = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Baholangan materiallar soni'
+    )
+    top_material_ids = models.JSONField(
+        default=list,
+        verbose_name='Eng ko\'p yuklab olingan materiallar'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Yangilangan vaqt'
+    )
+    
+    class Meta:
+        verbose_name = 'Muallif statistikasi'
+        verbose_name_plural = 'Mualliflar statistikasi'
+    
+    def __str__(self):
+        return f"{self.author.get_full_name()} - {self.total_materials} ta material"
+    
+    @property
+    def avg_rating(self):
+        """Baholangan materiallar o'rtacha reytingi"""
+        if not self.rated_materials:
+            return 0.0
+        return self.rating_total / self.rated_materials
+
+
 class MaterialDownload(models.Model):
     """Material yuklab olishlar tarixi"""
     
@@ -173,7 +327,8 @@ class MaterialDownload(models.Model):
         verbose_name='Foydalanuvchi'
     )
     downloaded_at = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name='Yuklab olingan vaqt'
     )
     ip_address = models.GenericIPAddressField(
@@ -186,11 +341,148 @@ class MaterialDownload(models.Model):
         verbose_name = 'Material yuklab olish'
         verbose_name_plural = 'Material yuklab olishlar'
         ordering = ['-downloaded_at']
+        indexes = [
+            # Saqlash muddati o'tgan yozuvlarni o'chirish (download_rollups.py)
+            models.Index(fields=['downloaded_at'], name='material_download_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.material.title} - {self.user.get_full_name()}"
 
 
+class RelatedMaterial(models.Model):
+    """Birga yuklab olishlar bo'yicha o'xshash material (qarang: recommendations.py)"""
+    
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        related_name='related_links',
+        verbose_name='Material'
+    )
+    related = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        related_name='recommended_for',
+        verbose_name='O\'xshash material'
+    )
+    rank = models.PositiveSmallIntegerField(
+        verbose_name='O\'rni'
+    )
+    score = models.FloatField(
+        verbose_name='O\'xshashlik'
+    )
+    co_downloads = models.PositiveIntegerField(
+        verbose_name='Birga yuklab olganlar soni'
+    )
+    
+    class Meta:
+        verbose_name = 'O\'xshash material'
+        verbose_name_plural = 'O\'xshash materiallar'
+        constraints = [
+            # Tavsiyalar shu indeks bo'yicha tartibda o'qiladi
+            models.UniqueConstraint(fields=['material', 'rank'], name='related_material_rank_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.material_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class DownloadRollup(models.Model):
+    """Yuklab olishlar soni vaqt oralig'i bo'yicha (soatlik/kunlik), qarang: download_rollups.py"""
+    
+    SCOPE_CHOICES = [
+        ('material', 'Material'),
+        ('author', 'Muallif'),
+        ('category', 'Kategoriya'),
+    ]
+    PERIOD_CHOICES = [
+        ('hour', 'Soat'),
+        ('day', 'Kun'),
+    ]
+    
+    scope = models.CharField(
+        max_length=10,
+        choices=SCOPE_CHOICES,
+        verbose_name='Kesim'
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='Obyekt ID'
+    )
+    period = models.CharField(
+        max_length=4,
+        choices=PERIOD_CHOICES,
+        verbose_name='Oraliq'
+    )
+    bucket = models.DateTimeField(
+        verbose_name='Oraliq boshi'
+    )
+    downloads = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Yuklab olishlar soni'
+    )
+    unique_users = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Foydalanuvchilar soni'
+    )
+    
+    class Meta:
+        verbose_name = 'Yuklab olishlar statistikasi'
+        verbose_name_plural = 'Yuklab olishlar statistikasi'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'object_id', 'period', 'bucket'], name='download_rollup_unique'
+            ),
+        ]
+        indexes = [
+            # Saqlash muddati o'tgan soatlik yozuvlarni o'chirish
+            models.Index(fields=['period', 'bucket'], name='download_rollup_bucket_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} #{self.object_id} - {self.bucket} ({self.downloads})"
+
+
+class RollupCheckpoint(models.Model):
+    """Statistikaga qo'shilgan oxirgi manba yozuvi (qayta ishlash shu joydan davom etadi)"""
+    
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Nomi'
+    )
+    last_id = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Oxirgi yozuv ID'
+    )
+    # last_id oldidagi oynadagi yozuvlar soni va ID lar yig'indisi - kechikib
+    # tasdiqlangan (kichik ID li) yozuvlarni aniqlash uchun
+    window_rows = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Oynadagi yozuvlar soni'
+    )
+    window_id_sum = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Oynadagi ID lar yig\'indisi'
+    )
+    # Noyob foydalanuvchilar soni aniq hisoblangan oxirgi yopilgan kun
+    closed_day = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Yopilgan oxirgi kun'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Yangilangan vaqt'
+    )
+    
+    class Meta:
+        verbose_name = 'Statistika holati'
+        verbose_name_plural = 'Statistika holatlari'
+    
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
+
 class Assignment(models.Model):
     """O'qituvchi tomonidan berilgan topshiriqlar"""
     
@@ -267,6 +559,10 @@ class Assignment(models.Model):
         verbose_name = 'Topshiriq'
         verbose_name_plural = 'Topshiriqlar'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_active=True), name='assignment_active_recent_idx'),
+            models.Index(fields=['teacher', '-created_at'], name='assignment_teacher_recent_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -358,13 +654,26 @@ class StudentSubmission(models.Model):
         verbose_name_plural = 'O\'quvchi topshirig\'lari'
         ordering = ['-submitted_at']
         unique_together = ['assignment', 'student_email']
+        indexes = [
+            # Topshiriqqa kelgan ishlar (eng yangisi birinchi)
+            models.Index(fields=['assignment', '-submitted_at'], name='submission_assignment_idx'),
+        ]
     
     def __str__(self):
         return f"{self.assignment.title} - {self.student_name}"
 
 
-class VideoLesson(models.Model):
+class VideoLesson(AggregateFieldsMixin, models.Model):
     """Video darsliklar"""
+
+    AGGREGATE_FIELDS = ('view_count', 'rating', 'rating_sum', 'rating_count')
+    
+    HLS_STATUS_CHOICES = [
+        ('pending', 'Navbatda'),
+        ('processing', 'Tayyorlanmoqda'),
+        ('ready', 'Tayyor'),
+        ('failed', 'Xatolik'),
+    ]
     
     title = models.CharField(max_length=200, verbose_name='Darslik sarlavhasi')
     description = models.TextField(verbose_name='Darslik tavsifi')
@@ -378,10 +687,32 @@ class VideoLesson(models.Model):
         null=True,
         verbose_name='Video rasmi'
     )
+    thumbnail_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Kichik rasm nusxalari'
+    )
     duration = models.PositiveIntegerField(
         default=0,
         verbose_name='Davomiyligi (soniya)'
     )
+    # Video faylidan avtomatik aniqlanadi, qarang: video_metadata.py
+    width = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Kengligi (px)'
+    )
+    height = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Balandligi (px)'
+    )
+    bitrate = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Bitreyt (kbit/s)'
+    )
     category = models.ForeignKey(
         MaterialCategory,
         on_delete=models.CASCADE,
@@ -408,6 +739,13 @@ class VideoLesson(models.Model):
         null=True,
         verbose_name='Teglar'
     )
+    tag_index = models.ManyToManyField(
+        Tag,
+        through='VideoLessonTag',
+        related_name='video_lessons',
+        blank=True,
+        verbose_name='Teglar indeksi'
+    )
     is_public = models.BooleanField(
         default=True,
         verbose_name='Umumiy foydalanish'
@@ -420,6 +758,46 @@ class VideoLesson(models.Model):
         default=0.0,
         verbose_name='Reyting'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Baholar yig\'indisi'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Baholar soni'
+    )
+    # HLS (moslashuvchan bitreyt) paketlash holati, qarang: hls.py
+    hls_status = models.CharField(
+        max_length=20,
+        choices=HLS_STATUS_CHOICES,
+        default='pending',
+        editable=False,
+        verbose_name='HLS holati'
+    )
+    hls_progress = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='HLS tayyorlanishi (%)'
+    )
+    hls_playlist = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='HLS master playlist'
+    )
+    hls_error = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='HLS xatoligi'
+    )
+    # Navbatga qo'yilgan/ishlayotgan paketlashning oxirgi belgisi - jarayon qayta
+    # ishga tushsa, to'xtab qolgan ishlar shu bo'yicha topiladi (requeue_stale_jobs)
+    hls_heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='HLS ishi oxirgi faolligi'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Yaratilgan vaqt'
@@ -429,13 +807,43 @@ class VideoLesson(models.Model):
         verbose_name = 'Video darslik'
         verbose_name_plural = 'Video darsliklar'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_public=True), name='video_public_recent_idx'),
+            models.Index(
+                fields=['category', '-created_at', '-id'], condition=models.Q(is_public=True),
+                name='video_public_category_idx'
+            ),
+            models.Index(fields=['hls_playlist'], name='video_hls_playlist_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
 
-class Model3D(models.Model):
+class VideoLessonTag(models.Model):
+    """Video darslik va teg bog'lanishi (``VideoLesson.tags`` satridan, qarang: tags.py)"""
+    
+    video = models.ForeignKey(VideoLesson, on_delete=models.CASCADE, verbose_name='Video darslik')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, verbose_name='Teg')
+    
+    class Meta:
+        verbose_name = 'Video darslik tegi'
+        verbose_name_plural = 'Video darslik teglari'
+        constraints = [
+            models.UniqueConstraint(fields=['video', 'tag'], name='video_lesson_tag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'video'], name='video_lesson_tag_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.video_id} - {self.tag_id}"
+
+
+class Model3D(AggregateFieldsMixin, models.Model):
     """3D modellar"""
+
+    AGGREGATE_FIELDS = ('download_count', 'rating', 'rating_sum', 'rating_count')
     
     MODEL_TYPE_CHOICES = [
         ('educational', 'Ta\'limiy'),
@@ -460,6 +868,12 @@ class Model3D(models.Model):
         null=True,
         verbose_name='Model rasmi'
     )
+    thumbnail_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Kichik rasm nusxalari'
+    )
     model_type = models.CharField(
         max_length=20,
         choices=MODEL_TYPE_CHOICES,
@@ -489,6 +903,28 @@ class Model3D(models.Model):
         default=0,
         verbose_name='Fayl hajmi (bayt)'
     )
+    vertex_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Uchlar soni'
+    )
+    face_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Yoqlar soni'
+    )
+    lods = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Soddalashtirilgan nusxalar'
+    )
+    lods_queued_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Qayta ishlash navbatga qo\'yilgan vaqt'
+    )
     is_interactive = models.BooleanField(
         default=False,
         verbose_name='Interaktiv'
@@ -505,6 +941,14 @@ class Model3D(models.Model):
         default=0.0,
         verbose_name='Reyting'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Baholar yig\'indisi'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Baholar soni'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Yaratilgan vaqt'
@@ -514,6 +958,93 @@ class Model3D(models.Model):
         verbose_name = '3D model'
         verbose_name_plural = '3D modellar'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_public=True), name='model3d_public_recent_idx'),
+            models.Index(
+                fields=['category', '-created_at', '-id'], condition=models.Q(is_public=True),
+                name='model3d_public_category_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return self.title
+
+class ChunkedUpload(models.Model):
+    """Bo'laklab yuklanayotgan (davom ettirish mumkin bo'lgan) fayl, qarang: uploads.py"""
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='chunked_uploads',
+        verbose_name='Foydalanuvchi'
+    )
+    filename = models.CharField(
+        max_length=255,
+        verbose_name='Fayl nomi'
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name='Fayl hajmi (bayt)'
+    )
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Qabul qilingan baytlar'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Yaratilgan vaqt'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Yangilangan vaqt'
+    )
+    
+    class Meta:
+        verbose_name = 'Bo\'laklab yuklash'
+        verbose_name_plural = 'Bo\'laklab yuklashlar'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+    
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+
+class MediaBlob(models.Model):
+    """Kontenti bo'yicha (SHA-256) saqlangan fayl va unga havolalar soni, qarang: storage.py"""
+    
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Fayl yo\'li'
+    )
+    sha256 = models.CharField(
+        max_length=64,
+        db_index=True,
+        verbose_name='SHA-256'
+    )
+    size = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Fayl hajmi (bayt)'
+    )
+    ref_count = models.IntegerField(
+        default=0,
+        verbose_name='Havolalar soni'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Yaratilgan vaqt'
+    )
+    
+    class Meta:
+        verbose_name = 'Media fayl'
+        verbose_name_plural = 'Media fayllar'
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.name} ({self.ref_count})"
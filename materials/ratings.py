@@ -0,0 +1,126 @@
+"""Reyting agregatlarini (``rating_sum``/``rating_count``/``rating``) yangilash.
+
+Har bir baho yaratilganda, o'zgartirilganda yoki o'chirilganda tegishli
+obyekt reytingi barcha baholarni qayta hisoblamasdan, bitta atomar
+``UPDATE`` bilan yangilanadi (``F('rating_sum') + farq``). Eski baho
+xotiradan emas, saqlash/o'chirishdan oldin bazadan o'qiladi - tranzaksiya
+ichida baho qatori ``SELECT ... FOR UPDATE`` bilan qulflanadi, shuning uchun
+bir vaqtda o'zgartirilgan baho agregatni siljitmaydi. ``refresh_ratings`` -
+agregatlarni baholardan to'liq qayta hisoblash (faqat tuzatish uchun,
+``rebuild_rating_aggregates`` buyrug'i).
+
+Yangi baho modeli uchun (masalan, video darslik baholari)
+``register(VideoLessonRating, 'video')`` chaqirish kifoya - maqsad modelda
+``rating``, ``rating_sum`` va ``rating_count`` maydonlari bo'lishi kerak.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal
+
+# (baho modeli, maqsad obyektga ForeignKey nomi)
+RATING_SOURCES = []
+
+# Obyekt agregatlari yangilangandan keyin yuboriladi:
+# sender - maqsad model, pk, sum_delta, count_delta
+rating_changed = Signal()
+
+
+def rating_expression(sum_expression, count_expression):
+    """O'rtacha reyting ifodasi: yig'indi / soni (baho bo'lmasa 0)"""
+    return Case(
+        When(
+            GreaterThan(count_expression, 0),
+            then=Cast(sum_expression, FloatField()) / count_expression
+        ),
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+
+
+def apply_rating_change(model, pk, sum_delta, count_delta):
+    """Obyekt reyting agregatlarini atomar o'zgartirish"""
+    if not sum_delta and not count_delta:
+        return
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('rating_count') + count_delta
+    model.objects.filter(pk=pk).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=rating_expression(new_sum, new_count)
+    )
+    rating_changed.send(sender=model, pk=pk, sum_delta=sum_delta, count_delta=count_delta)
+
+
+def refresh_ratings(rating_model, target_field, pks):
+    """Obyektlar agregatlarini baholardan to'liq qayta hisoblash (tuzatish uchun, qatorlar qulflangan holda)"""
+    target_model = rating_model._meta.get_field(target_field).related_model
+    attname = rating_model._meta.get_field(target_field).attname
+    pks = sorted({pk for pk in pks if pk is not None})
+    if not pks:
+        return
+    with transaction.atomic():
+        # pk tartibida qulflash - qayta bog'lashda ikki obyekt bir-birini kutib qolmaydi
+        stored = dict(
+            (pk, (rating_sum, rating_count)) for pk, rating_sum, rating_count in
+            target_model.objects.select_for_update().filter(pk__in=pks).order_by('pk')
+            .values_list('pk', 'rating_sum', 'rating_count')
+        )
+        actual = dict(
+            (pk, (total, count)) for pk, total, count in
+            rating_model.objects.filter(**{f'{attname}__in': list(stored)}).order_by().values(attname)
+            .annotate(total=Sum('rating'), count=Count('pk')).values_list(attname, 'total', 'count')
+        )
+        for pk, (rating_sum, rating_count) in stored.items():
+            total, count = actual.get(pk, (0, 0))
+            apply_rating_change(target_model, pk, total - rating_sum, count - rating_count)
+
+
+def register(rating_model, target_field):
+    """Baho modelini agregatlarni yangilash mexanizmiga ulash"""
+    RATING_SOURCES.append((rating_model, target_field))
+    target_model = rating_model._meta.get_field(target_field).related_model
+    attname = rating_model._meta.get_field(target_field).attname
+
+    def stored(instance):
+        # Bazadagi (target_id, baho) - tranzaksiya ichida qator qulflanadi
+        rows = rating_model.objects.filter(pk=instance.pk)
+        if connection.in_atomic_block:
+            rows = rows.select_for_update()
+        return rows.values_list(attname, 'rating').first()
+
+    def before_save(sender, instance, raw=False, **kwargs):
+        instance._rating_stored = None if raw or instance._state.adding else stored(instance)
+
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        target_id, value = getattr(instance, attname), int(instance.rating)
+        old = None if created else instance._rating_stored
+        if old is None:
+            apply_rating_change(target_model, target_id, value, 1)
+        elif old[0] != target_id:
+            apply_rating_change(target_model, old[0], -int(old[1]), -1)
+            apply_rating_change(target_model, target_id, value, 1)
+        else:
+            apply_rating_change(target_model, target_id, value - int(old[1]), 0)
+
+    def cascading(origin):
+        # Obyektning o'zi o'chirilayotgan bo'lsa (CASCADE), yangilash shart emas
+        return isinstance(origin, target_model) or getattr(origin, 'model', None) is target_model
+
+    def before_delete(sender, instance, origin=None, **kwargs):
+        instance._rating_stored = None if cascading(origin) else stored(instance)
+
+    def on_delete(sender, instance, origin=None, **kwargs):
+        old = getattr(instance, '_rating_stored', None)
+        if old is not None:
+            apply_rating_change(target_model, old[0], -int(old[1]), -1)
+
+    uid = f'rating_aggregate_{rating_model._meta.label_lower}'
+    pre_save.connect(before_save, sender=rating_model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=rating_model, weak=False, dispatch_uid=uid)
+    pre_delete.connect(before_delete, sender=rating_model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_delete, sender=rating_model, weak=False, dispatch_uid=uid)
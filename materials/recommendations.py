@@ -0,0 +1,154 @@
+"""O'xshash materiallar tavsiyasi - birga yuklab olishlar asosida (item-item).
+
+Bitta foydalanuvchi yuklab olgan materiallar o'zaro bog'liq deb qaraladi.
+Yuklab olishlar tarixidan foydalanuvchi x material siyrak matritsasi tuziladi
+va materiallar o'xshashligi kosinus bo'yicha hisoblanadi::
+
+    o'xshashlik(i, j) = birga_yuklaganlar(i, j) / sqrt(yuklaganlar(i) * yuklaganlar(j))
+
+Har bir material uchun eng o'xshash ``RELATED_MATERIALS_TOP_K`` tasi
+``RelatedMaterial`` jadvaliga yoziladi; API bitta indeksli so'rov bilan
+o'qiydi (``/api/materials/<id>/related/``).
+
+Qayta hisoblash (``python manage.py rebuild_related_materials``, cron orqali
+masalan har kecha) tarixni qismlab (``RELATED_STREAM_CHUNK``) o'qiydi va
+faqat noyob (foydalanuvchi, material) juftliklarini xotirada saqlaydi.
+Matritsa ko'paytmasi ham materiallar bloklari bo'yicha hisoblanadi, shuning
+uchun xotira yozuvlar soniga emas, noyob juftliklar soniga bog'liq. Juda ko'p
+material yuklagan foydalanuvchilar (robotlar) hisobga olinmaydi.
+
+SciPy kerak (faqat qayta hisoblashda).
+
+Sozlamalar:
+    RELATED_MATERIALS_TOP_K - har bir material uchun tavsiyalar soni
+    RELATED_MIN_CO_DOWNLOADS - shundan kam birga yuklab olingan juftliklar hisobga olinmaydi
+    RELATED_MAX_USER_ITEMS - shundan ko'p material yuklagan foydalanuvchilar hisobga olinmaydi
+    RELATED_WINDOW_DAYS - tarixning qancha kunlik qismi ishlatiladi (0 - hammasi)
+    RELATED_STREAM_CHUNK - tarixdan bir urinishda o'qiladigan yozuvlar soni
+    RELATED_BLOCK_SIZE - o'xshashlik bir urinishda hisoblanadigan materiallar soni
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Material, MaterialDownload, RelatedMaterial
+
+# (foydalanuvchi, material) juftligi bitta int64 kalitda: foydalanuvchi << 32 | material
+ID_BITS = 32
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def download_pairs():
+    """Tarixdan noyob (foydalanuvchi ID, material ID) juftliklari - qismlab o'qib"""
+    chunk = _setting('RELATED_STREAM_CHUNK', 100_000)
+    queryset = MaterialDownload.objects.order_by('pk')
+    days = _setting('RELATED_WINDOW_DAYS', 180)
+    if days:
+        queryset = queryset.filter(downloaded_at__gte=timezone.now() - timedelta(days=days))
+
+    keys = np.empty(0, dtype=np.int64)
+    pending = []
+    pending_size = 0
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).values_list('pk', 'user_id', 'material_id')[:chunk])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        batch = np.array(rows, dtype=np.int64)
+        pending.append(np.unique((batch[:, 1] << ID_BITS) | batch[:, 2]))
+        pending_size += len(pending[-1])
+        # Qismlar yig'ilib qolmasligi uchun vaqti-vaqti bilan birlashtiriladi
+        if pending_size >= chunk * 10:
+            keys = np.unique(np.concatenate([keys] + pending))
+            pending, pending_size = [], 0
+    if pending:
+        keys = np.unique(np.concatenate([keys] + pending))
+    return keys >> ID_BITS, keys & ((1 << ID_BITS) - 1)
+
+
+def user_item_matrix(user_ids, material_ids):
+    """Foydalanuvchi x material ikkilik matritsasi (CSC) va material ID lari"""
+    from scipy import sparse
+
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    items, item_index = np.unique(material_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(user_index), dtype=np.float32), (user_index, item_index)),
+        shape=(len(users), len(items))
+    )
+
+    max_items = _setting('RELATED_MAX_USER_ITEMS', 500)
+    per_user = np.diff(matrix.indptr)
+    if max_items and (per_user > max_items).any():
+        matrix = matrix[per_user <= max_items]
+    return matrix.tocsc(), items
+
+
+def top_neighbours(matrix, items):
+    """Har bir material uchun eng o'xshash materiallar: {material ID: [(ID, o'xshashlik, birga), ...]}"""
+    top_k = _setting('RELATED_MATERIALS_TOP_K', 20)
+    min_co = _setting('RELATED_MIN_CO_DOWNLOADS', 2)
+    block_size = _setting('RELATED_BLOCK_SIZE', 1000)
+
+    popularity = np.asarray(matrix.sum(axis=0)).ravel()
+    transposed = matrix.T.tocsr()
+    neighbours = {}
+    for start in range(0, len(items), block_size):
+        stop = min(start + block_size, len(items))
+        # Blok materiallari x barcha materiallar: birga yuklab olishlar soni
+        co = (transposed[start:stop] @ matrix).tocsr()
+        for row in range(stop - start):
+            item = start + row
+            cols = co.indices[co.indptr[row]:co.indptr[row + 1]]
+            counts = co.data[co.indptr[row]:co.indptr[row + 1]]
+            keep = (cols != item) & (counts >= min_co)
+            cols, counts = cols[keep], counts[keep]
+            if not len(cols):
+                continue
+            scores = counts / np.sqrt(popularity[item] * popularity[cols])
+            if len(cols) > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                cols, counts, scores = cols[best], counts[best], scores[best]
+            order = np.lexsort((items[cols], -scores))
+            neighbours[int(items[item])] = [
+                (int(items[cols[i]]), float(scores[i]), int(counts[i])) for i in order
+            ]
+    return neighbours
+
+
+def rebuild():
+    """O'xshash materiallar jadvalini tarixdan qayta hisoblash"""
+    user_ids, material_ids = download_pairs()
+    neighbours = {}
+    if len(user_ids):
+        matrix, items = user_item_matrix(user_ids, material_ids)
+        neighbours = top_neighbours(matrix, items)
+
+    # Tarix yozuvlari materiallar bilan birga o'chiriladi, lekin hisoblash davomida o'chirilganlari bo'lishi mumkin
+    existing = set(Material.objects.values_list('pk', flat=True)) if neighbours else set()
+    rows = [
+        RelatedMaterial(material_id=material_id, related_id=related_id, rank=rank, score=score, co_downloads=co)
+        for material_id, related in neighbours.items() if material_id in existing
+        for rank, (related_id, score, co) in enumerate(
+            [item for item in related if item[0] in existing]
+        )
+    ]
+
+    with transaction.atomic():
+        RelatedMaterial.objects.all().delete()
+        RelatedMaterial.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def related_queryset(material):
+    """Material uchun tavsiyalar (ochiqlari, o'xshashlik tartibida) - (material, rank) indeksi bo'yicha"""
+    return Material.objects.filter(
+        is_public=True, recommended_for__material=material
+    ).order_by('recommended_for__rank')
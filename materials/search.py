@@ -0,0 +1,159 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# Qidiruv indeksiga kiradigan maydonlar (jadval -> ustunlar).
+# SQLite'da FTS5 virtual jadvali, PostgreSQL'da esa tsvector ustuni
+# va GIN indeksi ishlatiladi (qarang: migrations/0003_search_index.py).
+SEARCH_FIELDS = {
+    'materials_material': ['title', 'description', 'tags'],
+    'materials_videolesson': ['title', 'description', 'tags'],
+    'materials_model3d': ['title', 'description'],
+}
+
+# Ustun og'irliklari (PostgreSQL setweight uchun)
+SEARCH_WEIGHTS = {
+    'title': 'A',
+    'tags': 'B',
+    'description': 'C',
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_table_name(table):
+    """SQLite FTS5 jadvali nomi"""
+    return f'{table}_fts'
+
+
+def _sqlite_triggers(table):
+    """FTS5 indeksini asosiy jadval bilan sinxron saqlovchi triggerlar"""
+    fts = fts_table_name(table)
+    columns = SEARCH_FIELDS[table]
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    old_values = ', '.join(f'old.{c}' for c in columns)
+    return {
+        f'{fts}_ai': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+        ),
+        f'{fts}_ad': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"
+        ),
+        f'{fts}_au': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+        ),
+    }
+
+
+def ensure_search_triggers(using='default', **kwargs):
+    """SQLite triggerlarini qayta tiklash (post_migrate signali uchun).
+
+    SQLite'da ``ALTER TABLE`` cheklangani sababli Django ko'p migratsiyalarda
+    jadvalni qaytadan yaratadi va bunda triggerlar o'chib ketadi. Triggerlar
+    yo'q bo'lsa, ular qayta yaratiladi va indeks to'liq qayta quriladi.
+    """
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+
+        for table in SEARCH_FIELDS:
+            fts = fts_table_name(table)
+            if fts not in existing:
+                continue
+            triggers = _sqlite_triggers(table)
+            missing = [name for name in triggers if name not in existing]
+            if not missing:
+                continue
+            for name in missing:
+                cursor.execute(triggers[name])
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _tokens(query):
+    """Qidiruv so'rovini so'zlarga ajratish"""
+    return TOKEN_RE.findall(query or '')
+
+
+def _sqlite_match(tokens):
+    """FTS5 MATCH ifodasi - oxirgi so'z prefiks sifatida qidiriladi"""
+    parts = [f'"{token}"' for token in tokens]
+    parts[-1] += '*'
+    return ' '.join(parts)
+
+
+def _postgres_tsquery(tokens):
+    """to_tsquery ifodasi - oxirgi so'z prefiks sifatida qidiriladi"""
+    parts = [token.replace("'", '') for token in tokens]
+    parts[-1] += ':*'
+    return ' & '.join(parts)
+
+
+def is_search_indexed():
+    """Joriy ma'lumotlar bazasi to'liq matnli indeksni qo'llab-quvvatlaydimi"""
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def _icontains_filter(queryset, query):
+    """Indekssiz eski qidiruv (boshqa ma'lumotlar bazalari uchun)"""
+    condition = Q()
+    for field in SEARCH_FIELDS[queryset.model._meta.db_table]:
+        condition |= Q(**{f'{field}__icontains': query})
+    return queryset.filter(condition)
+
+
+def search_queryset(queryset, query):
+    """Querysetni to'liq matnli indeks orqali filtrlash.
+
+    Natijaga ``search_rank`` annotatsiyasi qo'shiladi va natijalar
+    dolzarblik bo'yicha tartiblanadi (eng mosi birinchi).
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return queryset
+
+    table = queryset.model._meta.db_table
+    if table not in SEARCH_FIELDS:
+        raise ValueError(f'{table} jadvali qidiruv indeksiga kiritilmagan')
+
+    if not is_search_indexed():
+        return _icontains_filter(queryset, query).order_by('-created_at')
+
+    qn = connection.ops.quote_name
+
+    if connection.vendor == 'sqlite':
+        fts = qn(fts_table_name(table))
+        # FTS jadvali asosiy jadvalga rowid orqali bitta JOIN bilan ulanadi;
+        # bm25() qiymati qancha kichik bo'lsa, natija shuncha mos
+        return queryset.extra(
+            tables=[fts_table_name(table)],
+            where=[f'{fts}.rowid = {qn(table)}.{qn("id")}', f'{fts} MATCH %s'],
+            params=[_sqlite_match(tokens)],
+        ).annotate(
+            search_rank=RawSQL(f'bm25({fts})', [], output_field=FloatField())
+        ).order_by('search_rank', '-created_at')
+
+    tsquery = _postgres_tsquery(tokens)
+    vector = f'{qn(table)}.{qn("search_vector")}'
+    return queryset.annotate(
+        search_match=RawSQL(
+            f"{vector} @@ to_tsquery('simple', %s)",
+            [tsquery],
+            output_field=BooleanField()
+        ),
+        search_rank=RawSQL(
+            f"ts_rank({vector}, to_tsquery('simple', %s))",
+            [tsquery],
+            output_field=FloatField()
+        )
+    ).filter(search_match=True).order_by('-search_rank', '-created_at')
@@ -1,8 +1,16 @@
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
 from .models import (
     Material, MaterialCategory, MaterialRating, MaterialDownload,
-    Assignment, StudentSubmission, VideoLesson, Model3D
+    Assignment, StudentSubmission, VideoLesson, Model3D, ChunkedUpload
 )
+from . import hls, meshes, tags, uploads
+from ustoziya_platform.thumbnails import thumbnail_url, thumbnail_urls
+
+
+# Kategoriyalar ro'yxati keshi (material/kategoriya o'zgarganda tozalanadi)
+CATEGORY_CACHE_KEY = 'materials:categories'
 
 
 class MaterialCategorySerializer(serializers.ModelSerializer):
@@ -14,8 +22,17 @@ class MaterialCategorySerializer(serializers.ModelSerializer):
         model = MaterialCategory
         fields = ['id', 'name', 'description', 'icon', 'materials_count']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Ochiq materiallar sonini bitta guruhlangan so'rov bilan hisoblash"""
+        return queryset.annotate(
+            public_materials_count=Count('materials', filter=Q(materials__is_public=True))
+        )
+    
     def get_materials_count(self, obj):
         """Kategoriyadagi materiallar soni"""
+        if hasattr(obj, 'public_materials_count'):
+            return obj.public_materials_count
         return obj.materials.filter(is_public=True).count()
 
 
@@ -27,6 +44,7 @@ class MaterialSerializer(serializers.ModelSerializer):
     category_name = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
     tags_list = serializers.SerializerMethodField()
     material_type_display = serializers.SerializerMethodField()
     ratings_count = serializers.SerializerMethodField()
@@ -36,12 +54,17 @@ class MaterialSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'material_type', 'material_type_display',
             'category', 'category_name', 'author', 'author_name', 'author_subject',
-            'file', 'file_url', 'thumbnail', 'thumbnail_url', 'tags', 'tags_list',
+            'file', 'file_url', 'thumbnail', 'thumbnail_url', 'thumbnails', 'tags', 'tags_list',
             'grade_level', 'is_public', 'download_count', 'rating', 'ratings_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'author', 'download_count', 'rating', 'created_at', 'updated_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Har bir qator uchun alohida so'rov bo'lmasligi uchun bog'liq obyektlarni oldindan yuklash"""
+        return queryset.select_related('author', 'category')
+    
     def get_author_name(self, obj):
         """Muallif nomini qaytaradi"""
         return obj.author.get_full_name()
@@ -61,22 +84,24 @@ class MaterialSerializer(serializers.ModelSerializer):
         return None
     
     def get_thumbnail_url(self, obj):
-        """Kichik rasm URL ini qaytaradi"""
-        if obj.thumbnail:
-            return obj.thumbnail.url
-        return None
+        """Kichik rasm URL ini qaytaradi (tayyor bo'lsa - kichraytirilgan nusxa)"""
+        return thumbnail_url(obj, 'thumbnail')
+    
+    def get_thumbnails(self, obj):
+        """Kichik rasmning barcha o'lchamdagi nusxalari"""
+        return thumbnail_urls(obj, 'thumbnail')
     
     def get_tags_list(self, obj):
         """Teglarni ro'yxat ko'rinishida qaytaradi"""
-        return obj.get_tags_list()
+        return tags.split(obj.tags)
     
     def get_material_type_display(self, obj):
         """Material turi nomini qaytaradi"""
         return obj.get_material_type_display()
     
     def get_ratings_count(self, obj):
-        """Reytinglar soni"""
-        return obj.ratings.count()
+        """Reytinglar soni (denormalizatsiya qilingan agregatdan)"""
+        return obj.rating_count
 
 
 class MaterialRatingSerializer(serializers.ModelSerializer):
@@ -150,6 +175,14 @@ class MaterialCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class MaterialBriefSerializer(serializers.ModelSerializer):
+    """Material qisqa serializeri (faqat id va sarlavha)"""
+    
+    class Meta:
+        model = Material
+        fields = ['id', 'title']
+
+
 class AssignmentSerializer(serializers.ModelSerializer):
     """Topshiriq serializeri"""
     
@@ -169,6 +202,24 @@ class AssignmentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'teacher', 'created_at', 'updated_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset, compact=False):
+        """O'qituvchi, kategoriya, materiallar va topshirishlar sonini oldindan yuklash.
+        
+        ``compact=True`` bo'lsa materiallardan faqat ``id`` va ``title`` olinadi.
+        """
+        if compact:
+            materials = Material.objects.only('id', 'title')
+        else:
+            materials = MaterialSerializer.setup_eager_loading(Material.objects.all())
+        # GROUP BY o'rniga bog'langan subquery - assignment_id indeksidan foydalanadi
+        submissions = StudentSubmission.objects.filter(
+            assignment=OuterRef('pk')
+        ).order_by().values('assignment').annotate(total=Count('id')).values('total')
+        return queryset.select_related('teacher', 'category').prefetch_related(
+            Prefetch('materials', queryset=materials)
+        ).annotate(submissions_total=Coalesce(Subquery(submissions), 0))
+    
     def get_teacher_name(self, obj):
         return obj.teacher.get_full_name()
     
@@ -179,9 +230,17 @@ class AssignmentSerializer(serializers.ModelSerializer):
         return obj.get_assignment_type_display()
     
     def get_submissions_count(self, obj):
+        if hasattr(obj, 'submissions_total'):
+            return obj.submissions_total
         return obj.submissions.count()
 
 
+class AssignmentCompactSerializer(AssignmentSerializer):
+    """Topshiriq serializeri - materiallar faqat id va sarlavha bilan (ro'yxat uchun)"""
+    
+    materials_list = MaterialBriefSerializer(source='materials', many=True, read_only=True)
+
+
 class StudentSubmissionSerializer(serializers.ModelSerializer):
     """O'quvchi topshirig'i serializeri"""
     
@@ -210,25 +269,99 @@ class StudentSubmissionSerializer(serializers.ModelSerializer):
         return obj.get_status_display()
 
 
-class VideoLessonSerializer(serializers.ModelSerializer):
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Bo'laklab yuklash holati"""
+    
+    complete = serializers.BooleanField(source='is_complete', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'filename', 'size', 'offset', 'complete', 'chunk_size', 'created_at']
+        read_only_fields = ['id', 'offset', 'created_at']
+    
+    def get_chunk_size(self, obj):
+        return uploads.max_chunk()
+
+
+class ChunkedUploadField(serializers.PrimaryKeyRelatedField):
+    """Joriy foydalanuvchining bo'laklab yuklangan fayli"""
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('pk_field', serializers.UUIDField())
+        super().__init__(**kwargs)
+    
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None:
+            return ChunkedUpload.objects.none()
+        return ChunkedUpload.objects.filter(user=request.user)
+
+
+class ChunkedUploadMixin:
+    """Faylni oddiy multipart o'rniga ``upload`` (bo'laklab yuklash ID) orqali biriktirish"""
+    
+    upload_file_field = None
+    # Fayl hajmi saqlanadigan maydon (bo'lsa)
+    upload_size_field = None
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        upload = attrs.get('upload')
+        if upload is not None:
+            if not upload.is_complete:
+                raise serializers.ValidationError({'upload': 'Fayl hali to\'liq yuklanmagan'})
+        elif self.instance is None and not attrs.get(self.upload_file_field):
+            raise serializers.ValidationError({self.upload_file_field: 'Fayl yoki upload ko\'rsatilishi kerak'})
+        return attrs
+    
+    def _save_with_upload(self, save, validated_data):
+        upload = validated_data.pop('upload', None)
+        if upload is None:
+            return save(validated_data)
+        if self.upload_size_field:
+            validated_data.setdefault(self.upload_size_field, upload.size)
+        with uploads.open_completed(upload) as file:
+            validated_data[self.upload_file_field] = file
+            instance = save(validated_data)
+        uploads.discard(upload)
+        return instance
+    
+    def create(self, validated_data):
+        return self._save_with_upload(super().create, validated_data)
+    
+    def update(self, instance, validated_data):
+        return self._save_with_upload(lambda data: super(ChunkedUploadMixin, self).update(instance, data), validated_data)
+
+
+class VideoLessonSerializer(ChunkedUploadMixin, serializers.ModelSerializer):
     """Video darslik serializeri"""
     
     author_name = serializers.SerializerMethodField()
     category_name = serializers.SerializerMethodField()
     video_url = serializers.SerializerMethodField()
+    hls_url = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
     tags_list = serializers.SerializerMethodField()
     duration_formatted = serializers.SerializerMethodField()
+    upload = ChunkedUploadField(write_only=True, required=False)
+    
+    upload_file_field = 'video_file'
     
     class Meta:
         model = VideoLesson
         fields = [
-            'id', 'title', 'description', 'video_file', 'video_url', 'thumbnail',
-            'thumbnail_url', 'duration', 'duration_formatted', 'category',
-            'category_name', 'author', 'author_name', 'grade_level', 'subject',
-            'tags', 'tags_list', 'is_public', 'view_count', 'rating', 'created_at'
+            'id', 'title', 'description', 'video_file', 'upload', 'video_url', 'hls_url',
+            'hls_status', 'hls_progress', 'thumbnail', 'thumbnail_url', 'thumbnails', 'duration',
+            'duration_formatted', 'width', 'height', 'bitrate', 'category', 'category_name', 'author', 'author_name', 'grade_level',
+            'subject', 'tags', 'tags_list', 'is_public', 'view_count', 'rating', 'created_at'
+        ]
+        read_only_fields = [
+            'id', 'author', 'hls_status', 'hls_progress', 'width', 'height', 'bitrate',
+            'view_count', 'rating', 'created_at'
         ]
-        read_only_fields = ['id', 'author', 'view_count', 'rating', 'created_at']
+        extra_kwargs = {'video_file': {'required': False}}
     
     def get_author_name(self, obj):
         return obj.author.get_full_name()
@@ -241,15 +374,17 @@ class VideoLessonSerializer(serializers.ModelSerializer):
             return obj.video_file.url
         return None
     
+    def get_hls_url(self, obj):
+        return hls.playlist_url(obj)
+    
     def get_thumbnail_url(self, obj):
-        if obj.thumbnail:
-            return obj.thumbnail.url
-        return None
+        return thumbnail_url(obj, 'thumbnail')
+    
+    def get_thumbnails(self, obj):
+        return thumbnail_urls(obj, 'thumbnail')
     
     def get_tags_list(self, obj):
-        if obj.tags:
-            return [tag.strip() for tag in obj.tags.split(',')]
-        return []
+        return tags.split(obj.tags)
     
     def get_duration_formatted(self, obj):
         minutes = obj.duration // 60
@@ -257,7 +392,7 @@ class VideoLessonSerializer(serializers.ModelSerializer):
         return f"{minutes:02d}:{seconds:02d}"
 
 
-class Model3DSerializer(serializers.ModelSerializer):
+class Model3DSerializer(ChunkedUploadMixin, serializers.ModelSerializer):
     """3D model serializeri"""
     
     author_name = serializers.SerializerMethodField()
@@ -265,18 +400,25 @@ class Model3DSerializer(serializers.ModelSerializer):
     model_type_display = serializers.SerializerMethodField()
     model_url = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
     file_size_formatted = serializers.SerializerMethodField()
+    lods = serializers.SerializerMethodField()
+    upload = ChunkedUploadField(write_only=True, required=False)
+    
+    upload_file_field = 'model_file'
+    upload_size_field = 'file_size'
     
     class Meta:
         model = Model3D
         fields = [
-            'id', 'title', 'description', 'model_file', 'model_url', 'thumbnail',
-            'thumbnail_url', 'model_type', 'model_type_display', 'category',
+            'id', 'title', 'description', 'model_file', 'upload', 'model_url', 'thumbnail',
+            'thumbnail_url', 'thumbnails', 'model_type', 'model_type_display', 'category',
             'category_name', 'author', 'author_name', 'grade_level', 'subject',
-            'file_size', 'file_size_formatted', 'is_interactive', 'is_public',
-            'download_count', 'rating', 'created_at'
+            'file_size', 'file_size_formatted', 'vertex_count', 'face_count', 'lods',
+            'is_interactive', 'is_public', 'download_count', 'rating', 'created_at'
         ]
-        read_only_fields = ['id', 'author', 'download_count', 'rating', 'created_at']
+        read_only_fields = ['id', 'author', 'file_size', 'download_count', 'rating', 'created_at']
+        extra_kwargs = {'model_file': {'required': False}}
     
     def get_author_name(self, obj):
         return obj.author.get_full_name()
@@ -293,9 +435,14 @@ class Model3DSerializer(serializers.ModelSerializer):
         return None
     
     def get_thumbnail_url(self, obj):
-        if obj.thumbnail:
-            return obj.thumbnail.url
-        return None
+        return thumbnail_url(obj, 'thumbnail')
+    
+    def get_thumbnails(self, obj):
+        return thumbnail_urls(obj, 'thumbnail')
+    
+    def get_lods(self, obj):
+        """Avval yuklanadigan soddalashtirilgan nusxalar (to'liq model - model_url)"""
+        return meshes.lod_urls(obj)
     
     def get_file_size_formatted(self, obj):
         """Fayl hajmini formatlash"""
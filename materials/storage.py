@@ -0,0 +1,377 @@
+"""Kontent bo'yicha manzillanadigan (SHA-256), takrorlanmaydigan media saqlash.
+
+Yuklangan har bir fayl nomi bilan emas, kontentining SHA-256 xeshi bilan
+saqlanadi::
+
+    blobs/<xesh[:2]>/<xesh[2:4]>/<xesh><kengaytma>
+
+Bir xil fayl qayta yuklansa, yangi nusxa yozilmaydi - mavjud fayl nomi
+qaytariladi. Xesh yuklash davomida hisoblanadi (``Hashing*UploadHandler``,
+``FILE_UPLOAD_HANDLERS``), shuning uchun fayl qayta o'qilmaydi. Vaqtinchalik
+fayldagi yuklashlar (katta fayllar, bo'laklab yuklash) nusxalanmasdan
+ko'chiriladi.
+
+Har bir fayl (``MediaBlob``) nechta model maydonida ishlatilayotgani
+sanaladi: ``track_all()`` (MaterialsConfig.ready) barcha shu storage dagi
+FileField/ImageField larni kuzatadi - obyekt saqlanganda havola qo'shiladi,
+fayl almashtirilganda yoki obyekt o'chirilganda olib tashlanadi. Havolasi
+qolmagan fayl tranzaksiya yakunlangach diskdan o'chiriladi. ``QuerySet.update``
+signalsiz ishlaydi - fayl maydonlarini u orqali o'zgartirmaslik kerak.
+
+Yuklash mavjud faylni ko'rib uni qayta yozmagan paytda parallel ``release``
+oxirgi havolani olib, faylni o'chirishi mumkin. Shuning uchun havola qo'shish
+yozuv yo'q bo'lsa uni qayta yaratadi (upsert), o'chirilgan fayl esa
+yuklangan kontentdan tiklanadi; o'chirishda fayl avval vaqtinchalik nomga
+ko'chiriladi va yozuv qayta tekshiriladi.
+
+Xesh keyingi keshlar (OCR, matn ajratish) uchun kalit sifatida ishlatilishi
+mumkin: ``content_hash(file.name)``.
+
+Eski (xeshsiz) fayllarni o'tkazish va ishlatilmay qolgan fayllarni tozalash:
+``python manage.py dedupe_media``.
+"""
+import hashlib
+import logging
+import os
+import posixpath
+import re
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ustoziya_platform import background
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = 'blobs'
+BLOB_NAME_RE = re.compile(r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[a-z0-9]{1,10})?$')
+
+# Fayldan o'qish bloki (xesh hisoblash uchun)
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def is_blob(name):
+    """Fayl nomi kontent bo'yicha saqlangan faylmi"""
+    return bool(name) and BLOB_NAME_RE.match(name) is not None
+
+
+def content_hash(name):
+    """Fayl kontentining SHA-256 xeshi (eski, xeshsiz fayllar uchun None)"""
+    match = BLOB_NAME_RE.match(name or '')
+    return match.group(1) if match else None
+
+
+def blob_name(sha256, original_name):
+    """Xesh va asl fayl kengaytmasidan saqlash nomi"""
+    ext = posixpath.splitext(original_name or '')[1].lower()
+    if not re.fullmatch(r'\.[a-z0-9]{1,10}', ext):
+        ext = ''
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}'
+
+
+def _blob_model():
+    return apps.get_model('materials', 'MediaBlob')
+
+
+class ReusedName(str):
+    """Yozilmasdan mavjud faylga bog'langan yuklash nomi - ``content`` (yuklangan fayl) bilan.
+
+    ``FieldFile.save`` nomni obyektga yozadi, havola qo'shilganda kontent
+    shu nomdan olinadi; nom ishlatilmasa, kontent u bilan birga yo'qoladi.
+    """
+
+    def __new__(cls, name, content):
+        value = super().__new__(cls, name)
+        value.content = content
+        return value
+
+
+class HashingUploadMixin:
+    """Yuklanayotgan fayl xeshini bo'laklar kelishi bilan hisoblash (``file.sha256``)"""
+
+    def new_file(self, *args, **kwargs):
+        # MemoryFileUploadHandler.new_file StopFutureHandlers ko'tarishi mumkin
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        result = super().receive_data_chunk(raw_data, start)
+        if result is None:
+            # Bo'lakni shu handler qabul qildi
+            self.sha256.update(raw_data)
+        return result
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Fayllarni SHA-256 bo'yicha saqlaydigan va takrorlamaydigan storage"""
+
+    def get_available_name(self, name, max_length=None):
+        # Haqiqiy nom kontentdan kelib chiqadi (_save), mavjud fayl tekshirilmaydi
+        return name
+
+    def _save(self, name, content):
+        temp_path = content.temporary_file_path() if hasattr(content, 'temporary_file_path') else None
+        sha256 = getattr(content, 'sha256', None)
+        if sha256 is None and temp_path is not None:
+            sha256 = self._hash(content)
+        if sha256 is not None:
+            target = blob_name(sha256, name)
+            if self._stored(target):
+                return self._reuse(target, content)
+            if temp_path is not None:
+                return self._store(target, sha256, content.size, temp_path)
+
+        # Xotiradagi kontent - vaqtinchalik faylga yozish bilan birga xeshlash
+        path, sha256, size = self._write_temp(content.chunks())
+        try:
+            target = blob_name(sha256, name)
+            if self._stored(target):
+                return self._reuse(target, content)
+            return self._store(target, sha256, size, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _write_temp(self, chunks):
+        """Bo'laklarni vaqtinchalik faylga yozish va xeshlash: (yo'l, xesh, hajm)"""
+        os.makedirs(self.path(BLOB_DIR), exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, path = tempfile.mkstemp(dir=self.path(BLOB_DIR), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path, digest.hexdigest(), size
+
+    def write_blob(self, fileobj, name):
+        """Fayl obyektini bazaga murojaat qilmasdan diskka yozish: (saqlash nomi, xesh, hajm)
+
+        Ko'p faylni parallel oqimlarda import qilish uchun - yozuvlar keyin
+        ``register_blobs`` bilan bittada qo'shiladi.
+        """
+        path, sha256, size = self._write_temp(iter(lambda: fileobj.read(READ_BLOCK_SIZE), b''))
+        target = blob_name(sha256, name)
+        full_path = self.path(target)
+        if os.path.exists(full_path):
+            os.remove(path)
+            return target, sha256, size
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        file_move_safe(path, full_path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return target, sha256, size
+
+    def _hash(self, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks(READ_BLOCK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+        return digest.hexdigest()
+
+    def _stored(self, name):
+        return _blob_model().objects.filter(name=name).exists() and os.path.exists(self.path(name))
+
+    def _reuse(self, name, content):
+        """Mavjud faylga havola: fayl havola qo'shilguncha o'chirilsa, tiklash uchun kontent nom bilan qaytadi"""
+        return ReusedName(name, content)
+
+    def _store(self, name, sha256, size, temp_path):
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Ikki so'rov bir vaqtda yozsa ham kontent bir xil - ustiga yozish xavfsiz
+        file_move_safe(temp_path, full_path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+        try:
+            with transaction.atomic():
+                _blob_model().objects.get_or_create(name=name, defaults={'sha256': sha256, 'size': size})
+        except IntegrityError:
+            pass
+        return name
+
+    def delete(self, name):
+        if not is_blob(name):
+            return super().delete(name)
+        # Havolalar track_all() orqali boshqariladi - faqat ishlatilmayotgan fayl o'chiriladi
+        _blob_model().objects.filter(name=name, ref_count__lte=0).delete()
+        remove_if_orphan(self, name)
+
+    def exists(self, name):
+        if is_blob(name):
+            return _blob_model().objects.filter(name=name).exists()
+        return super().exists(name)
+
+
+def remove_if_orphan(storage, name):
+    """Bazada yozuvi qolmagan faylni diskdan o'chirish"""
+    MediaBlob = _blob_model()
+    if MediaBlob.objects.filter(name=name).exists():
+        return
+    path = storage.path(name)
+    trash = f'{path}.{os.getpid()}.{threading.get_ident()}.deleted'
+    try:
+        os.rename(path, trash)
+    except FileNotFoundError:
+        return
+    # Shu orada havola tiklangan bo'lsa (add_reference), fayl joyiga qaytadi
+    if MediaBlob.objects.filter(name=name).exists():
+        os.replace(trash, path)
+    else:
+        os.remove(trash)
+
+
+def _file_size(storage, name):
+    try:
+        return os.path.getsize(storage.path(name))
+    except OSError:
+        return 0
+
+
+def add_reference(storage, name, content=None):
+    """Havola qo'shish; yozuv parallel ``release`` da o'chirilgan bo'lsa - qayta yaratish
+
+    ``content`` - yuklangan fayl: o'chirib ulgurilgan fayl shundan darhol va
+    (tranzaksiya davomida yana o'chirilgan bo'lishi mumkin) tranzaksiyadan
+    keyin tiklanadi.
+    """
+    MediaBlob = _blob_model()
+    if not MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1):
+        try:
+            with transaction.atomic():
+                MediaBlob.objects.create(
+                    name=name, sha256=content_hash(name), size=getattr(content, 'size', None) or _file_size(storage, name),
+                    ref_count=1
+                )
+        except IntegrityError:
+            MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+    restore_if_missing(storage, name, content)
+    transaction.on_commit(lambda: restore_if_missing(storage, name, content))
+
+
+def restore_if_missing(storage, name, content):
+    """Havolasi bor, lekin diskdan o'chirib yuborilgan faylni kontentdan qayta yozish"""
+    target = storage.path(name)
+    if os.path.exists(target):
+        return
+    try:
+        content.seek(0)
+        path, sha256, _ = storage._write_temp(content.chunks())
+    except (AttributeError, OSError, ValueError):
+        logger.error(f"{name} fayli diskda yo'q va uni tiklash uchun kontent mavjud emas")
+        return
+    if sha256 != content_hash(name):
+        os.remove(path)
+        logger.error(f"{name} faylini tiklab bo'lmadi: kontent xeshi mos emas")
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(path, target)
+    if storage.file_permissions_mode is not None:
+        os.chmod(target, storage.file_permissions_mode)
+
+
+def register_blobs(blobs):
+    """``write_blob`` bilan yozilgan fayllar yozuvlarini qo'shish: [(nom, xesh, hajm), ...]"""
+    MediaBlob = _blob_model()
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, sha256=sha256, size=size) for name, sha256, size in dict.fromkeys(blobs)],
+        ignore_conflicts=True
+    )
+
+
+def add_references(names, storage=None):
+    """Bir nechta havolani qo'shish (``bulk_create`` bilan yaratilgan obyektlar uchun)"""
+    MediaBlob = _blob_model()
+    by_count = defaultdict(list)
+    for name, count in Counter(name for name in names if is_blob(name)).items():
+        by_count[count].append(name)
+    for count, group in by_count.items():
+        if MediaBlob.objects.filter(name__in=group).update(ref_count=F('ref_count') + count) == len(group):
+            continue
+        # Parallel release o'chirgan yozuvlar qayta yaratiladi
+        existing = set(MediaBlob.objects.filter(name__in=group).values_list('name', flat=True))
+        MediaBlob.objects.bulk_create([
+            MediaBlob(
+                name=name, sha256=content_hash(name), ref_count=count,
+                size=_file_size(storage, name) if storage is not None else 0
+            )
+            for name in group if name not in existing
+        ])
+
+
+def release(storage, name):
+    """Havolani olib tashlash; havolasi qolmagan fayl tranzaksiyadan keyin o'chiriladi"""
+    MediaBlob = _blob_model()
+    MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') - 1)
+    if MediaBlob.objects.filter(name=name, ref_count__lte=0).delete()[0]:
+        transaction.on_commit(lambda: remove_if_orphan(storage, name))
+
+
+def orphan_blobs():
+    """Saqlangan, lekin hech bir obyektga biriktirilmagan fayllar"""
+    hours = getattr(settings, 'MEDIA_BLOB_ORPHAN_HOURS', 24)
+    return _blob_model().objects.filter(
+        ref_count__lte=0, created_at__lt=timezone.now() - timedelta(hours=hours)
+    )
+
+
+def track(model, field_name):
+    """Model fayl maydonidagi havolalarni sanash"""
+    storage = model._meta.get_field(field_name).storage
+
+    def on_change(instance, name, old_name, created):
+        if is_blob(name):
+            add_reference(storage, str(name), getattr(name, 'content', None))
+        if is_blob(old_name):
+            release(storage, old_name)
+
+    def on_delete(instance, name):
+        if is_blob(name):
+            release(storage, name)
+
+    uid = f'media_blobs_{model._meta.label_lower}_{field_name}'
+    background.on_file_change(model, field_name, uid, on_change, on_delete)
+
+
+def tracked_fields():
+    """Shu storage dan foydalanadigan barcha (model, maydon) juftliklari"""
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field.name
+
+
+def track_all():
+    for model, field_name in tracked_fields():
+        track(model, field_name)
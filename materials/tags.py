@@ -0,0 +1,134 @@
+"""Teglar indeksi: vergul bilan ajratilgan ``tags`` satrlarini ``Tag`` jadvaliga bog'lash.
+
+API va formalar teglarni avvalgidek satr ko'rinishida qabul qiladi
+(``"Fizika, kuch"``). Obyekt saqlanganda satr o'zgargan bo'lsa, teglar
+normallashtiriladi (kichik harflar, ortiqcha bo'shliqlarsiz) va bog'lanish
+jadvali (``MaterialTag``, ``VideoLessonTag``) farq bo'yicha yangilanadi.
+Teg bo'yicha filtrlash - indeks bo'yicha aniq moslik (``?tag=fizika``
+"astrofizika" ni topmaydi).
+
+Eng ko'p ishlatilgan teglar (``top_tags``) ochiq obyektlar bo'yicha bitta
+guruhlangan so'rov bilan hisoblanib keshlanadi; teglar yoki ``is_public``
+o'zgarganda kesh tozalanadi.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.signals import post_init, post_save
+
+from ustoziya_platform.cache import cached, invalidate, invalidate_on_change
+
+from .models import Tag
+
+# Eng ko'p ishlatilgan teglar keshi
+TAGS_CACHE_KEY = 'materials:tags'
+
+# (model, bog'lanish modeli, bog'lanishdagi obyekt maydoni)
+TAGGED_MODELS = []
+
+
+def normalize(name):
+    """Tegni taqqoslash shakliga keltirish: kichik harflar, bitta bo'shliq"""
+    return ' '.join(name.split()).lower()[:Tag._meta.get_field('name').max_length]
+
+
+def split(value):
+    """Teglar satridan ro'yxat (ko'rsatish uchun, asl yozilishida)"""
+    if not value:
+        return []
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
+
+
+def parse(value):
+    """Teglar satridan normallashtirilgan, takrorlanmaydigan nomlar ro'yxati"""
+    return list(dict.fromkeys(normalize(tag) for tag in split(value)))
+
+
+def get_tags(names):
+    """Nomlar bo'yicha teglar (yo'qlari yaratiladi): {nom: Tag}"""
+    existing = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [Tag(name=name) for name in names if name not in existing]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        existing.update((tag.name, tag) for tag in Tag.objects.filter(name__in=[t.name for t in missing]))
+    return existing
+
+
+def sync(instance, through, field):
+    """Obyekt teglari bog'lanishini ``tags`` satriga moslashtirish"""
+    names = set(parse(instance.tags))
+    links = through.objects.filter(**{field: instance})
+    current = dict(links.values_list('tag__name', 'pk'))
+
+    removed = [pk for name, pk in current.items() if name not in names]
+    added = [name for name in names if name not in current]
+    if removed:
+        through.objects.filter(pk__in=removed).delete()
+    if added:
+        tags = get_tags(added)
+        through.objects.bulk_create(
+            [through(**{field: instance, 'tag': tags[name]}) for name in added], ignore_conflicts=True
+        )
+    if removed or added:
+        invalidate(TAGS_CACHE_KEY)
+
+
+def index(instances, through, field):
+    """Yangi obyektlar teglarini indeksga qo'shish (``bulk_create`` signalsiz ishlaydi)"""
+    links = [(instance, name) for instance in instances for name in parse(instance.tags)]
+    if not links:
+        return
+    tags = get_tags(list({name for _, name in links}))
+    through.objects.bulk_create(
+        [through(**{field: instance, 'tag': tags[name]}) for instance, name in links], ignore_conflicts=True
+    )
+    invalidate(TAGS_CACHE_KEY)
+
+
+def register(model, through, field):
+    """Model ``tags`` satrini teglar indeksiga ulash"""
+    TAGGED_MODELS.append((model, through, field))
+
+    def remember(sender, instance, **kwargs):
+        instance._tags_loaded = instance.__dict__.get('tags')
+
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        if raw or 'tags' not in instance.__dict__:
+            return
+        old = None if created else getattr(instance, '_tags_loaded', None)
+        if instance.tags != old:
+            sync(instance, through, field)
+        instance._tags_loaded = instance.tags
+
+    uid = f'tags_{model._meta.label_lower}'
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    invalidate_on_change(model, TAGS_CACHE_KEY, fields=['is_public'])
+
+
+def filter_by_tag(queryset, name):
+    """Teg bo'yicha aniq filtrlash (teglar indeksi orqali)"""
+    return queryset.filter(tag_index__name=normalize(name))
+
+
+def _count_tags():
+    counts = {}
+    for model, through, field in TAGGED_MODELS:
+        rows = (
+            through.objects.filter(**{f'{field}__is_public': True})
+            .values('tag__name').annotate(total=Count('pk')).order_by()
+        )
+        counts[model._meta.model_name] = Counter({row['tag__name']: row['total'] for row in rows})
+
+    totals = sum(counts.values(), Counter())
+    limit = getattr(settings, 'TAGS_CACHE_LIMIT', 200)
+    return [
+        dict({'name': name, 'count': total}, **{key: counter[name] for key, counter in counts.items()})
+        for name, total in sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    ]
+
+
+def top_tags(limit):
+    """Ochiq materiallar va videolarda eng ko'p ishlatilgan teglar (keshdan)"""
+    return cached(TAGS_CACHE_KEY, _count_tags)[:limit]
@@ -1,3 +1,1864 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import types
+import zipfile
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import numpy as np
+from PIL import Image
+
+from ustoziya_platform import thumbnails
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ustoziya_platform.pagination import KeysetPagination
+
+from . import (
+    author_stats, bulk_import, counters, download_rollups, hls, meshes, ratings, recommendations, storage, tags,
+    video_metadata
+)
+from .models import (
+    Assignment, AuthorStats, ChunkedUpload, DownloadRollup, Material, MaterialCategory, MaterialDownload,
+    MaterialRating, MaterialTag, MediaBlob, Model3D, RelatedMaterial, RollupCheckpoint, StudentSubmission, Tag,
+    VideoLesson
+)
+from .search import search_queryset
+
+User = get_user_model()
+
+
+def create_user(username, **fields):
+    """Test foydalanuvchisi (parol - 'pass', standart fan va maktab bilan)"""
+    fields.setdefault('subject', 'physics')
+    fields.setdefault('school', '1-maktab')
+    return User.objects.create_user(username=username, password='pass', **fields)
+
+
+class MaterialsTestCase(TestCase):
+    """``teacher`` foydalanuvchisi bilan test sinfi"""
+    teacher_subject = 'physics'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = create_user('teacher', subject=cls.teacher_subject)
+
+
+class MediaRootMixin:
+    """Har bir test uchun alohida vaqtinchalik MEDIA_ROOT (``self.media_root``)"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+class MaterialQueryBudgetTest(MaterialsTestCase):
+    """MaterialSerializer ishlatiladigan endpointlar so'rovlar soni materiallar soniga bog'liq emas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.rater = create_user('rater')
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+        cls.assignment = Assignment.objects.create(
+            title='Uy vazifasi', description='Tavsif', assignment_type='homework',
+            teacher=cls.teacher, category=cls.category, grade_level='7',
+            subject='physics', due_date=timezone.now() + timedelta(days=7)
+        )
+        cls.submission = StudentSubmission.objects.create(
+            assignment=cls.assignment, student_name='Ali', student_email='ali@example.com'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def create_materials(self, count):
+        for i in range(count):
+            category = MaterialCategory.objects.create(name=f'Kategoriya {i}')
+            material = Material.objects.create(
+                title=f'Fizika darsi {i}', description='Kuch va harakat', tags='fizika, kuch',
+                material_type='presentation', category=category, author=self.teacher,
+                file=f'materials/dars_{i}.pptx'
+            )
+            MaterialRating.objects.create(material=material, user=self.rater, rating=4)
+            self.assignment.materials.add(material)
+            self.submission.attached_files.add(material)
+
+    def assertConstantQueries(self, url, budget):
+        """Endpoint 1 ta va 20 ta material bilan bir xil miqdorda so'rov bajaradi"""
+        self.create_materials(1)
+        with self.assertNumQueries(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.create_materials(19)
+        with self.assertNumQueries(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_material_list(self):
+        response = self.assertConstantQueries('/api/materials/', 3)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['ratings_count'], 1)
+
+    def test_material_list_search(self):
+        response = self.assertConstantQueries('/api/materials/?search=fizika', 3)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_search_materials(self):
+        response = self.assertConstantQueries('/api/materials/search/?q=fizika', 3)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_my_materials(self):
+        response = self.assertConstantQueries('/api/materials/my-materials/', 3)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_material_stats(self):
+        response = self.assertConstantQueries('/api/materials/stats/', 4)
+        self.assertEqual(response.data['total_materials'], 20)
+
+    def test_assignment_list(self):
+        response = self.assertConstantQueries('/api/materials/assignments/', 4)
+        self.assertEqual(len(response.data['results'][0]['materials_list']), 20)
+
+    def test_assignment_list_compact(self):
+        for i in range(3):
+            StudentSubmission.objects.create(
+                assignment=self.assignment, student_name=f'Vali {i}', student_email=f'vali{i}@example.com'
+            )
+        response = self.assertConstantQueries('/api/materials/assignments/?compact=1', 4)
+        assignment = response.data['results'][0]
+        self.assertEqual(assignment['submissions_count'], 4)
+        self.assertEqual(len(assignment['materials_list']), 20)
+        self.assertEqual(set(assignment['materials_list'][0]), {'id', 'title'})
+
+    def test_submission_list(self):
+        url = f'/api/materials/submissions/?assignment={self.assignment.pk}'
+        response = self.assertConstantQueries(url, 4)
+        self.assertEqual(len(response.data['results'][0]['attached_files_list']), 20)
+
+
+class KeysetPaginationTest(MaterialsTestCase):
+    """Kursorli sahifalash: sahifalar takrorlanmaydi va tushib qolmaydi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        category = MaterialCategory.objects.create(name='Fizika')
+        for i in range(25):
+            Material.objects.create(
+                title=f'Fizika darsi {i}', description='fizika ' * (i % 4 + 1), tags='fizika',
+                material_type='presentation', category=category, author=cls.teacher,
+                file=f'materials/dars_{i}.pptx'
+            )
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 10)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_walk_pages(self):
+        ids = self.collect('/api/materials/?page_size=10')
+        expected = list(Material.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_walk_ranked_search(self):
+        ids = self.collect('/api/materials/search/?q=fizika&page_size=10')
+        self.assertEqual(sorted(ids), sorted(Material.objects.values_list('id', flat=True)))
+
+    def test_max_page_size(self):
+        with mock.patch.object(KeysetPagination, 'max_page_size', 5):
+            response = self.client.get('/api/materials/my-materials/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_pagination_opt_out(self):
+        response = self.client.get('/api/materials/my-materials/?paginate=false')
+        self.assertEqual(len(response.data), 25)
+
+    def pages(self, queryset, url, link):
+        # Paginatorni to'g'ridan-to'g'ri yurgizish: har bir sahifa id lari
+        pages = []
+        while url:
+            paginator = KeysetPagination()
+            pages.append([item.pk for item in paginator.paginate_queryset(
+                queryset, Request(APIRequestFactory().get(url))
+            )])
+            url = getattr(paginator, link)()
+        return pages
+
+    def test_ties_walk_both_ways(self):
+        # Barcha satrlarda saralash qiymati bir xil - faqat id farqlaydi
+        Material.objects.update(created_at=timezone.now(), grade_level=None)
+        Material.objects.filter(pk__in=Material.objects.order_by('pk').values('pk')[:7]).update(grade_level='9')
+        for ordering in (('-download_count',), ('-created_at',), ('grade_level',), ('-grade_level',)):
+            with self.subTest(ordering=ordering):
+                queryset = Material.objects.order_by(*ordering)
+                expected = list(queryset.order_by(*ordering, 'id' if not ordering[0].startswith('-') else '-id')
+                                .values_list('pk', flat=True))
+                forward = self.pages(queryset, '/?page_size=10', 'get_next_link')
+                self.assertEqual([pk for page in forward for pk in page], expected)
+
+                paginator = KeysetPagination()
+                paginator.paginate_queryset(queryset, Request(APIRequestFactory().get('/?page_size=10')))
+                last = paginator.get_next_link()
+                while True:
+                    paginator = KeysetPagination()
+                    paginator.paginate_queryset(queryset, Request(APIRequestFactory().get(last)))
+                    if not paginator.get_next_link():
+                        break
+                    last = paginator.get_next_link()
+                self.assertEqual(self.pages(queryset, last, 'get_previous_link'), forward[::-1])
+
+    def test_invalid_cursor(self):
+        # Kalitlar soni tartibdagidan farq qiladi (p=["1"])
+        response = self.client.get('/api/materials/my-materials/?cursor=cD0lNUIlMjIxJTIyJTVE')
+        self.assertEqual(response.status_code, 404)
+
+
+class SearchIndexTest(MaterialsTestCase):
+    """To'liq matnli indeks yozuvlar bilan sinxron va natijalar dolzarblik tartibida"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def create_material(self, title, description='Tavsif', tags=''):
+        return Material.objects.create(
+            title=title, description=description, tags=tags, material_type='presentation',
+            category=self.category, author=self.teacher, file='materials/dars.pptx'
+        )
+
+    def found(self, query):
+        return list(search_queryset(Material.objects.all(), query).values_list('pk', flat=True))
+
+    def test_index_follows_create_update_delete(self):
+        material = self.create_material('Optika asoslari')
+        self.assertEqual(self.found('optika'), [material.pk])
+        # Oxirgi so'z prefiks sifatida qidiriladi
+        self.assertEqual(self.found('opt'), [material.pk])
+
+        material.title = 'Elektr zanjirlari'
+        material.save()
+        self.assertEqual(self.found('optika'), [])
+        self.assertEqual(self.found('elektr'), [material.pk])
+
+        Material.objects.filter(pk=material.pk).update(tags='magnit')
+        self.assertEqual(self.found('magnit'), [material.pk])
+
+        material.delete()
+        self.assertEqual(self.found('elektr'), [])
+
+    def test_ranking(self):
+        weak = self.create_material('Dars', description='Bu darsda kuch haqida ham gapiriladi va boshqa mavzular')
+        strong = self.create_material('Kuch kuch kuch', description='Kuch')
+        self.assertEqual(self.found('kuch'), [strong.pk, weak.pk])
+
+        response = self.client.get('/api/materials/search/?q=kuch')
+        self.assertEqual([item['id'] for item in response.data['results']], [strong.pk, weak.pk])
+
+    def test_punctuation_and_empty_queries(self):
+        material = self.create_material('Optika')
+        for query in ('', '   ', '!!!', '"*', "'--", 'AND OR NOT'):
+            response = self.client.get('/api/materials/search/', {'q': query})
+            self.assertEqual(response.status_code, 200, query)
+        # So'zsiz so'rov filtrlanmaydi
+        self.assertEqual(self.found('"*()'), [material.pk])
+        self.assertEqual(self.found('optika"'), [material.pk])
+
+    def test_cursor_follows_rank(self):
+        for i in range(12):
+            self.create_material(f'Mavzu {i}', description='issiqlik ' * (i % 5 + 1))
+        expected = self.found('issiqlik')
+        ids, url = [], '/api/materials/search/?q=issiqlik&page_size=5'
+        while url:
+            response = self.client.get(url)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+
+
+class CategoryCacheTest(MaterialsTestCase):
+    """Kategoriyalar ro'yxati keshdan beriladi va material o'zgarganda yangilanadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+        MaterialCategory.objects.create(name='Kimyo')
+
+    def setUp(self):
+        cache.clear()
+
+    def materials_count(self):
+        response = self.client.get('/api/materials/categories/')
+        self.assertEqual(response.status_code, 200)
+        return {item['name']: item['materials_count'] for item in response.data}
+
+    def create_material(self, **kwargs):
+        return Material.objects.create(
+            title='Fizika darsi', description='Tavsif', material_type='presentation',
+            category=self.category, author=self.teacher, file='materials/dars.pptx', **kwargs
+        )
+
+    def test_single_query_then_cached(self):
+        self.create_material()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.materials_count(), {'Fizika': 1, 'Kimyo': 0})
+        with self.assertNumQueries(0):
+            self.materials_count()
+
+    def test_invalidated_on_change(self):
+        material = self.create_material()
+        self.assertEqual(self.materials_count()['Fizika'], 1)
+
+        self.create_material(is_public=False)
+        material.is_public = False
+        material.save()
+        self.assertEqual(self.materials_count()['Fizika'], 0)
+
+        material.is_public = True
+        material.save()
+        self.assertEqual(self.materials_count()['Fizika'], 1)
+
+        material.delete()
+        self.assertEqual(self.materials_count()['Fizika'], 0)
+
+        MaterialCategory.objects.create(name='Biologiya')
+        self.assertIn('Biologiya', self.materials_count())
+
+    @override_settings(CACHE_LIST_TIMEOUT=3600, CACHE_LOCAL_TIMEOUT=30)
+    def test_process_local_cache_expires_quickly(self):
+        # Boshqa jarayonlar tozalashni ko'rmaydi - eskirish muddati qisqa
+        with mock.patch.object(cache, 'set') as cache_set:
+            self.materials_count()
+        self.assertEqual(cache_set.call_args.args[2], 30)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class AuthorStatsTest(MaterialsTestCase):
+    """Muallif statistikasi hodisalardan yangilanadi va qayta hisoblash bilan mos keladi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = create_user('other')
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def create_material(self, title):
+        return Material.objects.create(
+            title=title, description='Tavsif', material_type='presentation',
+            category=self.category, author=self.teacher, file='materials/dars.pptx'
+        )
+
+    def snapshot(self):
+        stats = AuthorStats.objects.get(author=self.teacher)
+        return stats.total_materials, stats.total_downloads, round(stats.avg_rating, 6), stats.top_material_ids
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        author_stats.rebuild([self.teacher.pk])
+        self.assertEqual(incremental, self.snapshot())
+        return incremental
+
+    def test_incremental_updates(self):
+        materials = [self.create_material(f'Dars {i}') for i in range(7)]
+        self.assertMatchesRebuild()
+
+        for i, material in enumerate(materials):
+            counters.increment(material, 'download_count', i + 1)
+        MaterialRating.objects.create(material=materials[0], user=self.other, rating=5)
+        rating = MaterialRating.objects.create(material=materials[1], user=self.other, rating=2)
+        rating.rating = 4
+        rating.save()
+        total, downloads, avg, top = self.assertMatchesRebuild()
+        self.assertEqual((total, downloads), (7, 28))
+        # O'rtacha faqat baholangan materiallar bo'yicha
+        self.assertEqual(avg, round(9 / 2, 6))
+        self.assertEqual(top, [m.pk for m in reversed(materials[2:])])
+
+        # Eskirgan obyektni saqlash hisoblagichlarni yozmaydi - statistika o'zgarmaydi
+        materials[0].title = 'Yangi sarlavha'
+        materials[0].save()
+        self.assertEqual(self.assertMatchesRebuild()[:3], (7, 28, 4.5))
+
+        materials[6].delete()
+        rating.delete()
+        total, downloads, avg, top = self.assertMatchesRebuild()
+        self.assertEqual((total, downloads, avg), (6, 21, 5.0))
+
+        # Boshqa muallifga o'tkazilganda bazadagi qiymatlar ko'chiriladi
+        materials[0].author = self.other
+        materials[0].save()
+        self.assertEqual(self.assertMatchesRebuild()[:3], (5, 20, 0.0))
+        self.assertEqual(AuthorStats.objects.get(author=self.other).avg_rating, 5.0)
+
+    def test_endpoint(self):
+        material = self.create_material('Dars')
+        counters.increment(material, 'download_count', 3)
+        self.client.force_login(self.teacher)
+        response = self.client.get('/api/materials/stats/')
+        self.assertEqual(response.data['total_materials'], 1)
+        self.assertEqual(response.data['total_downloads'], 3)
+        self.assertEqual(response.data['popular_materials'][0]['id'], material.pk)
+
+        self.client.force_login(self.other)
+        response = self.client.get('/api/materials/stats/')
+        self.assertEqual(response.data['total_materials'], 0)
+        self.assertEqual(response.data['popular_materials'], [])
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0, DOWNLOAD_ACCEL_MODE='')
+class DownloadMaterialTest(MediaRootMixin, MaterialsTestCase):
+    """Fayl uzatish (Range, shartli so'rovlar, X-Accel) va yuklab olishlar hisobi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 4
+        self.material = Material.objects.create(
+            title='Dars', description='Tavsif', material_type='document', category=self.category,
+            author=self.teacher, file=SimpleUploadedFile('dars.pdf', self.content)
+        )
+        self.url = f'/api/materials/{self.material.pk}/download/'
+        self.client.force_login(self.teacher)
+
+    def download(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def downloads(self):
+        self.material.refresh_from_db()
+        return self.material.download_count, MaterialDownload.objects.filter(material=self.material).count()
+
+    def test_full_and_range(self):
+        response, body = self.download()
+        self.assertEqual((response.status_code, body), (200, self.content))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.downloads(), (1, 1))
+
+        response, body = self.download(HTTP_RANGE='bytes=0-99')
+        self.assertEqual((response.status_code, body), (206, self.content[:100]))
+        self.assertEqual(response['Content-Range'], f'bytes 0-99/{len(self.content)}')
+        self.assertEqual(self.downloads(), (2, 2))
+
+        # To'xtatilgan yuklab olishning davomi va oxirgi baytlar hisoblanmaydi
+        response, body = self.download(HTTP_RANGE='bytes=100-')
+        self.assertEqual((response.status_code, body), (206, self.content[100:]))
+        response, body = self.download(HTTP_RANGE='bytes=-24')
+        self.assertEqual((response.status_code, body), (206, self.content[-24:]))
+        self.assertEqual(self.downloads(), (2, 2))
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=0-1,5-6', 'bytes=abc', 'bytes=-', f'bytes={len(self.content)}-', 'bytes=-0'):
+            response, _ = self.download(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 416, header)
+            self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+        # Boshqa birlik e'tiborsiz qoldiriladi
+        response, _ = self.download(HTTP_RANGE='items=0-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.downloads(), (1, 1))
+
+    def test_if_range_mismatch_returns_full_file(self):
+        etag = self.download()[0]['ETag']
+        response, body = self.download(HTTP_RANGE='bytes=100-', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response, body = self.download(HTTP_RANGE='bytes=100-', HTTP_IF_RANGE='"eski"')
+        self.assertEqual((response.status_code, body), (200, self.content))
+        self.assertEqual(self.downloads(), (2, 2))
+
+    def test_not_modified_is_not_counted(self):
+        etag = self.download()[0]['ETag']
+        response, body = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, body), (304, b''))
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.downloads(), (1, 1))
+
+    @override_settings(DOWNLOAD_ACCEL_MODE='nginx', DOWNLOAD_ACCEL_PREFIX='/protected-media/')
+    def test_accel_redirect(self):
+        response, body = self.download()
+        self.assertEqual((response.status_code, body), (200, b''))
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.material.file.name}')
+        self.assertIn('attachment', response['Content-Disposition'])
+        # Range ni nginx bajaradi - davomi hisoblanmaydi
+        self.download(HTTP_RANGE='bytes=100-')
+        self.assertEqual(self.downloads(), (1, 1))
+
+
+class RatingAggregateTest(MaterialsTestCase):
+    """Baho yaratish, o'zgartirish, boshqa obyektga o'tkazish va o'chirishda agregatlar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.students = [
+            create_user(f'student{i}')
+            for i in range(2)
+        ]
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def create_material(self, title='Dars'):
+        return Material.objects.create(
+            title=title, description='Tavsif', material_type='presentation',
+            category=self.category, author=self.teacher, file='materials/dars.pptx'
+        )
+
+    def aggregates(self, material):
+        material.refresh_from_db()
+        return material.rating_sum, material.rating_count, material.rating
+
+    def test_create_update_retarget_delete(self):
+        first, second = self.create_material(), self.create_material('Dars 2')
+        rating = MaterialRating.objects.create(material=first, user=self.students[0], rating=3)
+        MaterialRating.objects.create(material=first, user=self.students[1], rating=5)
+        self.assertEqual(self.aggregates(first), (8, 2, 4.0))
+
+        rating.rating = 1
+        rating.save()
+        self.assertEqual(self.aggregates(first), (6, 2, 3.0))
+
+        rating.material = second
+        rating.save()
+        self.assertEqual(self.aggregates(first), (5, 1, 5.0))
+        self.assertEqual(self.aggregates(second), (1, 1, 1.0))
+
+        rating.delete()
+        self.assertEqual(self.aggregates(second), (0, 0, 0.0))
+
+    def test_concurrent_edit_does_not_drift(self):
+        material = self.create_material()
+        MaterialRating.objects.create(material=material, user=self.students[0], rating=3)
+        # Ikki so'rov bir xil (eski) bahoni o'qib, ketma-ket o'zgartiradi
+        first, second = MaterialRating.objects.all(), MaterialRating.objects.all()
+        first, second = first.get(), second.get()
+        first.rating = 5
+        first.save()
+        second.rating = 4
+        second.save()
+        self.assertEqual(self.aggregates(material), (4, 1, 4.0))
+
+    def test_full_save_keeps_aggregates(self):
+        material = self.create_material()
+        stale = Material.objects.get(pk=material.pk)
+        MaterialRating.objects.create(material=material, user=self.students[0], rating=5)
+        Material.objects.filter(pk=material.pk).update(download_count=7)
+        stale.title = 'Yangi sarlavha'
+        stale.save()
+        material.refresh_from_db()
+        self.assertEqual((material.title, material.download_count, material.rating_count, material.rating),
+                         ('Yangi sarlavha', 7, 1, 5.0))
+
+    def test_cascade_delete_skips_update(self):
+        material = self.create_material()
+        MaterialRating.objects.create(material=material, user=self.students[0], rating=4)
+        with mock.patch.object(ratings, 'apply_rating_change') as apply:
+            material.delete()
+        apply.assert_not_called()
+        self.assertFalse(MaterialRating.objects.exists())
+
+    def test_vote_does_not_scan_ratings(self):
+        material = self.create_material()
+        for student in self.students:
+            MaterialRating.objects.create(material=material, user=student, rating=4)
+        rating = MaterialRating.objects.get(material=material, user=self.students[0])
+        rating.rating = 2
+        with CaptureQueriesContext(connection) as queries:
+            rating.save()
+        # Eski bahoni o'qish, bahoni yozish, obyektga farqni qo'shish - baholar soniga bog'liq emas
+        self.assertFalse([q for q in queries.captured_queries if 'SUM(' in q['sql'].upper()])
+        self.assertEqual(self.aggregates(material), (6, 2, 3.0))
+
+    def test_rebuild_command_repairs_drift(self):
+        material = self.create_material()
+        MaterialRating.objects.create(material=material, user=self.students[0], rating=5)
+        Material.objects.filter(pk=material.pk).update(rating_sum=40, rating_count=9, rating=1.0)
+        call_command('rebuild_rating_aggregates', stdout=io.StringIO())
+        self.assertEqual(self.aggregates(material), (5, 1, 5.0))
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=3600, COUNTER_FLUSH_BATCH_SIZE=1000, COUNTER_FLUSH_MAX_ATTEMPTS=3)
+class CounterBufferTest(MaterialsTestCase):
+    """Bufer yozuvlari yig'ilib yoziladi, buzuq yozuv qolganlarini to'xtatmaydi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        self.buffer = counters.CounterBuffer()
+        self.addCleanup(lambda: self.buffer._timer and self.buffer._timer.cancel())
+        self.materials = [
+            Material.objects.create(
+                title=f'Dars {i}', description='Tavsif', material_type='presentation',
+                category=self.category, author=self.teacher, file='materials/dars.pptx'
+            )
+            for i in range(2)
+        ]
+
+    def download(self, material):
+        self.buffer.increment(material, 'download_count')
+        self.buffer.add_event(MaterialDownload(material=material, user=self.teacher, ip_address='127.0.0.1'))
+
+    def downloads(self, material):
+        material.refresh_from_db()
+        return material.download_count, MaterialDownload.objects.filter(material_id=material.pk).count()
+
+    def test_buffered_until_flush(self):
+        first, second = self.materials
+        for _ in range(3):
+            self.download(first)
+        self.download(second)
+        self.assertEqual(self.buffer.pending(first, 'download_count'), 3)
+        self.assertEqual(self.downloads(first), (0, 0))
+
+        self.buffer.flush()
+        self.assertEqual((self.downloads(first), self.downloads(second)), ((3, 3), (1, 1)))
+        self.assertEqual(self.buffer._size(), 0)
+
+    def test_deleted_target_dropped(self):
+        first, second = self.materials
+        self.download(first)
+        self.download(second)
+        first_pk = first.pk
+        first.delete()
+
+        with self.assertLogs('materials.counters', 'WARNING'):
+            self.buffer.flush()
+        self.assertEqual(self.downloads(second), (1, 1))
+        self.assertFalse(MaterialDownload.objects.filter(material_id=first_pk).exists())
+        self.assertEqual(self.buffer._size(), 0)
+
+    def test_failing_batch_retried_then_dropped(self):
+        material = self.materials[0]
+        self.download(material)
+        with mock.patch.object(self.buffer, '_write_counts', side_effect=DatabaseError('xato')), \
+                self.assertLogs('materials.counters', 'ERROR') as logs:
+            self.buffer.flush()
+            # Voqealar alohida tranzaksiyada yozildi, hisoblagich buferga qaytdi
+            self.assertEqual(self.downloads(material), (0, 1))
+            self.assertEqual(self.buffer.pending(material, 'download_count'), 1)
+            self.buffer.flush()
+            self.buffer.flush()
+        self.assertIn('tashlandi', logs.output[-1])
+        self.assertEqual(self.buffer._size(), 0)
+
+        self.download(material)
+        with mock.patch.object(self.buffer, '_write_events', side_effect=DatabaseError('xato')), \
+                self.assertLogs('materials.counters', 'ERROR'):
+            self.buffer.flush()
+        self.assertEqual(self.downloads(material), (1, 1))
+        self.buffer.flush()
+        self.assertEqual(self.downloads(material), (1, 2))
+
+
+@override_settings(THUMBNAIL_ASYNC=False, THUMBNAIL_SIZES=(64, 256))
+class ThumbnailTest(MediaRootMixin, MaterialsTestCase):
+    """Muqova rasmidan EXIF orientatsiyasi bo'yicha kichik nusxalar yaratiladi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def photo(self, name='rasm.jpg', color=(200, 30, 30)):
+        # 1000x500 rasm, EXIF bo'yicha 90 gradusga burilishi kerak (Orientation=6)
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 500), color).save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def create_material(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Material.objects.create(
+                title='Dars', description='Tavsif', material_type='presentation',
+                category=self.category, author=self.teacher, file='materials/dars.pptx',
+                thumbnail=self.photo()
+            )
+
+    def test_renditions(self):
+        material = self.create_material()
+        material.refresh_from_db()
+        self.assertEqual(material.thumbnail_renditions, {'source': material.thumbnail.name, 'sizes': [64, 256]})
+
+        storage = thumbnails.rendition_storage()
+        for size in (64, 256):
+            for fmt, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                with storage.open(thumbnails.rendition_name(material.thumbnail.name, size, fmt)) as f:
+                    image = Image.open(f)
+                    self.assertEqual(image.format, pil_format)
+                    self.assertEqual(image.size, (size // 2, size))
+
+        self.assertEqual(
+            thumbnails.thumbnail_url(material, 'thumbnail'),
+            storage.url(thumbnails.rendition_name(material.thumbnail.name, 256, 'webp'))
+        )
+        self.assertEqual(
+            thumbnails.thumbnail_url(material, 'thumbnail', size=48, fmt='jpeg'),
+            storage.url(thumbnails.rendition_name(material.thumbnail.name, 64, 'jpeg'))
+        )
+
+    def test_replaced_image(self):
+        material = self.create_material()
+        material.refresh_from_db()
+        old_name = material.thumbnail.name
+
+        material.thumbnail = self.photo('yangi.jpg', color=(30, 30, 200))
+        with self.captureOnCommitCallbacks(execute=True):
+            material.save()
+        material.refresh_from_db()
+        self.assertEqual(material.thumbnail_renditions['source'], material.thumbnail.name)
+        self.assertFalse(thumbnails.rendition_storage().exists(thumbnails.rendition_name(old_name, 64, 'webp')))
+
+
+@override_settings(CHUNKED_UPLOAD_MAX_CHUNK=4)
+class ChunkedUploadTest(MediaRootMixin, MaterialsTestCase):
+    """Video fayl bo'laklab yuklanadi, uzilishdan keyin server offsetidan davom ettiriladi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        super().setUp()
+        paths = override_settings(CHUNKED_UPLOAD_DIR=f'{self.media_root}/parts')
+        paths.enable()
+        self.addCleanup(paths.disable)
+        self.client.force_login(self.teacher)
+
+    def patch(self, upload_id, offset, data):
+        return self.client.generic(
+            'PATCH', f'/api/materials/uploads/{upload_id}/', data,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_resume_and_attach(self):
+        content = b'0123456789'
+        response = self.client.post(
+            '/api/materials/uploads/', {'filename': 'dars.mp4', 'size': len(content)}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['id']
+
+        self.assertEqual(self.patch(upload_id, 0, content[:4]).data['offset'], 4)
+        # Javob yo'qolgan deb, mijoz shu bo'lakni qayta yuboradi - offset mos emas
+        response = self.patch(upload_id, 0, content[:4])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '4')
+        # Bo'lak chegarasidan katta so'rov qabul qilinmaydi
+        self.assertEqual(self.patch(upload_id, 4, content[4:]).status_code, 413)
+
+        response = self.client.get(f'/api/materials/uploads/{upload_id}/')
+        offset = int(response['Upload-Offset'])
+        while offset < len(content):
+            offset = self.patch(upload_id, offset, content[offset:offset + 4]).data['offset']
+        self.assertTrue(ChunkedUpload.objects.get(pk=upload_id).is_complete)
+
+        response = self.client.post('/api/materials/videos/', {
+            'title': 'Dars', 'description': 'Tavsif', 'category': self.category.pk,
+            'grade_level': '7', 'subject': 'physics', 'upload': upload_id
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        video = VideoLesson.objects.get(pk=response.data['id'])
+        with video.video_file.open('rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertTrue(video.video_file.name.endswith('.mp4'))
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+
+class ContentAddressedStorageTest(MediaRootMixin, MaterialsTestCase):
+    """Bir xil fayl bir marta saqlanadi va oxirgi havola o'chirilganda o'chadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher)
+
+    def upload_video(self, name, content):
+        response = self.client.post('/api/materials/videos/', {
+            'title': 'Dars', 'description': 'Tavsif', 'category': self.category.pk,
+            'grade_level': '7', 'subject': 'physics',
+            'video_file': SimpleUploadedFile(name, content, content_type='video/mp4')
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        return VideoLesson.objects.get(pk=response.data['id'])
+
+    def test_deduplicated_and_reference_counted(self):
+        content = b'video' * 1000
+        first = self.upload_video('dars.mp4', content)
+        second = self.upload_video('dars (1).MP4', content)
+
+        self.assertEqual(first.video_file.name, second.video_file.name)
+        self.assertEqual(storage.content_hash(first.video_file.name), hashlib.sha256(content).hexdigest())
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+        path = first.video_file.path
+        self.assertEqual(len(os.listdir(os.path.dirname(path))), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_release_racing_with_reupload(self):
+        content = b'video' * 1000
+        first = self.upload_video('dars.mp4', content)
+        path = first.video_file.path
+        stored = storage.ContentAddressedStorage._stored
+
+        def release_meanwhile(file_storage, name):
+            # Yuklash faylni mavjud deb topib, yozmaydi - shu paytda oxirgi havola o'chiriladi
+            found = stored(file_storage, name)
+            first.delete()
+            storage.remove_if_orphan(file_storage, name)
+            self.assertFalse(os.path.exists(path))
+            return found
+
+        with mock.patch.object(storage.ContentAddressedStorage, '_stored', autospec=True, side_effect=release_meanwhile):
+            second = self.upload_video('dars.mp4', content)
+
+        self.assertEqual(second.video_file.path, path)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+
+@override_settings(HLS_ASYNC=False, HLS_RENDITIONS=((240, 400, 64), (480, 1000, 96), (720, 2500, 128)))
+class VideoHLSTest(MediaRootMixin, MaterialsTestCase):
+    """Yuklangan video fonda HLS ga o'tkaziladi va segmentlar keshlanadigan qilib beriladi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher)
+
+    def fake_ffmpeg(self, command, duration, on_progress):
+        # ffmpeg o'rniga: har bir sifat uchun playlist va bitta segment
+        out_dir = os.path.dirname(os.path.dirname(command[-1]))
+        self.commands.append(command)
+        on_progress(50)
+        self.progress.append(VideoLesson.objects.values_list('hls_progress', flat=True).get())
+        for name in os.listdir(out_dir):
+            with open(os.path.join(out_dir, name, 'index.m3u8'), 'w') as f:
+                f.write('#EXTM3U\nseg_00000.ts\n')
+            with open(os.path.join(out_dir, name, 'seg_00000.ts'), 'wb') as f:
+                f.write(b'ts')
+        with open(os.path.join(out_dir, hls.MASTER_PLAYLIST), 'w') as f:
+            f.write('#EXTM3U\n240p/index.m3u8\n480p/index.m3u8\n')
+
+    def create_video(self):
+        with self.captureOnCommitCallbacks(execute=True), mock.patch.object(video_metadata, 'schedule'):
+            return VideoLesson.objects.create(
+                title='Dars', description='Tavsif', category=self.category, author=self.teacher,
+                grade_level='7', subject='physics',
+                video_file=SimpleUploadedFile('dars.mp4', b'video', content_type='video/mp4')
+            )
+
+    def test_packaged_and_served(self):
+        self.commands, self.progress = [], []
+        with mock.patch.object(hls, 'probe', return_value=(60.0, 480, True)), \
+                mock.patch.object(hls, 'run_ffmpeg', side_effect=self.fake_ffmpeg):
+            video = self.create_video()
+            # Bir xil video qayta yuklansa, tayyor paket ishlatiladi
+            copy = self.create_video()
+
+        self.assertEqual(len(self.commands), 1)
+        self.assertIn('v:0,a:0,name:240p v:1,a:1,name:480p', self.commands[0])
+        self.assertEqual(self.progress, [50])
+
+        video.refresh_from_db()
+        copy.refresh_from_db()
+        self.assertEqual((video.hls_status, video.hls_progress), ('ready', 100))
+        self.assertEqual(copy.hls_playlist, video.hls_playlist)
+
+        response = self.client.get(f'/api/materials/videos/{video.pk}/')
+        url = response.data['hls_url']
+        self.assertEqual(url, f'/api/materials/hls/{hls.package_key(video.video_file.name)}/master.m3u8')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apple.mpegurl')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertNotIn('Content-Disposition', response)
+
+        segment = self.client.get(url.replace('master.m3u8', '480p/seg_00000.ts'))
+        self.assertEqual(segment['Content-Type'], 'video/mp2t')
+        self.assertEqual(b''.join(segment.streaming_content), b'ts')
+        self.assertEqual(self.client.get(url.replace('master.m3u8', '../../dars.mp4')).status_code, 404)
+
+        # Yopiq video paketini boshqa foydalanuvchi ololmaydi
+        VideoLesson.objects.update(is_public=False)
+        self.client.force_login(User.objects.create_user(username='student', password='pass'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        VideoLesson.objects.filter(pk=copy.pk).update(is_public=True)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_failure_recorded(self):
+        with mock.patch.object(hls, 'probe', side_effect=FileNotFoundError('ffprobe')), \
+                self.assertLogs('materials.hls', 'ERROR'):
+            video = self.create_video()
+        video.refresh_from_db()
+        self.assertEqual(video.hls_status, 'failed')
+        self.assertIn('ffprobe', video.hls_error)
+        self.assertIsNone(self.client.get(f'/api/materials/videos/{video.pk}/').data['hls_url'])
+
+    def test_stale_jobs_requeued(self):
+        # Jarayon qayta ishga tushgan: ish navbatdan yo'qolgan
+        with mock.patch.object(hls, 'schedule'):
+            video = self.create_video()
+        fresh = VideoLesson.objects.filter(pk=video.pk)
+        fresh.update(hls_status='processing', hls_heartbeat_at=timezone.now() - timedelta(minutes=5))
+        with mock.patch.object(hls, 'schedule') as schedule, mock.patch.object(video_metadata, 'schedule') as probe:
+            call_command('requeue_stale_jobs', minutes=10, stdout=io.StringIO())
+        schedule.assert_not_called()
+
+        fresh.update(hls_heartbeat_at=timezone.now() - timedelta(minutes=30))
+        with mock.patch.object(hls, 'schedule') as schedule, mock.patch.object(video_metadata, 'schedule') as probe:
+            call_command('requeue_stale_jobs', minutes=10, stdout=io.StringIO())
+        schedule.assert_called_once_with(video.pk)
+        probe.assert_called_once_with(video.pk)
+        video.refresh_from_db()
+        self.assertEqual(video.hls_status, 'pending')
+        self.assertGreater(video.hls_heartbeat_at, timezone.now() - timedelta(minutes=1))
+
+        fresh.update(hls_status='ready', hls_heartbeat_at=timezone.now() - timedelta(days=1))
+        with mock.patch.object(hls, 'schedule') as schedule:
+            call_command('requeue_stale_jobs', minutes=10, stdout=io.StringIO())
+        schedule.assert_not_called()
+
+
+class FakeVideoCapture:
+    """cv2.VideoCapture o'rnini bosuvchi: 100 soniyalik 640x360 video, 10% da qora kadr"""
+    CAP_PROP_POS_MSEC, CAP_PROP_FRAME_WIDTH, CAP_PROP_FRAME_HEIGHT, CAP_PROP_FPS, CAP_PROP_FRAME_COUNT = 0, 3, 4, 5, 7
+
+    def __init__(self, path):
+        self.position = 0.0
+        self.seeks = []
+        FakeVideoCapture.instance = self
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return {self.CAP_PROP_FPS: 25.0, self.CAP_PROP_FRAME_COUNT: 2500.0,
+                self.CAP_PROP_FRAME_WIDTH: 640.0, self.CAP_PROP_FRAME_HEIGHT: 360.0}.get(prop, 0.0)
+
+    def set(self, prop, value):
+        self.position = value
+        self.seeks.append(value)
+
+    def read(self):
+        frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        if self.position >= 20000:
+            # Sahna: chap yarmi yorug' (40-soniyadan keyin yanada kontrastli)
+            frame[:, :320] = 200 if self.position >= 40000 else 120
+        return True, frame
+
+    def release(self):
+        pass
+
+
+@override_settings(VIDEO_PROBE_ASYNC=False, THUMBNAIL_ASYNC=False)
+class VideoMetadataTest(MediaRootMixin, MaterialsTestCase):
+    """Yuklangan videoning davomiyligi, o'lchami va muqovasi fonda aniqlanadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        super().setUp()
+        cv2 = types.SimpleNamespace(VideoCapture=FakeVideoCapture, **{
+            name: getattr(FakeVideoCapture, name) for name in dir(FakeVideoCapture) if name.startswith('CAP_PROP_')
+        })
+        patcher = mock.patch.dict(sys.modules, {'cv2': cv2})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_video(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True), mock.patch.object(hls, 'schedule'):
+            return VideoLesson.objects.create(
+                title='Dars', description='Tavsif', category=self.category, author=self.teacher,
+                grade_level='7', subject='physics',
+                video_file=SimpleUploadedFile('dars.mp4', b'v' * 250000, content_type='video/mp4'), **kwargs
+            )
+
+    def test_metadata_and_poster(self):
+        video = self.create_video()
+        video.refresh_from_db()
+        self.assertEqual((video.duration, video.width, video.height), (100, 640, 360))
+        # Konteyner bitreyti bo'lmasa - fayl hajmidan: 250000 bayt * 8 / 100 s
+        self.assertEqual(video.bitrate, 20)
+        # Barcha videoni dekodlash o'rniga 4 nuqtaga o'tiladi
+        self.assertEqual(FakeVideoCapture.instance.seeks, [10000.0, 25000.0, 40000.0, 60000.0])
+
+        with video.thumbnail.open('rb') as f:
+            poster = Image.open(f)
+            poster.load()
+        self.assertEqual(poster.size, (640, 360))
+        # 40-soniyadagi eng kontrastli kadr tanlangan
+        self.assertGreater(poster.getpixel((100, 100))[0], 180)
+        self.assertTrue(video.thumbnail_renditions)
+
+    def test_uploaded_thumbnail_kept(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), (10, 200, 10)).save(buffer, 'JPEG')
+        video = self.create_video(thumbnail=SimpleUploadedFile('rasm.jpg', buffer.getvalue()))
+        name = video.thumbnail.name
+        video.refresh_from_db()
+        self.assertEqual(video.thumbnail.name, name)
+        self.assertEqual(video.duration, 100)
+
+
+def grid_obj(size):
+    """size x size kvadratlardan iborat to'lqinsimon sirt (OBJ, to'rtburchak yoqlar)"""
+    lines = []
+    for i in range(size + 1):
+        for j in range(size + 1):
+            lines.append(f'v {i} {j} {np.sin(i / 3) * np.cos(j / 3):.4f}')
+    for i in range(size):
+        for j in range(size):
+            a = i * (size + 1) + j + 1
+            lines.append(f'f {a} {a + size + 1} {a + size + 2} {a + 1}')
+    return '\n'.join(lines).encode()
+
+
+@override_settings(MESH_LOD_ASYNC=False, MESH_LOD_RATIOS=(0.05, 0.25), MESH_LOD_MIN_FACES=1000)
+class Model3DMeshTest(MediaRootMixin, MaterialsTestCase):
+    """3D model hajmi, uchlar/yoqlar soni va soddalashtirilgan nusxalari"""
+
+    teacher_subject = 'biology'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Biologiya')
+
+    def create_model(self, name, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Model3D.objects.create(
+                title='Hujayra', description='Tavsif', model_type='biological', category=self.category,
+                author=self.teacher, grade_level='7', subject='biology',
+                model_file=SimpleUploadedFile(name, content)
+            )
+
+    def test_lods_generated(self):
+        content = grid_obj(40)
+        model = self.create_model('hujayra.obj', content)
+        model.refresh_from_db()
+        self.assertEqual((model.file_size, model.vertex_count, model.face_count), (len(content), 41 * 41, 3200))
+
+        levels = model.lods['levels']
+        self.assertEqual([level['ratio'] for level in levels], [0.05, 0.25])
+        self.assertLessEqual(levels[0]['faces'], 160)
+        self.assertLessEqual(levels[1]['faces'], 800)
+        # Kerakli yoqlar soniga yaqin, keraksiz darajada qo'pol emas
+        self.assertGreater(levels[1]['faces'], 400)
+
+        key = meshes.lod_key(model.model_file.name)
+        with meshes.lod_storage().open(meshes.lod_name(key, 0.05), 'rb') as f:
+            data = f.read()
+        self.assertEqual(data[:4], b'glTF')
+        self.assertEqual(len(data), levels[0]['size'])
+        vertices, faces = meshes.load_mesh('lod.glb', io.BytesIO(data))
+        self.assertEqual((len(vertices), len(faces)), (levels[0]['vertices'], levels[0]['faces']))
+        self.assertLess(len(data), len(content) / 10)
+
+        self.client.force_login(self.teacher)
+        response = self.client.get(f'/api/materials/3d-models/{model.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['face_count'], 3200)
+        self.assertEqual(
+            [lod['url'] for lod in response.data['lods']],
+            [f'/media/lods/{key}/5.glb', f'/media/lods/{key}/25.glb']
+        )
+
+        # Fayl almashtirilganda eski nusxalar o'chiriladi
+        lod_dir = os.path.join(self.media_root, 'lods', key)
+        with self.captureOnCommitCallbacks(execute=True):
+            model.model_file = SimpleUploadedFile('kichik.obj', grid_obj(4))
+            model.save()
+        model.refresh_from_db()
+        self.assertFalse(os.path.exists(lod_dir))
+        self.assertEqual((model.face_count, model.lods['levels']), (32, []))
+
+    def test_formats(self):
+        triangles = np.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[1, 0, 0], [1, 1, 0], [0, 1, 0]]], dtype='<f4')
+        stl = b'\0' * 80 + (2).to_bytes(4, 'little') + b''.join(
+            b'\0' * 12 + triangle.tobytes() + b'\0\0' for triangle in triangles
+        )
+        vertices, faces = meshes.load_mesh('kvadrat.stl', io.BytesIO(stl))
+        # Takrorlangan uchlar birlashtiriladi
+        self.assertEqual((len(vertices), len(faces)), (4, 2))
+
+        ply = (
+            b'ply\nformat binary_little_endian 1.0\nelement vertex 4\nproperty float x\nproperty float y\n'
+            b'property float z\nelement face 1\nproperty list uchar int vertex_indices\nend_header\n'
+            + triangles.reshape(-1, 3)[[0, 1, 4, 2]].tobytes() + bytes([4]) + np.arange(4, dtype='<i4').tobytes()
+        )
+        vertices, faces = meshes.load_mesh('kvadrat.ply', io.BytesIO(ply))
+        self.assertEqual(faces.tolist(), [[0, 1, 2], [0, 2, 3]])
+
+        # Diskdagi fayl np.memmap orqali o'qiladi
+        model = self.create_model('kvadrat.stl', stl)
+        model.refresh_from_db()
+        self.assertEqual((model.file_size, model.vertex_count, model.face_count), (len(stl), 4, 2))
+        model = self.create_model('kvadrat.glb', meshes.to_glb(vertices, faces))
+        model.refresh_from_db()
+        self.assertEqual((model.vertex_count, model.face_count), (4, 2))
+
+        model = self.create_model('sahna.fbx', b'Kaydara FBX Binary')
+        model.refresh_from_db()
+        self.assertEqual((model.file_size, model.face_count), (18, 0))
+        self.assertIn('error', model.lods)
+        self.assertEqual(meshes.lod_urls(model), [])
+
+        # Buzuq fayl ham natija sifatida yoziladi - qayta navbatga tushmaydi
+        with self.assertLogs('materials.meshes', 'WARNING'):
+            model = self.create_model('buzuq.obj', b'v 0 0 0\nf 1 x 3\n')
+        model.refresh_from_db()
+        self.assertIn('error', model.lods)
+        self.assertFalse(meshes.stale_models(timezone.now() + timedelta(hours=1)).filter(pk=model.pk).exists())
+
+    def test_stale_jobs_requeued(self):
+        with mock.patch.object(meshes, 'schedule'):
+            model = self.create_model('hujayra.obj', grid_obj(4))
+        model.refresh_from_db()
+        self.assertEqual(model.lods, {})
+        self.assertIsNotNone(model.lods_queued_at)
+        with mock.patch.object(meshes, 'schedule') as schedule:
+            call_command('requeue_stale_jobs', minutes=10, stdout=io.StringIO())
+        schedule.assert_not_called()
+
+        Model3D.objects.filter(pk=model.pk).update(lods_queued_at=timezone.now() - timedelta(hours=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('requeue_stale_jobs', minutes=10, stdout=io.StringIO())
+        model.refresh_from_db()
+        self.assertEqual((model.face_count, model.lods['levels']), (32, []))
+
+    def test_size_limit(self):
+        content = grid_obj(10)
+        with override_settings(MESH_PROCESS_MAX_SIZE=len(content) - 1), \
+                mock.patch.object(meshes, 'load_mesh', side_effect=AssertionError) as load_mesh:
+            model = self.create_model('katta.obj', content)
+        load_mesh.assert_not_called()
+        model.refresh_from_db()
+        self.assertEqual((model.file_size, model.face_count), (len(content), 0))
+        self.assertIn('error', model.lods)
+
+
+@override_settings(DOWNLOAD_HISTORY_RETENTION_DAYS=30, DOWNLOAD_HOURLY_ROLLUP_RETENTION_DAYS=7)
+class DownloadRollupTest(MaterialsTestCase):
+    """Yuklab olishlar soatlik/kunlik statistikaga jamlanadi, eski yozuvlar o'chiriladi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.students = [
+            User.objects.create_user(username=f'student{i}', password='pass')
+            for i in range(3)
+        ]
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+        cls.materials = [
+            Material.objects.create(
+                title=f'Dars {i}', description='Tavsif', material_type='presentation',
+                category=cls.category, author=cls.teacher, file='materials/dars.pptx'
+            )
+            for i in range(2)
+        ]
+
+    def download(self, material, user, when):
+        MaterialDownload.objects.create(material=material, user=user, downloaded_at=when)
+
+    def rollup(self, scope, object_id, period, bucket):
+        row = DownloadRollup.objects.filter(scope=scope, object_id=object_id, period=period, bucket=bucket).first()
+        return (row.downloads, row.unique_users) if row else None
+
+    def test_incremental_rollups(self):
+        today = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0)
+        first, second = self.materials
+        self.download(first, self.students[0], today + timedelta(minutes=5))
+        self.download(first, self.students[0], today + timedelta(minutes=40))
+        self.download(second, self.students[1], today + timedelta(hours=2))
+        self.assertEqual(download_rollups.update(), 3)
+
+        day = today.replace(hour=0)
+        self.assertEqual(self.rollup('material', first.pk, 'hour', today), (2, 1))
+        # Ochiq kun: noyob foydalanuvchilar - soatlik qiymatlarning eng kattasi
+        self.assertEqual(self.rollup('author', self.teacher.pk, 'day', day), (3, 1))
+        self.assertEqual(self.rollup('category', self.category.pk, 'hour', today + timedelta(hours=2)), (1, 1))
+        self.assertEqual(download_rollups.update(), 0)
+
+        # Yangi yozuvlar - faqat ular tushgan soatlar qayta hisoblanadi, yopilgan kun aniq hisoblanadi
+        self.download(first, self.students[2], today + timedelta(minutes=50))
+        self.download(first, self.students[2], today - timedelta(days=3))
+        untouched = DownloadRollup.objects.get(scope='material', object_id=second.pk, period='hour').pk
+        self.assertEqual(download_rollups.update(), 2)
+        self.assertTrue(DownloadRollup.objects.filter(pk=untouched).exists())
+        self.assertEqual(self.rollup('material', first.pk, 'hour', today), (3, 2))
+        self.assertEqual(self.rollup('author', self.teacher.pk, 'day', day), (4, 2))
+        self.assertEqual(self.rollup('author', self.teacher.pk, 'day', day - timedelta(days=3)), (1, 1))
+
+        # Kun yopilganda noyob foydalanuvchilar manba yozuvlaridan aniq hisoblanadi
+        with mock.patch('django.utils.timezone.localdate', return_value=day.date() + timedelta(days=1)):
+            self.assertEqual(download_rollups.update(), 0)
+        self.assertEqual(self.rollup('author', self.teacher.pk, 'day', day), (4, 3))
+        self.assertEqual(RollupCheckpoint.objects.get(name=download_rollups.CHECKPOINT).closed_day, day.date())
+
+        # Qayta hisoblash natijani o'zgartirmaydi
+        download_rollups.rebuild(day - timedelta(days=3), day + timedelta(days=1))
+        self.assertEqual(self.rollup('author', self.teacher.pk, 'day', day), (4, 3))
+
+    def test_late_committed_rows(self):
+        now = timezone.localtime()
+        material = self.materials[0]
+        for pk in (10, 20):
+            MaterialDownload.objects.create(pk=pk, material=material, user=self.students[0], downloaded_at=now)
+        self.assertEqual(download_rollups.update(), 2)
+
+        # ID oldinroq berilgan, lekin tranzaksiya checkpoint dan keyin tasdiqlangan
+        MaterialDownload.objects.create(pk=15, material=material, user=self.students[1], downloaded_at=now)
+        self.assertEqual(download_rollups.update(), 1)
+        day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.assertEqual(self.rollup('material', material.pk, 'day', day), (3, 2))
+        self.assertEqual(download_rollups.update(), 0)
+
+    def test_retention(self):
+        old = timezone.localtime() - timedelta(days=40)
+        for student in self.students:
+            self.download(self.materials[0], student, old)
+        pending = timezone.localtime() - timedelta(days=50)
+
+        self.assertEqual(download_rollups.update(), 3)
+        # Hali statistikaga qo'shilmagan yozuv o'chirilmaydi
+        self.download(self.materials[0], self.students[0], pending)
+        with self.settings(DOWNLOAD_HISTORY_DELETE_BATCH=2):
+            deleted = download_rollups.prune()
+        self.assertEqual(deleted, {'downloads': 3, 'hourly_rollups': 3})
+        self.assertEqual(MaterialDownload.objects.count(), 1)
+
+        # Kunlik statistika saqlanadi
+        day = old.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.assertEqual(self.rollup('material', self.materials[0].pk, 'day', day), (3, 3))
+        self.assertIsNone(self.rollup('material', self.materials[0].pk, 'hour', old.replace(minute=0, second=0, microsecond=0)))
+
+    def test_endpoint_reads_rollups(self):
+        now = timezone.localtime()
+        self.download(self.materials[0], self.students[0], now)
+        self.download(self.materials[1], self.students[1], now - timedelta(days=1))
+        download_rollups.update()
+        # Jamlanmagan yozuvlar statistikada ko'rinmaydi
+        self.download(self.materials[0], self.students[2], now)
+
+        self.client.force_login(self.teacher)
+        response = self.client.get('/api/materials/stats/downloads/?period=day&count=7')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['series']), 7)
+        self.assertEqual([point['downloads'] for point in response.data['series'][-2:]], [1, 1])
+        self.assertEqual(response.data['total_downloads'], 2)
+
+        response = self.client.get(f'/api/materials/stats/downloads/?period=hour&material={self.materials[0].pk}')
+        self.assertEqual(len(response.data['series']), 24)
+        self.assertEqual(response.data['series'][-1]['downloads'], 1)
+
+        self.assertEqual(self.client.get('/api/materials/stats/downloads/?period=week').status_code, 400)
+        for material_id in ('%C2%B2', '9' * 30):
+            response = self.client.get(f'/api/materials/stats/downloads/?material={material_id}')
+            self.assertEqual(response.status_code, 400)
+        self.client.force_login(self.students[0])
+        response = self.client.get(f'/api/materials/stats/downloads/?material={self.materials[0].pk}')
+        self.assertEqual(response.status_code, 404)
+
+
+class TagIndexTest(MaterialsTestCase):
+    """Teglar satri normallashtirilgan teglar jadvaliga bog'lanadi, filtrlash aniq moslik bo'yicha"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.teacher)
+
+    def create_material(self, title, tags_value, **kwargs):
+        return Material.objects.create(
+            title=title, description='Tavsif', material_type='presentation', tags=tags_value,
+            category=self.category, author=self.teacher, file='materials/dars.pptx', **kwargs
+        )
+
+    def material_tags(self, material):
+        return set(MaterialTag.objects.filter(material=material).values_list('tag__name', flat=True))
+
+    def test_sync_and_exact_filter(self):
+        physics = self.create_material('Fizika', 'Fizika,  Kuch , fizika')
+        astro = self.create_material('Astronomiya', 'astrofizika, yulduzlar')
+        self.assertEqual(self.material_tags(physics), {'fizika', 'kuch'})
+        self.assertEqual(Tag.objects.count(), 4)
+
+        response = self.client.get('/api/materials/?tag=FIZIKA')
+        self.assertEqual([item['id'] for item in response.data['results']], [physics.pk])
+        self.assertEqual(response.data['results'][0]['tags_list'], ['Fizika', 'Kuch', 'fizika'])
+        response = self.client.get('/api/materials/search/?tag=astrofizika')
+        self.assertEqual([item['id'] for item in response.data['results']], [astro.pk])
+
+        physics.tags = 'kuch, harakat'
+        physics.save()
+        self.assertEqual(self.material_tags(physics), {'kuch', 'harakat'})
+        self.assertEqual(self.client.get('/api/materials/?tag=fizika').data['results'], [])
+
+        # Teglar o'zgarmasa bog'lanish jadvaliga murojaat qilinmaydi
+        physics.title = 'Mexanika'
+        with self.assertNumQueries(1):
+            physics.save()
+
+    def test_top_tags(self):
+        self.create_material('Dars 1', 'fizika, kuch')
+        self.create_material('Dars 2', 'Fizika')
+        hidden = self.create_material('Dars 3', 'kuch, optika', is_public=False)
+        VideoLesson.objects.create(
+            title='Video', description='Tavsif', category=self.category, author=self.teacher,
+            grade_level='7', subject='physics', tags='fizika', video_file='videos/dars.mp4'
+        )
+
+        response = self.client.get('/api/materials/tags/')
+        self.assertEqual(response.data, [
+            {'name': 'fizika', 'count': 3, 'material': 2, 'videolesson': 1},
+            {'name': 'kuch', 'count': 1, 'material': 1, 'videolesson': 0},
+        ])
+        # Keshdan o'qiladi
+        with self.assertNumQueries(0):
+            self.assertEqual(len(tags.top_tags(1)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hidden.is_public = True
+            hidden.save()
+        response = self.client.get('/api/materials/tags/?limit=2')
+        self.assertEqual([(tag['name'], tag['count']) for tag in response.data], [('fizika', 3), ('kuch', 2)])
+
+
+class MaterialFacetsTest(MaterialsTestCase):
+    """Materiallar filtrlari bo'yicha sonlar qidiruv va teg bilan birga bitta so'rovda"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.chemist = create_user('chemist', subject='chemistry')
+        cls.physics = MaterialCategory.objects.create(name='Fizika')
+        cls.lessons = MaterialCategory.objects.create(name='Darslar')
+        for author, category, material_type, title, tags_value in (
+            (cls.teacher, cls.physics, 'presentation', 'Kuch va harakat', 'mexanika'),
+            (cls.teacher, cls.physics, 'document', 'Kuch momenti', 'mexanika'),
+            (cls.teacher, cls.lessons, 'presentation', 'Optika', 'yorug\'lik'),
+            (cls.chemist, cls.lessons, 'document', 'Kuchli kislotalar', 'kimyo'),
+        ):
+            Material.objects.create(
+                title=title, description='Tavsif', material_type=material_type, tags=tags_value,
+                category=category, author=author, file='materials/dars.pptx', grade_level='7'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.teacher)
+
+    def test_facets_with_search_and_tag(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/materials/facets/?search=kuch&type=presentation')
+        data = response.data
+        self.assertEqual(data['total'], 1)
+        # Tur filtrining o'zi hisobga olinmaydi, nomlar choices dan
+        self.assertEqual(
+            [(entry['label'], entry['count']) for entry in data['facets']['type']],
+            [('Word hujjat', 2), ('PPT taqdimot', 1)]
+        )
+        self.assertEqual({entry['value']: entry['count'] for entry in data['facets']['subject']}, {'physics': 1})
+        self.assertEqual(data['facets']['category'], [
+            {'value': self.physics.pk, 'label': 'Fizika', 'count': 1},
+        ])
+
+        response = self.client.get('/api/materials/facets/?tag=mexanika')
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(response.data['facets']['grade'], [{'value': '7', 'label': '7', 'count': 2}])
+
+        for url in ('/api/materials/videos/facets/?search=kuch', '/api/materials/3d-models/facets/?search=kuch&interactive=1'):
+            response = self.client.get(url)
+            self.assertEqual((response.status_code, response.data['total']), (200, 0))
+
+
+@override_settings(
+    RELATED_STREAM_CHUNK=3, RELATED_MIN_CO_DOWNLOADS=2, RELATED_MAX_USER_ITEMS=3, RELATED_MATERIALS_TOP_K=2
+)
+class RelatedMaterialsTest(MaterialsTestCase):
+    """Birga yuklab olishlar bo'yicha o'xshash materiallar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+        cls.materials = [
+            Material.objects.create(
+                title=f'Dars {i}', description='Tavsif', material_type='presentation',
+                category=cls.category, author=cls.teacher, file='materials/dars.pptx'
+            )
+            for i in range(5)
+        ]
+
+    def downloads(self, user, *indexes):
+        for index in indexes:
+            MaterialDownload.objects.create(material=self.materials[index], user=user)
+
+    def related(self, index):
+        return [
+            (link.related_id, link.co_downloads)
+            for link in RelatedMaterial.objects.filter(material=self.materials[index]).order_by('rank')
+        ]
+
+    def test_rebuild_and_endpoint(self):
+        users = [User.objects.create_user(username=f'user{i}', password='pass') for i in range(4)]
+        m = [material.pk for material in self.materials]
+        self.downloads(users[0], 0, 1, 0)
+        self.downloads(users[1], 0, 1, 2)
+        self.downloads(users[2], 0, 2)
+        self.downloads(users[3], 1, 0)
+        # Juda ko'p yuklagan foydalanuvchi hisobga olinmaydi
+        bot = User.objects.create_user(username='bot', password='pass')
+        self.downloads(bot, 0, 3, 4, 2)
+
+        self.assertEqual(recommendations.rebuild(), 4)
+        self.assertEqual(self.related(0), [(m[1], 3), (m[2], 2)])
+        self.assertEqual(self.related(1), [(m[0], 3)])
+        self.assertEqual(self.related(3), [])
+        score = RelatedMaterial.objects.get(material=self.materials[0], rank=0).score
+        self.assertAlmostEqual(score, 3 / (4 * 3) ** 0.5, places=5)
+
+        Material.objects.filter(pk=m[1]).update(is_public=False)
+        self.client.force_login(users[0])
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/materials/{m[0]}/related/')
+        self.assertEqual([item['id'] for item in response.data], [m[2]])
+
+        # Qayta hisoblash natijani almashtiradi
+        self.materials[2].delete()
+        self.assertEqual(recommendations.rebuild(), 2)
+
+
+
+class BulkImportTest(MediaRootMixin, MaterialsTestCase):
+    """Arxivdan ommaviy import: fayllar bir marta saqlanadi, signal ishlari bajariladi, import davom ettiriladi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.publisher = User.objects.create_user(username='nashriyot', password='pass')
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def make_archive(self):
+        path = os.path.join(self.media_root, 'partner.zip')
+        manifest = (
+            'file,title,description,category,author,tags\n'
+            f'darslar/kuch.pptx,Kuch,Tavsif,{self.category.pk},,"Fizika, kuch"\n'
+            'darslar/kuch-nusxa.pptx,Kuch (nusxa),,Kimyo,nashriyot,kuch\n'
+            'hujjatlar/reja.pdf,Reja,,,,\n'
+            'hujjatlar/yoq.docx,Yo\'q fayl,,,,\n'
+            'darslar/kuch.pptx,Begona,,,noma\'lum,\n'
+        )
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('manifest.csv', manifest)
+            archive.writestr('darslar/kuch.pptx', b'slayd' * 1000)
+            archive.writestr('darslar/kuch-nusxa.pptx', b'slayd' * 1000)
+            archive.writestr('hujjatlar/reja.pdf', b'%PDF reja')
+        return path
+
+    def test_category_ids(self):
+        self.assertTrue(bulk_import.is_id(str(self.category.pk)))
+        # '²' isdigit() dan o'tadi, lekin int() uni o'qiy olmaydi; juda katta ID bazaga sig'maydi
+        for value in ('\u00b2', '\u0663', '9' * 30, 'Fizika', '-1'):
+            self.assertFalse(bulk_import.is_id(value), value)
+
+    def test_import_and_resume(self):
+        path = self.make_archive()
+        result = bulk_import.run(path, author=self.teacher, category=self.category, batch_size=2, workers=2)
+
+        self.assertEqual((result['total'], result['created'], result['skipped']), (5, 3, 0))
+        self.assertEqual([line for line, _ in result['failed']], [5, 6])
+        first, copy, plan = Material.objects.order_by('pk')
+        self.assertEqual((first.author, copy.author), (self.teacher, self.publisher))
+        self.assertEqual(copy.category.name, 'Kimyo')
+        self.assertEqual((first.material_type, plan.material_type), ('presentation', 'document'))
+
+        # Bir xil fayllar bitta nusxada, havolalar sanalgan
+        self.assertEqual(first.file.name, copy.file.name)
+        self.assertEqual(storage.content_hash(first.file.name), hashlib.sha256(b'slayd' * 1000).hexdigest())
+        self.assertEqual(MediaBlob.objects.get(name=first.file.name).ref_count, 2)
+        with open(plan.file.path, 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF reja')
+
+        # bulk_create signallarsiz - teglar indeksi va muallif statistikasi to'plam bilan yangilanadi
+        self.assertEqual(
+            sorted(MaterialTag.objects.values_list('material__title', 'tag__name')),
+            [('Kuch', 'fizika'), ('Kuch', 'kuch'), ('Kuch (nusxa)', 'kuch')]
+        )
+        self.assertEqual(AuthorStats.objects.get(author=self.teacher).total_materials, 2)
+        self.assertEqual(AuthorStats.objects.get(author=self.publisher).total_materials, 1)
+
+        # Qayta ishga tushirish: bajarilgan qatorlar o'qilmaydi, xatolar qayta uriniladi
+        with mock.patch.object(bulk_import, '_store', wraps=bulk_import._store) as store:
+            result = bulk_import.run(path, author=self.teacher, category=self.category)
+        self.assertEqual(store.call_count, 1)
+        self.assertEqual((result['created'], result['skipped'], len(result['failed'])), (0, 3, 2))
+
+        # Holat yo'qolsa ham materiallar takrorlanmaydi
+        os.remove(path + bulk_import.STATE_SUFFIX)
+        result = bulk_import.run(path, author=self.teacher, category=self.category)
+        self.assertEqual((result['created'], result['skipped']), (0, 3))
+        self.assertEqual(Material.objects.count(), 3)
+        self.assertEqual(MediaBlob.objects.get(name=first.file.name).ref_count, 2)
+
+    def test_command_from_directory(self):
+        source = os.path.join(self.media_root, 'partner')
+        os.makedirs(source)
+        with open(os.path.join(source, 'dars.docx'), 'wb') as f:
+            f.write(b'hujjat')
+        with open(os.path.join(source, 'manifest.csv'), 'w') as f:
+            f.write('file,title,is_public\ndars.docx,Dars,no\n../tashqi.docx,Tashqi,\n')
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command(
+            'import_materials', source, author='teacher', category='Fizika', stdout=out, stderr=err
+        )
+        material = Material.objects.get()
+        self.assertFalse(material.is_public)
+        self.assertEqual(material.category, self.category)
+        self.assertIn('1 ta material yaratildi', out.getvalue())
+        self.assertIn('3-qator', err.getvalue())
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0, DOWNLOAD_CHUNK_SIZE=1024)
+class AssignmentBundleTest(MediaRootMixin, MaterialsTestCase):
+    """Topshiriq materiallari ZIP arxivda bo'laklab uzatiladi va ETag bo'yicha keshlanadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.student = User.objects.create_user(username='student', password='pass')
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+
+    def setUp(self):
+        super().setUp()
+        self.assignment = Assignment.objects.create(
+            title='Uy vazifasi: kuch', description='Tavsif', assignment_type='homework',
+            teacher=self.teacher, category=self.category, grade_level='7',
+            subject='physics', due_date=timezone.now() + timedelta(days=7)
+        )
+        self.client.force_login(self.student)
+
+    def attach(self, title, name, content, **kwargs):
+        material = Material.objects.create(
+            title=title, description='Tavsif', material_type='document', category=self.category,
+            author=kwargs.pop('author', self.teacher), file=SimpleUploadedFile(name, content), **kwargs
+        )
+        self.assignment.materials.add(material)
+        return material
+
+    def test_streamed_bundle(self):
+        slides = os.urandom(5000)
+        self.attach('Kuch', 'kuch.pptx', slides)
+        self.attach('Kuch', 'kuch.txt', b'matn ' * 2000)
+        self.attach('Yopiq', 'yopiq.txt', b'x', is_public=False)
+        missing = self.attach('Yo\'q', 'yoq.pdf', b'pdf')
+        os.remove(missing.file.path)
+        url = f'/api/materials/assignments/{self.assignment.pk}/bundle/'
+
+        # HEAD va uzilgan yuklab olish hisoblanmaydi
+        response = self.client.head(url)
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'application/zip'))
+        self.assertIn('ETag', response)
+        response = self.client.get(url)
+        next(iter(response.streaming_content))
+        response.close()
+        self.assertFalse(MaterialDownload.objects.exists())
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('Uy vazifasi kuch.zip', response['Content-Disposition'])
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 5)
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            infos = {info.filename: info for info in archive.infolist()}
+            self.assertEqual(set(infos), {'Kuch.pptx', 'Kuch.txt'})
+            self.assertEqual(infos['Kuch.pptx'].compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(infos['Kuch.txt'].compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(archive.read('Kuch.pptx'), slides)
+        self.assertEqual(MaterialDownload.objects.filter(user=self.student).count(), 2)
+
+        # Takroriy yuklab olish - arxiv yaratilmaydi
+        etag = response['ETag']
+        with mock.patch('ustoziya_platform.zipstream.stream_zip') as stream_zip:
+            response = self.client.get(
+                f'/api/materials/assignments/{self.assignment.pk}/bundle/', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        stream_zip.assert_not_called()
+
+        # A'zolar o'zgarsa ETag ham o'zgaradi
+        self.attach('Yangi', 'yangi.docx', b'docx')
+        response = self.client.get(
+            f'/api/materials/assignments/{self.assignment.pk}/bundle/', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class BulkGradingTest(MaterialsTestCase):
+    """Ishlar bitta so'rov bilan o'qilib, bitta bulk_update bilan baholanadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user(username='other', password='pass')
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+        cls.assignments = [
+            Assignment.objects.create(
+                title=f'Topshiriq {i}', description='Tavsif', assignment_type='homework',
+                teacher=teacher, category=cls.category, grade_level='7', subject='physics',
+                due_date=timezone.now() + timedelta(days=7), max_points=max_points
+            )
+            for i, (teacher, max_points) in enumerate(((cls.teacher, 100), (cls.teacher, 5), (cls.other, 100)))
+        ]
+        StudentSubmission.objects.bulk_create([
+            StudentSubmission(
+                assignment=cls.assignments[i % 3], student_name=f"O'quvchi {i}",
+                student_email=f'student{i}@example.com', status='submitted'
+            )
+            for i in range(600)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def test_batch_grading(self):
+        def ids(assignment):
+            return list(StudentSubmission.objects.filter(assignment=assignment).order_by('pk').values_list('pk', flat=True))
+
+        own, small = ids(self.assignments[0])[:150], ids(self.assignments[1])[:2]
+        foreign = StudentSubmission.objects.filter(assignment=self.assignments[2]).first()
+        items = [{'id': pk, 'grade': 90, 'feedback': f'Yaxshi {pk}'} for pk in own] + [
+            {'id': small[0], 'grade': 5},
+            {'id': small[1], 'grade': 6},
+            {'id': foreign.pk, 'grade': 50},
+            {'id': own[0], 'grade': 10},
+            {'id': 'x', 'grade': 1},
+            {'id': small[1], 'grade': -1},
+            {'id': '\u00b2', 'grade': 1},
+            {'id': 10 ** 30, 'grade': 1},
+            {'id': str(10 ** 30), 'grade': 1},
+            {'id': small[1], 'grade': '9' * 5000},
+        ]
+
+        # Sessiya, foydalanuvchi, ishlarni o'qish, tranzaksiya (2), bulk_update va umumiy maydonlar UPDATE i
+        with self.assertNumQueries(2 + 1 + 2 + 2):
+            response = self.client.post('/api/materials/submissions/grade/', items, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['graded'], response.data['failed']), (151, 9))
+        errors = {index: result['error'] for index, result in enumerate(response.data['results']) if 'error' in result}
+        self.assertEqual(sorted(errors), list(range(151, 160)))
+        self.assertEqual([errors[index] for index in (156, 157, 158)], ["id noto'g'ri"] * 3)
+        self.assertIn('0 dan 5 gacha', errors[151])
+        self.assertEqual(errors[152], 'Ish topilmadi')
+
+        graded = StudentSubmission.objects.get(pk=own[1])
+        self.assertEqual((graded.grade, graded.status, graded.graded_by), (90, 'graded', self.teacher))
+        self.assertEqual(graded.feedback, f'Yaxshi {own[1]}')
+        self.assertIsNotNone(graded.graded_at)
+        foreign.refresh_from_db()
+        self.assertIsNone(foreign.grade)
+
+        response = self.client.post('/api/materials/submissions/grade/', {'id': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ScalableAdminTest(TestCase):
+    """Admin ro'yxatlari qatorlar soniga bog'liq bo'lmagan miqdorda so'rov bajaradi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='pass', email='admin@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_materials(self, count):
+        for _ in range(count):
+            index = Material.objects.count()
+            author = User.objects.create_user(username=f'author{index}', password='pass')
+            Material.objects.create(
+                title=f'Fizika darsi {index}', description='Kuch va harakat', tags='fizika',
+                material_type='presentation', category=MaterialCategory.objects.create(name=f'Kategoriya {index}'),
+                author=author, file=f'materials/dars_{index}.pptx'
+            )
+
+    def changelist(self, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/materials/material/' + query)
+        self.assertEqual(response.status_code, 200)
+        return response.context_data['cl'], len(queries)
+
+    def test_changelist_queries_constant(self):
+        self.create_materials(1)
+        _, small = self.changelist()
+        self.create_materials(19)
+        cl, large = self.changelist()
+        self.assertEqual(small, large)
+        self.assertEqual(cl.result_count, 20)
+        self.assertFalse(cl.show_full_result_count)
+
+        cl, _ = self.changelist('?q=fizika')
+        self.assertEqual(cl.result_count, 20)
+
+    @override_settings(ADMIN_COUNT_LIMIT=5)
+    def test_count_capped(self):
+        self.create_materials(8)
+        cl, _ = self.changelist()
+        self.assertEqual(cl.result_count, 5)
+
+    def test_foreign_keys_use_autocomplete(self):
+        for _ in range(3):
+            self.create_materials(1)
+        response = self.client.get('/admin/materials/material/add/')
+        self.assertContains(response, 'admin-autocomplete')
+        # Foydalanuvchilar ro'yxati formaga to'liq yuklanmaydi
+        self.assertNotContains(response, 'author2<')
+
+
+@skipUnless(connection.vendor == 'sqlite', "So'rov rejasi SQLite formatida tekshiriladi")
+class CatalogIndexTest(MaterialsTestCase):
+    """Katalog ro'yxatlari jadvalni to'liq o'qimasdan va saralamasdan indeks orqali olinadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = MaterialCategory.objects.create(name='Fizika')
+        for i in range(3):
+            Material.objects.create(
+                title=f'Fizika darsi {i}', description='Kuch', material_type='presentation',
+                category=cls.category, author=cls.teacher, file=f'materials/dars_{i}.pptx'
+            )
+        cls.assignment = Assignment.objects.create(
+            title='Uy vazifasi', description='Tavsif', assignment_type='homework', teacher=cls.teacher,
+            category=cls.category, grade_level='7', subject='physics', due_date=timezone.now() + timedelta(days=7)
+        )
+        StudentSubmission.objects.create(assignment=cls.assignment, student_name='Ali', student_email='ali@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def assertIndexed(self, url, table, index):
+        """Endpointning ``table`` dagi so'rovlari ``index`` dan foydalanadi, to'liq skan va saralash yo'q"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        for query in queries:
+            if f'FROM "{table}"' not in query['sql']:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans.append([row[-1] for row in cursor.fetchall()])
+        self.assertTrue(plans, url)
+        for plan in plans:
+            self.assertNotIn(f'SCAN {table}', plan, url)
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, url)
+        self.assertTrue(any(index in step for plan in plans for step in plan), (url, plans))
+
+    def test_material_catalog(self):
+        table = 'materials_material'
+        self.assertIndexed('/api/materials/', table, 'material_public_recent_idx')
+        self.assertIndexed(f'/api/materials/?category={self.category.pk}', table, 'material_public_category_idx')
+        self.assertIndexed('/api/materials/?type=presentation', table, 'material_public_type_idx')
+        self.assertIndexed('/api/materials/my-materials/', table, 'material_author_recent_idx')
+
+    def test_material_sorts(self):
+        table = 'materials_material'
+        for sort, index in [
+            ('-created_at', 'material_public_recent_idx'), ('created_at', 'material_public_recent_idx'),
+            ('-download_count', 'material_public_downloads_idx'), ('-rating', 'material_public_rating_idx'),
+            ('title', 'material_public_title_idx'),
+        ]:
+            self.assertIndexed(f'/api/materials/search/?sort={sort}', table, index)
+
+        response = self.client.get('/api/materials/search/?sort=description')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sort', response.data)
+
+    def test_assignments_and_media(self):
+        self.assertIndexed('/api/materials/assignments/', 'materials_assignment', 'assignment_active_recent_idx')
+        self.assertIndexed(
+            f'/api/materials/submissions/?assignment={self.assignment.pk}', 'materials_studentsubmission',
+            'submission_assignment_idx'
+        )
+        self.assertIndexed('/api/materials/videos/', 'materials_videolesson', 'video_public_recent_idx')
+        self.assertIndexed(
+            f'/api/materials/3d-models/?category={self.category.pk}', 'materials_model3d', 'model3d_public_category_idx'
+        )
+
+    def test_user_history(self):
+        self.assertIndexed('/api/ocr/processings/', 'ocr_processing_ocrprocessing', 'ocr_user_recent_idx')
+        self.assertIndexed('/api/ocr/excel-exports/', 'ocr_processing_excelexport', 'excel_export_user_recent_idx')
@@ -0,0 +1,135 @@
+"""Katta fayllarni (video darslik, 3D model) bo'laklab, davom ettirib yuklash.
+
+Protokol (tus protokoliga o'xshash):
+
+    POST   /api/materials/uploads/          {"filename", "size"} -> {"id", "offset", ...}
+    HEAD   /api/materials/uploads/<id>/     -> Upload-Offset sarlavhasi (qayerdan davom etish)
+    PATCH  /api/materials/uploads/<id>/     Upload-Offset: <n>, tanasi - xom baytlar
+    DELETE /api/materials/uploads/<id>/     yuklashni bekor qilish
+
+Bo'lak tanasi xotiraga to'liq o'qilmaydi: so'rov oqimidan kichik bloklarda
+o'qilib, diskdagi ``<id>.part`` fayliga o'z o'rniga yoziladi. Ulanish uzilsa,
+yozib ulgurilgan baytlar saqlanadi va mijoz ``HEAD`` dan olingan joydan
+davom ettiradi. Yuklash tugagach, fayl ``upload`` maydoni orqali
+VideoLesson/Model3D yaratishda ishlatiladi (fayl ko'chiriladi, nusxalanmaydi).
+
+Sozlamalar:
+    CHUNKED_UPLOAD_DIR - vaqtinchalik fayllar papkasi (MEDIA_ROOT dan tashqarida)
+    CHUNKED_UPLOAD_MAX_SIZE - fayl hajmi chegarasi
+    CHUNKED_UPLOAD_MAX_CHUNK - bitta PATCH so'rovi hajmi chegarasi
+    CHUNKED_UPLOAD_EXPIRE_HOURS - tugallanmagan yuklashlar saqlanish muddati
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+# So'rov oqimidan o'qish bloki
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Bo'lakni qabul qilib bo'lmadi (HTTP status bilan)"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadedPartFile(File):
+    """Tayyor vaqtinchalik fayl - FileSystemStorage uni nusxalamasdan ko'chiradi"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def upload_dir():
+    path = getattr(settings, 'CHUNKED_UPLOAD_DIR', os.path.join(settings.BASE_DIR, 'uploads_tmp'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def max_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024)
+
+
+def max_chunk():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_CHUNK', 8 * 1024 * 1024)
+
+
+def part_path(upload):
+    """Yuklanayotgan faylning diskdagi yo'li"""
+    return os.path.join(upload_dir(), f'{upload.pk}.part')
+
+
+def create_upload(user, filename, size):
+    """Yangi yuklash yaratish (bo'sh vaqtinchalik fayl bilan)"""
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError('Fayl nomi ko\'rsatilmagan', 400)
+    if size <= 0 or size > max_size():
+        raise UploadError(f'Fayl hajmi 1 bayt va {max_size()} bayt oralig\'ida bo\'lishi kerak', 413)
+
+    upload = ChunkedUpload.objects.create(user=user, filename=filename[:255], size=size)
+    open(part_path(upload), 'wb').close()
+    return upload
+
+
+def append_chunk(upload, offset, stream, length):
+    """Bo'lakni ``offset`` joyidan yozish; yangi offset qaytariladi.
+
+    Ulanish bo'lak o'rtasida uzilsa ham, yozilgan baytlar hisobga olinadi.
+    """
+    if offset != upload.offset:
+        raise UploadError('Upload-Offset serverdagi holatga mos emas', 409)
+    if length is None:
+        raise UploadError('Content-Length ko\'rsatilmagan', 411)
+    if length > max_chunk():
+        raise UploadError(f'Bo\'lak hajmi {max_chunk()} baytdan oshmasligi kerak', 413)
+    if offset + length > upload.size:
+        raise UploadError('Bo\'lak fayl hajmidan oshib ketadi', 413)
+
+    written = 0
+    with open(part_path(upload), 'r+b') as f:
+        f.seek(offset)
+        try:
+            while written < length:
+                block = stream.read(min(READ_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                f.write(block)
+                written += len(block)
+        finally:
+            f.flush()
+            os.fsync(f.fileno())
+            # Boshqa so'rov shu orada yozgan bo'lsa, offset o'zgartirilmaydi
+            updated = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(
+                offset=offset + written, updated_at=timezone.now()
+            )
+    if not updated:
+        raise UploadError('Bo\'lak boshqa so\'rov bilan bir vaqtda yozildi', 409)
+    upload.offset = offset + written
+    return upload.offset
+
+
+def open_completed(upload):
+    """Tugallangan yuklashni model FileField ga berish uchun ochish"""
+    return UploadedPartFile(open(part_path(upload), 'rb'), name=upload.filename)
+
+
+def discard(upload):
+    """Yuklashni va vaqtinchalik faylni o'chirish"""
+    path = part_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    upload.delete()
+
+
+def expired_uploads():
+    """Muddati o'tgan tugallanmagan yuklashlar"""
+    hours = getattr(settings, 'CHUNKED_UPLOAD_EXPIRE_HOURS', 24)
+    return ChunkedUpload.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=hours))
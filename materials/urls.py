@@ -4,35 +4,48 @@ from . import views
 urlpatterns = [
     # Material categories
     path('categories/', views.MaterialCategoryListView.as_view(), name='material_category_list'),
+    path('tags/', views.tag_list, name='material_tag_list'),
     
     # Materials
     path('', views.MaterialListView.as_view(), name='material_list'),
+    path('facets/', views.material_facets, name='material_facets'),
     path('create/', views.MaterialCreateView.as_view(), name='material_create'),
     path('<int:pk>/', views.MaterialDetailView.as_view(), name='material_detail'),
     path('<int:pk>/update/', views.MaterialUpdateView.as_view(), name='material_update'),
     path('<int:pk>/delete/', views.MaterialDeleteView.as_view(), name='material_delete'),
     path('<int:pk>/download/', views.download_material, name='material_download'),
     path('<int:pk>/rate/', views.rate_material, name='material_rate'),
+    path('<int:pk>/related/', views.related_materials, name='related_materials'),
     path('search/', views.search_materials, name='search_materials'),
     path('my-materials/', views.my_materials, name='my_materials'),
     path('stats/', views.material_stats, name='material_stats'),
+    path('stats/downloads/', views.download_stats, name='material_download_stats'),
     
     # Assignments
     path('assignments/', views.AssignmentListView.as_view(), name='assignment_list'),
     path('assignments/<int:pk>/', views.AssignmentDetailView.as_view(), name='assignment_detail'),
+    path('assignments/<int:pk>/bundle/', views.assignment_bundle, name='assignment_bundle'),
     
     # Student submissions
     path('submissions/', views.StudentSubmissionListView.as_view(), name='submission_list'),
+    path('submissions/grade/', views.grade_submissions_bulk, name='grade_submissions_bulk'),
     path('submissions/<int:pk>/', views.StudentSubmissionDetailView.as_view(), name='submission_detail'),
     path('submissions/<int:pk>/grade/', views.grade_submission, name='grade_submission'),
     
+    # Chunked (resumable) uploads
+    path('uploads/', views.chunked_upload_create, name='chunked_upload_create'),
+    path('uploads/<uuid:pk>/', views.chunked_upload_detail, name='chunked_upload_detail'),
+    
     # Video lessons
     path('videos/', views.VideoLessonListView.as_view(), name='video_lesson_list'),
+    path('videos/facets/', views.video_facets, name='video_lesson_facets'),
     path('videos/<int:pk>/', views.VideoLessonDetailView.as_view(), name='video_lesson_detail'),
     path('videos/<int:pk>/watch/', views.watch_video, name='watch_video'),
+    path('hls/<str:key>/<path:name>', views.video_hls_file, name='video_hls_file'),
     
     # 3D Models
     path('3d-models/', views.Model3DListView.as_view(), name='model_3d_list'),
+    path('3d-models/facets/', views.model3d_facets, name='model_3d_facets'),
     path('3d-models/<int:pk>/', views.Model3DDetailView.as_view(), name='model_3d_detail'),
     path('3d-models/<int:pk>/download/', views.download_3d_model, name='download_3d_model'),
 ]
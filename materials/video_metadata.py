@@ -0,0 +1,168 @@
+"""Video faylidan ma'lumotlarni (davomiylik, o'lcham, bitreyt) va muqova kadrini olish.
+
+Video yuklanganda yoki almashtirilganda, tranzaksiya yakunlangach fon oqimida
+OpenCV bilan konteyner o'qiladi: davomiylik - kadrlar soni va FPS dan,
+bitreyt - konteynerdan (bo'lmasa fayl hajmidan). Muqova uchun video bir
+nechta nuqtasiga (``VIDEO_POSTER_POSITIONS``) o'tiladi va har biridan bitta
+kadr o'qiladi - butun video dekodlanmaydi. Ulardan eng ma'lumotlisi (juda
+qora/oq bo'lmagan, kontrasti yuqori) tanlanadi.
+
+Muqova faqat foydalanuvchi rasm yuklamagan bo'lsa qo'yiladi, kichik
+nusxalari ``thumbnails`` orqali yaratiladi.
+
+Sozlamalar:
+    VIDEO_POSTER_POSITIONS - kadr olinadigan nuqtalar (davomiylikka nisbatan)
+    VIDEO_POSTER_MAX_SIZE - muqova o'lchami (px, uzun tomoni bo'yicha)
+    VIDEO_PROBE_ASYNC - False bo'lsa tranzaksiyadan keyin shu oqimda bajariladi
+    VIDEO_PROBE_WORKERS - fon oqimlari soni
+"""
+import io
+import logging
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image
+
+from ustoziya_platform import background
+
+from .models import VideoLesson
+
+logger = logging.getLogger(__name__)
+
+# Shundan qora yoki oq kadrlar muqova uchun yaroqsiz (0-255)
+DARK_LEVEL = 16
+BRIGHT_LEVEL = 240
+
+
+def _positions():
+    return getattr(settings, 'VIDEO_POSTER_POSITIONS', (0.1, 0.25, 0.4, 0.6))
+
+
+def frame_score(frame):
+    """Kadr qanchalik ma'lumotli: yorqinlik dispersiyasi (qora/oq kadrlar - 0)"""
+    # Baho uchun har 4-piksel yetarli
+    sample = frame[::4, ::4]
+    gray = sample.mean(axis=2) if sample.ndim == 3 else sample
+    mean = gray.mean()
+    if mean < DARK_LEVEL or mean > BRIGHT_LEVEL:
+        return 0.0
+    return float(gray.std())
+
+
+def poster_frame(capture, cv2, duration):
+    """Bir nechta nuqtadan kadr o'qib, eng ma'lumotlisini tanlash"""
+    best, best_score = None, -1.0
+    for position in _positions():
+        if duration > 0:
+            # Eng yaqin kalit kadrdan dekodlanadi, boshidan emas
+            capture.set(cv2.CAP_PROP_POS_MSEC, position * duration * 1000)
+        elif best is not None:
+            # Davomiylik noma'lum - faqat birinchi kadr
+            break
+        ok, frame = capture.read()
+        if not ok or frame is None:
+            continue
+        score = frame_score(frame)
+        if score > best_score:
+            best, best_score = frame, score
+    return best
+
+
+def encode_poster(frame):
+    """OpenCV kadrini (BGR) JPEG ga o'tkazish"""
+    image = Image.fromarray(frame[:, :, ::-1].copy() if frame.ndim == 3 else frame)
+    max_size = getattr(settings, 'VIDEO_POSTER_MAX_SIZE', 1280)
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def probe(path):
+    """Video ma'lumotlari va muqova kadri: ({duration, width, height, bitrate}, kadr yoki None)"""
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError("Video faylini ochib bo'lmadi")
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+        duration = frames / fps if fps > 0 and frames > 0 else 0.0
+
+        bitrate = int(capture.get(cv2.CAP_PROP_BITRATE) or 0) if hasattr(cv2, 'CAP_PROP_BITRATE') else 0
+        if bitrate <= 0 and duration > 0:
+            bitrate = int(os.path.getsize(path) * 8 / duration / 1000)
+
+        metadata = {
+            'duration': round(duration),
+            'width': int(capture.get(cv2.CAP_PROP_FRAME_WIDTH) or 0),
+            'height': int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0),
+            'bitrate': max(bitrate, 0),
+        }
+        return metadata, poster_frame(capture, cv2, duration)
+    finally:
+        capture.release()
+
+
+def process(pk):
+    """Video ma'lumotlarini to'ldirish va (kerak bo'lsa) muqova qo'yish"""
+    video = VideoLesson.objects.filter(pk=pk).first()
+    if video is None or not video.video_file:
+        return False
+
+    name = video.video_file.name
+    metadata, frame = probe(video.video_file.path)
+    fields = []
+    for field, value in metadata.items():
+        if value:
+            setattr(video, field, value)
+            fields.append(field)
+    if frame is not None and not video.thumbnail:
+        stem = posixpath.splitext(posixpath.basename(name))[0]
+        video.thumbnail.save(f'{stem}.jpg', ContentFile(encode_poster(frame)), save=False)
+        fields.append('thumbnail')
+    if not fields:
+        return False
+
+    with transaction.atomic():
+        current = VideoLesson.objects.select_for_update().filter(pk=pk, video_file=name).values('thumbnail').first()
+        if current is None:
+            # Shu orada video almashtirilgan - natija eskirgan
+            return False
+        if 'thumbnail' in fields and current['thumbnail']:
+            # Foydalanuvchi shu orada o'z rasmini yuklagan - faqat ma'lumotlar yoziladi
+            fields.remove('thumbnail')
+            VideoLesson.objects.filter(pk=pk).update(**{field: getattr(video, field) for field in fields})
+        else:
+            video.save(update_fields=fields)
+    return True
+
+
+def _run_job(pk):
+    try:
+        process(pk)
+    except Exception:
+        logger.exception(f"Video ma'lumotlarini aniqlashda xatolik: video #{pk}")
+
+
+def schedule(pk):
+    """Tranzaksiya yakunlangach video ma'lumotlarini aniqlashni navbatga qo'yish"""
+    background.schedule(
+        'video_metadata', _run_job, pk,
+        workers=getattr(settings, 'VIDEO_PROBE_WORKERS', 2),
+        run_async=getattr(settings, 'VIDEO_PROBE_ASYNC', True)
+    )
+
+
+def _on_video_change(instance, name, old_name, created):
+    if name:
+        schedule(instance.pk)
+
+
+def connect():
+    """Video fayli o'zgarishini ma'lumotlarni aniqlashga ulash (MaterialsConfig.ready dan chaqiriladi)"""
+    background.on_file_change(VideoLesson, 'video_file', 'video_metadata', _on_video_change)
@@ -3,31 +3,49 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse, Http404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header
+import io
 import os
 
 from .models import (
     Material, MaterialCategory, MaterialRating, MaterialDownload,
-    Assignment, StudentSubmission, VideoLesson, Model3D
+    Assignment, StudentSubmission, VideoLesson, Model3D, ChunkedUpload
 )
 from .serializers import (
     MaterialCategorySerializer,
     MaterialSerializer,
     MaterialRatingSerializer,
     AssignmentSerializer,
+    AssignmentCompactSerializer,
     StudentSubmissionSerializer,
     VideoLessonSerializer,
-    Model3DSerializer
+    Model3DSerializer,
+    ChunkedUploadSerializer,
+    CATEGORY_CACHE_KEY
 )
+from . import author_stats, counters, download_rollups, grading, hls, recommendations, tags, uploads
+from .search import search_queryset
+from .storage import content_hash
+from ustoziya_platform import zipstream
+from ustoziya_platform.cache import CachedListMixin
+from ustoziya_platform.downloads import is_new_download, serve_file
+from ustoziya_platform.facets import Facet, facets_response
+from ustoziya_platform.pagination import paginate, sort_param
 
 
-class MaterialCategoryListView(generics.ListAPIView):
+class MaterialCategoryListView(CachedListMixin, generics.ListAPIView):
     """Material kategoriyalari ro'yxati"""
-    queryset = MaterialCategory.objects.all()
+    queryset = MaterialCategorySerializer.setup_eager_loading(MaterialCategory.objects.all())
     serializer_class = MaterialCategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    cache_key = CATEGORY_CACHE_KEY
 
 
 class MaterialListView(generics.ListCreateAPIView):
@@ -36,13 +54,16 @@ class MaterialListView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        queryset = Material.objects.filter(is_public=True)
+        queryset = MaterialSerializer.setup_eager_loading(
+            Material.objects.filter(is_public=True)
+        )
         
         # Filtrlash
         category = self.request.query_params.get('category')
         material_type = self.request.query_params.get('type')
         subject = self.request.query_params.get('subject')
         grade_level = self.request.query_params.get('grade')
+        tag = self.request.query_params.get('tag')
         search = self.request.query_params.get('search')
         
         if category:
@@ -53,12 +74,11 @@ class MaterialListView(generics.ListCreateAPIView):
             queryset = queryset.filter(author__subject=subject)
         if grade_level:
             queryset = queryset.filter(grade_level=grade_level)
+        if tag:
+            queryset = tags.filter_by_tag(queryset, tag)
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(tags__icontains=search)
-            )
+            # To'liq matnli indeks bo'yicha, dolzarblik tartibida
+            return search_queryset(queryset, search)
         
         return queryset.order_by('-created_at')
     
@@ -66,15 +86,48 @@ class MaterialListView(generics.ListCreateAPIView):
         serializer.save(author=self.request.user)
 
 
+MATERIAL_FACETS = [
+    Facet('category', 'category_id', 'category__name'),
+    Facet('type', 'material_type'),
+    Facet('subject', 'author__subject'),
+    Facet('grade', 'grade_level'),
+]
+
+
+def searched(queryset, query):
+    """Qidiruv sharti pastki so'rov sifatida (guruhlangan so'rovlar uchun, tartibsiz)"""
+    return queryset.filter(pk__in=search_queryset(queryset, query).order_by().values('pk'))
+
+
+def apply_common_filters(queryset, params):
+    """Facet bo'lmagan filtrlar: ``search`` va ``tag``"""
+    if params.get('tag'):
+        queryset = tags.filter_by_tag(queryset, params['tag'])
+    if params.get('search'):
+        queryset = searched(queryset, params['search'])
+    return queryset
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def material_facets(request):
+    """Materiallar filtrlari bo'yicha natijalar soni (joriy filtrlar hisobga olinadi)"""
+    return facets_response(
+        request, 'materials', MATERIAL_FACETS,
+        lambda params: apply_common_filters(Material.objects.filter(is_public=True), params),
+        extra_params=('search', 'tag')
+    )
+
+
 class MaterialDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Material tafsilotlari"""
     serializer_class = MaterialSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Material.objects.filter(
+        return MaterialSerializer.setup_eager_loading(Material.objects.filter(
             Q(is_public=True) | Q(author=self.request.user)
-        )
+        ))
 
 
 class MaterialCreateView(generics.CreateAPIView):
@@ -92,7 +145,9 @@ class MaterialUpdateView(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Material.objects.filter(author=self.request.user)
+        return MaterialSerializer.setup_eager_loading(
+            Material.objects.filter(author=self.request.user)
+        )
 
 
 class MaterialDeleteView(generics.DestroyAPIView):
@@ -116,27 +171,31 @@ def download_material(request, pk):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        # Yuklab olish statistikasini yangilash
-        material.download_count += 1
-        material.save()
-        
-        # Yuklab olish tarixini saqlash
-        MaterialDownload.objects.create(
-            material=material,
-            user=request.user,
-            ip_address=request.META.get('REMOTE_ADDR')
-        )
-        
-        # Faylni yuklab olish
-        if os.path.exists(material.file.path):
-            with open(material.file.path, 'rb') as f:
-                response = HttpResponse(f.read(), content_type='application/octet-stream')
-                response['Content-Disposition'] = f'attachment; filename="{material.title}.{material.file.name.split(".")[-1]}"'
-                return response
-        else:
+        if not os.path.exists(material.file.path):
             return Response({
                 'error': 'Fayl topilmadi'
             }, status=status.HTTP_404_NOT_FOUND)
+        
+        # Faylni bo'laklab uzatish
+        response = serve_file(
+            request,
+            material.file.path,
+            f'{material.title}.{material.file.name.split(".")[-1]}',
+            content_type='application/octet-stream'
+        )
+        
+        # 304, 416 va to'xtatilgan yuklab olishning davomi hisoblanmaydi
+        if is_new_download(request, response):
+            # Yuklab olish statistikasini yangilash (buferlab)
+            counters.increment(material, 'download_count')
+            
+            # Yuklab olish tarixini saqlash
+            counters.record_event(MaterialDownload(
+                material=material,
+                user=request.user,
+                ip_address=request.META.get('REMOTE_ADDR')
+            ))
+        return response
             
     except Exception as e:
         return Response({
@@ -158,23 +217,19 @@ def rate_material(request, pk):
             'error': 'Reyting 1 dan 5 gacha bo\'lishi kerak'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Mavjud reytingni yangilash yoki yangi yaratish
-    rating, created = MaterialRating.objects.get_or_create(
-        material=material,
-        user=request.user,
-        defaults={'rating': rating_value, 'comment': comment}
-    )
-    
-    if not created:
-        rating.rating = rating_value
-        rating.comment = comment
-        rating.save()
-    
-    # Material reytingini yangilash
-    ratings = MaterialRating.objects.filter(material=material)
-    avg_rating = sum(r.rating for r in ratings) / ratings.count()
-    material.rating = avg_rating
-    material.save()
+    # Mavjud reytingni yangilash yoki yangi yaratish.
+    # Material reytingi (rating_sum/rating_count) signal orqali atomar yangilanadi.
+    with transaction.atomic():
+        rating, created = MaterialRating.objects.get_or_create(
+            material=material,
+            user=request.user,
+            defaults={'rating': rating_value, 'comment': comment}
+        )
+        
+        if not created:
+            rating.rating = rating_value
+            rating.comment = comment
+            rating.save()
     
     return Response({
         'message': 'Reyting muvaffaqiyatli saqlandi',
@@ -182,6 +237,21 @@ def rate_material(request, pk):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def related_materials(request, pk):
+    """Birga yuklab olishlar bo'yicha o'xshash materiallar"""
+    material = get_object_or_404(
+        Material.objects.filter(Q(is_public=True) | Q(author=request.user)).only('pk'), pk=pk
+    )
+    queryset = MaterialSerializer.setup_eager_loading(recommendations.related_queryset(material))
+    return Response(MaterialSerializer(queryset, many=True).data)
+
+
+# Qidiruvda ruxsat etilgan tartiblar - har biri uchun qisman indeks bor (Material.Meta.indexes)
+MATERIAL_SORTS = ('-created_at', 'created_at', '-download_count', '-rating', 'title')
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def search_materials(request):
@@ -191,15 +261,11 @@ def search_materials(request):
     material_type = request.query_params.get('type')
     subject = request.query_params.get('subject')
     grade_level = request.query_params.get('grade')
+    tag = request.query_params.get('tag')
     
-    queryset = Material.objects.filter(is_public=True)
-    
-    if query:
-        queryset = queryset.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(tags__icontains=query)
-        )
+    queryset = MaterialSerializer.setup_eager_loading(
+        Material.objects.filter(is_public=True)
+    )
     
     if category:
         queryset = queryset.filter(category_id=category)
@@ -209,56 +275,133 @@ def search_materials(request):
         queryset = queryset.filter(author__subject=subject)
     if grade_level:
         queryset = queryset.filter(grade_level=grade_level)
+    if tag:
+        queryset = tags.filter_by_tag(queryset, tag)
+    
+    if query:
+        queryset = search_queryset(queryset, query)
     
-    # Natijalarni tartiblash
-    sort_by = request.query_params.get('sort', '-created_at')
-    queryset = queryset.order_by(sort_by)
+    # Natijalarni tartiblash (qidiruvda standart tartib - dolzarblik)
+    sort_by = sort_param(request, MATERIAL_SORTS, None if query else '-created_at')
+    if sort_by:
+        queryset = queryset.order_by(sort_by)
     
-    serializer = MaterialSerializer(queryset, many=True)
-    return Response(serializer.data)
+    return paginate(request, queryset, MaterialSerializer)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_materials(request):
     """Foydalanuvchining materiallari"""
-    materials = Material.objects.filter(author=request.user).order_by('-created_at')
-    serializer = MaterialSerializer(materials, many=True)
-    return Response(serializer.data)
+    materials = MaterialSerializer.setup_eager_loading(
+        Material.objects.filter(author=request.user)
+    ).order_by('-created_at')
+    return paginate(request, materials, MaterialSerializer)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def material_stats(request):
     """Material statistikasi"""
-    user = request.user
-    
-    total_materials = Material.objects.filter(author=user).count()
-    total_downloads = sum(m.download_count for m in Material.objects.filter(author=user))
-    avg_rating = Material.objects.filter(author=user).aggregate(
-        avg_rating=models.Avg('rating')
-    )['avg_rating'] or 0
+    stats = author_stats.get_stats(request.user)
     
-    # Eng ko'p yuklab olingan materiallar
-    popular_materials = Material.objects.filter(author=user).order_by('-download_count')[:5]
+    # Eng ko'p yuklab olingan materiallar (statistikada saqlangan tartibda)
+    popular_materials = []
+    if stats.top_material_ids:
+        by_id = MaterialSerializer.setup_eager_loading(Material.objects.all()).in_bulk(stats.top_material_ids)
+        popular_materials = [by_id[pk] for pk in stats.top_material_ids if pk in by_id]
     
     return Response({
-        'total_materials': total_materials,
-        'total_downloads': total_downloads,
-        'avg_rating': round(avg_rating, 2),
+        'total_materials': stats.total_materials,
+        'total_downloads': stats.total_downloads,
+        'avg_rating': round(stats.avg_rating, 2),
         'popular_materials': MaterialSerializer(popular_materials, many=True).data
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_stats(request):
+    """Muallif yuklab olishlari vaqt bo'yicha (faqat jamlangan statistikadan)
+
+    ``?period=hour|day`` (standart - day), ``?count=`` - oraliqlar soni,
+    ``?material=<id>`` - muallifning bitta materiali bo'yicha.
+    """
+    period = request.query_params.get('period', 'day')
+    if period not in download_rollups.PERIODS:
+        return Response({
+            'error': 'period faqat hour yoki day bo\'lishi mumkin'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_count = getattr(settings, 'DOWNLOAD_STATS_MAX_BUCKETS', 366)
+    try:
+        count = int(request.query_params.get('count', 24 if period == 'hour' else 30))
+    except ValueError:
+        count = 0
+    if not 1 <= count <= max_count:
+        return Response({
+            'error': f'count 1 dan {max_count} gacha bo\'lishi kerak'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    scope, object_id = 'author', request.user.pk
+    material_id = request.query_params.get('material')
+    if material_id:
+        # Faqat ASCII raqamlar ('²' isdigit() dan o'tadi) va bigint chegarasida
+        if not (material_id.isascii() and material_id.isdigit()) or len(material_id) > 18:
+            return Response({
+                'error': 'material ID noto\'g\'ri'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        material = get_object_or_404(Material.objects.only('pk'), pk=material_id, author=request.user)
+        scope, object_id = 'material', material.pk
+    
+    series = download_rollups.series(scope, object_id, period, count)
+    return Response({
+        'scope': scope,
+        'object_id': object_id,
+        'period': period,
+        'total_downloads': sum(point['downloads'] for point in series),
+        'series': series
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def tag_list(request):
+    """Eng ko'p ishlatilgan teglar va ular bilan belgilangan ochiq obyektlar soni"""
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        limit = 20
+    return Response(tags.top_tags(limit))
+
+
 # ============ ASSIGNMENT VIEWS ============
 
+def submission_queryset():
+    """O'quvchi topshiriqlari - ilova fayllar bilan birga oldindan yuklangan"""
+    return StudentSubmission.objects.select_related('assignment', 'graded_by').prefetch_related(
+        Prefetch('attached_files', queryset=MaterialSerializer.setup_eager_loading(Material.objects.all()))
+    )
+
+
 class AssignmentListView(generics.ListCreateAPIView):
     """Topshiriqlar ro'yxati va yaratish"""
     serializer_class = AssignmentSerializer
     permission_classes = [IsAuthenticated]
     
+    def is_compact(self):
+        """``?compact=1`` - materiallar faqat id va sarlavha bilan qaytariladi"""
+        return self.request.method == 'GET' and self.request.query_params.get('compact') in ('1', 'true')
+    
+    def get_serializer_class(self):
+        if self.is_compact():
+            return AssignmentCompactSerializer
+        return AssignmentSerializer
+    
     def get_queryset(self):
-        queryset = Assignment.objects.filter(is_active=True)
+        queryset = AssignmentSerializer.setup_eager_loading(
+            Assignment.objects.filter(is_active=True), compact=self.is_compact()
+        )
         
         # Filtrlash
         category = self.request.query_params.get('category')
@@ -290,9 +433,73 @@ class AssignmentDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Assignment.objects.filter(
+        return AssignmentSerializer.setup_eager_loading(Assignment.objects.filter(
             Q(is_active=True) | Q(teacher=self.request.user)
+        ))
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([IsAuthenticated])
+def assignment_bundle(request, pk):
+    """Topshiriq materiallarini bitta ZIP arxivda yuklab olish (arxiv uzatish davomida yaratiladi)"""
+    assignment = get_object_or_404(
+        Assignment.objects.filter(Q(is_active=True) | Q(teacher=request.user)), pk=pk
+    )
+    materials = assignment.materials.filter(
+        Q(is_public=True) | Q(author=request.user)
+    ).only('pk', 'title', 'file', 'updated_at').order_by('pk')
+
+    members, etag_parts, used_names = [], [], set()
+    for material in materials:
+        # Uzatish boshlangach xatoni bildirib bo'lmaydi - fayllar oldindan tekshiriladi
+        try:
+            path = material.file.path
+            stat = os.stat(path)
+        except (ValueError, OSError):
+            continue
+        arcname = zipstream.safe_name(material.title, os.path.splitext(material.file.name)[1].lower(), used_names)
+        date_time = timezone.localtime(material.updated_at).timetuple()[:6]
+        members.append((material, zipstream.ZipMember(path, arcname, date_time)))
+        etag_parts.append((
+            arcname, content_hash(material.file.name) or (stat.st_size, stat.st_mtime_ns), date_time
+        ))
+    if not members:
+        return Response({
+            'error': 'Topshiriqda yuklab olinadigan material yo\'q'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    etag = zipstream.archive_etag(etag_parts)
+    conditional = get_conditional_response(request, etag=etag)
+    if conditional is not None:
+        conditional['ETag'] = etag
+        return conditional
+
+    def stream():
+        yield from zipstream.stream_zip(
+            [member for _, member in members], getattr(settings, 'DOWNLOAD_CHUNK_SIZE', 64 * 1024)
         )
+        # Oxirgi bayt uzatilgach hisoblanadi - uzilgan yuklab olish (generator
+        # close() bilan to'xtatiladi) bu yerga yetib kelmaydi
+        for material, _ in members:
+            counters.increment(material, 'download_count')
+            counters.record_event(MaterialDownload(
+                material=material,
+                user=request.user,
+                ip_address=request.META.get('REMOTE_ADDR')
+            ))
+
+    if request.method == 'HEAD':
+        # Faqat sarlavhalar - arxiv yaratilmaydi va yuklab olish hisoblanmaydi
+        response = HttpResponse(content_type='application/zip')
+    else:
+        response = StreamingHttpResponse(stream(), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(
+        True, zipstream.safe_name(assignment.title, '.zip', set())
+    )
+    response['ETag'] = etag
+    # Har safar ETag bo'yicha tekshiriladi - o'zgarmagan arxiv qayta yuklanmaydi
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 class StudentSubmissionListView(generics.ListCreateAPIView):
@@ -303,7 +510,7 @@ class StudentSubmissionListView(generics.ListCreateAPIView):
     def get_queryset(self):
         assignment_id = self.request.query_params.get('assignment')
         if assignment_id:
-            return StudentSubmission.objects.filter(assignment_id=assignment_id)
+            return submission_queryset().filter(assignment_id=assignment_id)
         return StudentSubmission.objects.none()
     
     def perform_create(self, serializer):
@@ -316,7 +523,7 @@ class StudentSubmissionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return StudentSubmission.objects.all()
+        return submission_queryset()
 
 
 @api_view(['POST'])
@@ -346,6 +553,88 @@ def grade_submission(request, pk):
     })
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def grade_submissions_bulk(request):
+    """Bir nechta ishni bitta so'rov bilan baholash: [{"id", "grade", "feedback"}, ...]"""
+    items = request.data
+    if not isinstance(items, list) or not items:
+        return Response({
+            'error': 'Baholar ro\'yxati yuborilishi kerak'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_items = getattr(settings, 'GRADE_BATCH_MAX_ITEMS', 1000)
+    if len(items) > max_items:
+        return Response({
+            'error': f'Bir so\'rovda {max_items} tadan ko\'p ish baholanmaydi'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = grading.grade_submissions(request.user, items)
+    graded = sum(1 for result in results if 'error' not in result)
+    return Response({
+        'graded': graded,
+        'failed': len(results) - graded,
+        'results': results
+    })
+
+
+# ============ CHUNKED UPLOAD VIEWS ============
+
+def upload_status_response(upload, status_code=status.HTTP_200_OK, data=None):
+    """Yuklash holati (JSON va tus uslubidagi sarlavhalar bilan)"""
+    response = Response(data or ChunkedUploadSerializer(upload).data, status=status_code)
+    response['Upload-Offset'] = str(upload.offset)
+    response['Upload-Length'] = str(upload.size)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def chunked_upload_create(request):
+    """Bo'laklab yuklashni boshlash"""
+    serializer = ChunkedUploadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        upload = uploads.create_upload(
+            request.user,
+            serializer.validated_data['filename'],
+            serializer.validated_data['size']
+        )
+    except uploads.UploadError as e:
+        return Response({'error': str(e)}, status=e.status_code)
+    
+    response = upload_status_response(upload, status.HTTP_201_CREATED)
+    response['Location'] = request.build_absolute_uri(f'{request.path.rstrip("/")}/{upload.pk}/')
+    return response
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def chunked_upload_detail(request, pk):
+    """Yuklash holati (GET/HEAD), navbatdagi bo'lak (PATCH) yoki bekor qilish (DELETE)"""
+    upload = get_object_or_404(ChunkedUpload, pk=pk, user=request.user)
+    
+    if request.method == 'DELETE':
+        uploads.discard(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = request.headers.get('Content-Length')
+            length = int(length) if length else None
+        except ValueError:
+            return Response({'error': 'Upload-Offset noto\'g\'ri'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            uploads.append_chunk(upload, offset, request.stream or io.BytesIO(), length)
+        except uploads.UploadError as e:
+            upload.refresh_from_db()
+            return upload_status_response(upload, e.status_code, {'error': str(e), 'offset': upload.offset})
+    
+    return upload_status_response(upload)
+
+
 # ============ VIDEO LESSON VIEWS ============
 
 class VideoLessonListView(generics.ListCreateAPIView):
@@ -360,6 +649,7 @@ class VideoLessonListView(generics.ListCreateAPIView):
         category = self.request.query_params.get('category')
         subject = self.request.query_params.get('subject')
         grade_level = self.request.query_params.get('grade')
+        tag = self.request.query_params.get('tag')
         search = self.request.query_params.get('search')
         
         if category:
@@ -368,12 +658,10 @@ class VideoLessonListView(generics.ListCreateAPIView):
             queryset = queryset.filter(subject=subject)
         if grade_level:
             queryset = queryset.filter(grade_level=grade_level)
+        if tag:
+            queryset = tags.filter_by_tag(queryset, tag)
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(tags__icontains=search)
-            )
+            return search_queryset(queryset, search)
         
         return queryset.order_by('-created_at')
     
@@ -381,6 +669,24 @@ class VideoLessonListView(generics.ListCreateAPIView):
         serializer.save(author=self.request.user)
 
 
+VIDEO_FACETS = [
+    Facet('category', 'category_id', 'category__name'),
+    Facet('subject', 'subject'),
+    Facet('grade', 'grade_level'),
+]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def video_facets(request):
+    """Video darsliklar filtrlari bo'yicha natijalar soni"""
+    return facets_response(
+        request, 'videos', VIDEO_FACETS,
+        lambda params: apply_common_filters(VideoLesson.objects.filter(is_public=True), params),
+        extra_params=('search', 'tag')
+    )
+
+
 class VideoLessonDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Video darslik tafsilotlari"""
     serializer_class = VideoLessonSerializer
@@ -403,15 +709,45 @@ def watch_video(request, pk):
             'error': 'Bu videoni ko\'rish huquqingiz yo\'q'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    video.view_count += 1
-    video.save()
+    counters.increment(video, 'view_count')
     
     return Response({
         'message': 'Video ko\'rish statistikasi yangilandi',
-        'view_count': video.view_count
+        'view_count': counters.current_count(video, 'view_count')
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def video_hls_file(request, key, name):
+    """HLS playlist yoki segmenti (tayyor paket o'zgarmaydi - uzoq muddat keshlanadi)"""
+    if not hls.KEY_RE.match(key) or not hls.FILE_NAME_RE.match(name):
+        return Response({'error': 'Fayl topilmadi'}, status=status.HTTP_404_NOT_FOUND)
+    
+    # Paket bir nechta videoga tegishli bo'lishi mumkin - ulardan biri
+    # foydalanuvchiga ko'rinsa bo'ldi (VideoLessonDetailView bilan bir xil qoida)
+    visible = VideoLesson.objects.filter(
+        Q(is_public=True) | Q(author=request.user), hls_playlist=hls.playlist_name(key)
+    )
+    if not visible.exists():
+        return Response({'error': 'Fayl topilmadi'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        response = serve_file(
+            request,
+            os.path.join(hls.package_path(key), *name.split('/')),
+            os.path.basename(name),
+            content_type=hls.CONTENT_TYPES[os.path.splitext(name)[1]]
+        )
+    except FileNotFoundError:
+        return Response({'error': 'Fayl topilmadi'}, status=status.HTTP_404_NOT_FOUND)
+    
+    # Pleyer so'raydi, yuklab olinmaydi
+    del response['Content-Disposition']
+    response['Cache-Control'] = f'private, max-age={getattr(settings, "HLS_CACHE_SECONDS", 365 * 24 * 3600)}, immutable'
+    return response
+
+
 # ============ 3D MODEL VIEWS ============
 
 class Model3DListView(generics.ListCreateAPIView):
@@ -441,10 +777,7 @@ class Model3DListView(generics.ListCreateAPIView):
         if is_interactive:
             queryset = queryset.filter(is_interactive=True)
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search)
-            )
+            return search_queryset(queryset, search)
         
         return queryset.order_by('-created_at')
     
@@ -452,6 +785,33 @@ class Model3DListView(generics.ListCreateAPIView):
         serializer.save(author=self.request.user)
 
 
+MODEL3D_FACETS = [
+    Facet('category', 'category_id', 'category__name'),
+    Facet('type', 'model_type'),
+    Facet('subject', 'subject'),
+    Facet('grade', 'grade_level'),
+]
+
+
+def _model3d_facet_queryset(params):
+    queryset = Model3D.objects.filter(is_public=True)
+    if params.get('interactive'):
+        queryset = queryset.filter(is_interactive=True)
+    if params.get('search'):
+        queryset = searched(queryset, params['search'])
+    return queryset
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def model3d_facets(request):
+    """3D modellar filtrlari bo'yicha natijalar soni"""
+    return facets_response(
+        request, '3d_models', MODEL3D_FACETS, _model3d_facet_queryset,
+        extra_params=('search', 'interactive')
+    )
+
+
 class Model3DDetailView(generics.RetrieveUpdateDestroyAPIView):
     """3D model tafsilotlari"""
     serializer_class = Model3DSerializer
@@ -475,20 +835,24 @@ def download_3d_model(request, pk):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        # Yuklab olish statistikasini yangilash
-        model.download_count += 1
-        model.save()
-        
-        # Faylni yuklab olish
-        if os.path.exists(model.model_file.path):
-            with open(model.model_file.path, 'rb') as f:
-                response = HttpResponse(f.read(), content_type='application/octet-stream')
-                response['Content-Disposition'] = f'attachment; filename="{model.title}.{model.model_file.name.split(".")[-1]}"'
-                return response
-        else:
+        if not os.path.exists(model.model_file.path):
             return Response({
                 'error': 'Fayl topilmadi'
             }, status=status.HTTP_404_NOT_FOUND)
+        
+        # Faylni bo'laklab uzatish
+        response = serve_file(
+            request,
+            model.model_file.path,
+            f'{model.title}.{model.model_file.name.split(".")[-1]}',
+            content_type='application/octet-stream'
+        )
+        
+        # 304, 416 va to'xtatilgan yuklab olishning davomi hisoblanmaydi
+        if is_new_download(request, response):
+            # Yuklab olish statistikasini yangilash (buferlab)
+            counters.increment(model, 'download_count')
+        return response
             
     except Exception as e:
         return Response({
@@ -1,3 +1,38 @@
 from django.contrib import admin
 
+from ustoziya_platform.admin import ScalableModelAdmin
+
+from .models import OCRProcessing, TestResult, ExcelExport
+
+
 # Register your models here.
+@admin.register(OCRProcessing)
+class OCRProcessingAdmin(ScalableModelAdmin):
+    list_display = ['user', 'test', 'status', 'confidence_score', 'processing_time', 'created_at', 'completed_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['user__username', 'test__title']
+    autocomplete_fields = ['user', 'test']
+    readonly_fields = ['processed_text', 'confidence_score', 'processing_time', 'created_at', 'completed_at']
+    ordering = ['-pk']
+
+
+@admin.register(TestResult)
+class TestResultAdmin(ScalableModelAdmin):
+    list_display = ['student_name', 'student_class', 'ocr_processing', 'score', 'percentage', 'grade', 'processed_at']
+    list_filter = ['processed_at']
+    search_fields = ['student_name', 'student_class']
+    # OCR yozuvi nomida foydalanuvchi ismi bor
+    list_select_related = ['ocr_processing__user']
+    raw_id_fields = ['ocr_processing']
+    readonly_fields = ['processed_at']
+    ordering = ['-pk']
+
+
+@admin.register(ExcelExport)
+class ExcelExportAdmin(ScalableModelAdmin):
+    list_display = ['test', 'user', 'total_students', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['test__title', 'user__username']
+    autocomplete_fields = ['user', 'test']
+    readonly_fields = ['created_at']
+    ordering = ['-pk']
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_processing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='excelexport',
+            index=models.Index(fields=['user', '-created_at'], name='excel_export_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocrprocessing',
+            index=models.Index(fields=['user', '-created_at'], name='ocr_user_recent_idx'),
+        ),
+    ]
@@ -70,6 +70,9 @@ class OCRProcessing(models.Model):
         verbose_name = 'OCR qayta ishlash'
         verbose_name_plural = 'OCR qayta ishlashlar'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='ocr_user_recent_idx'),
+        ]
     
     def __str__(self):
         return f"OCR - {self.user.get_full_name()} ({self.status})"
@@ -166,6 +169,9 @@ class ExcelExport(models.Model):
         verbose_name = 'Excel eksport'
         verbose_name_plural = 'Excel eksportlar'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='excel_export_user_recent_idx'),
+        ]
     
     def __str__(self):
         return f"Excel - {self.test.title} ({self.total_students} o'quvchi)"
\ No newline at end of file
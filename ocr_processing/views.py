@@ -3,7 +3,6 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
 from django.conf import settings
 import os
 import logging
@@ -11,6 +10,8 @@ import logging
 from .models import OCRProcessing, TestResult, ExcelExport
 from .services import OCRService
 from tests.models import Test
+from ustoziya_platform.downloads import serve_file
+from ustoziya_platform.pagination import paginate
 from .serializers import (
     OCRProcessingSerializer,
     TestResultSerializer,
@@ -95,8 +96,7 @@ def upload_test_image(request):
 def ocr_processing_list(request):
     """OCR qayta ishlashlar ro'yxati"""
     processings = OCRProcessing.objects.filter(user=request.user).order_by('-created_at')
-    serializer = OCRProcessingSerializer(processings, many=True)
-    return Response(serializer.data)
+    return paginate(request, processings, OCRProcessingSerializer)
 
 
 @api_view(['GET'])
@@ -114,8 +114,7 @@ def test_results_list(request, test_id):
     """Test natijalari ro'yxati"""
     test = get_object_or_404(Test, pk=test_id, author=request.user)
     results = TestResult.objects.filter(ocr_processing__test=test).order_by('-processed_at')
-    serializer = TestResultSerializer(results, many=True)
-    return Response(serializer.data)
+    return paginate(request, results, TestResultSerializer)
 
 
 @api_view(['POST'])
@@ -174,10 +173,12 @@ def download_excel(request, export_id):
                 'error': 'Fayl topilmadi'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        with open(excel_export.file.path, 'rb') as f:
-            response = HttpResponse(f.read(), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            response['Content-Disposition'] = f'attachment; filename="test_results_{excel_export.test.id}.xlsx"'
-            return response
+        return serve_file(
+            request,
+            excel_export.file.path,
+            f'test_results_{excel_export.test_id}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
             
     except Exception as e:
         logger.error(f"Excel yuklab olishda xatolik: {e}")
@@ -191,8 +192,7 @@ def download_excel(request, export_id):
 def excel_exports_list(request):
     """Excel eksportlar ro'yxati"""
     exports = ExcelExport.objects.filter(user=request.user).order_by('-created_at')
-    serializer = ExcelExportSerializer(exports, many=True)
-    return Response(serializer.data)
+    return paginate(request, exports, ExcelExportSerializer)
 
 
 class OCRProcessingListView(generics.ListAPIView):
@@ -1,4 +1,7 @@
 from django.contrib import admin
+
+from ustoziya_platform.admin import ScalableModelAdmin
+
 from .models import TestCategory, Test, Question, Answer, TestAttempt, StudentAnswer
 
 # Register your models here.
@@ -9,37 +12,46 @@ class TestCategoryAdmin(admin.ModelAdmin):
     ordering = ['name']
 
 @admin.register(Test)
-class TestAdmin(admin.ModelAdmin):
+class TestAdmin(ScalableModelAdmin):
     list_display = ['title', 'category', 'author', 'subject', 'difficulty', 'is_public', 'is_active', 'created_at']
-    list_filter = ['category', 'subject', 'difficulty', 'is_public', 'is_active', 'created_at']
+    list_filter = ['category', 'difficulty', 'is_public', 'is_active', 'created_at']
     search_fields = ['title', 'description']
-    ordering = ['-created_at']
+    autocomplete_fields = ['category', 'author']
+    ordering = ['-pk']
     readonly_fields = ['created_at', 'updated_at']
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(ScalableModelAdmin):
     list_display = ['question_text', 'test', 'question_type', 'points', 'order']
     list_filter = ['question_type', 'test__category']
     search_fields = ['question_text']
+    autocomplete_fields = ['test']
     ordering = ['test', 'order']
 
 @admin.register(Answer)
-class AnswerAdmin(admin.ModelAdmin):
+class AnswerAdmin(ScalableModelAdmin):
     list_display = ['answer_text', 'question', 'is_correct', 'order']
     list_filter = ['is_correct', 'question__test__category']
     search_fields = ['answer_text']
+    # Savol nomida test nomi ham bor
+    list_select_related = ['question__test']
+    autocomplete_fields = ['question']
     ordering = ['question', 'order']
 
 @admin.register(TestAttempt)
-class TestAttemptAdmin(admin.ModelAdmin):
+class TestAttemptAdmin(ScalableModelAdmin):
     list_display = ['test', 'student_name', 'student_class', 'score', 'percentage', 'is_completed', 'started_at']
     list_filter = ['is_completed', 'test__category', 'started_at']
     search_fields = ['student_name', 'student_class']
-    ordering = ['-started_at']
+    autocomplete_fields = ['test']
+    ordering = ['-pk']
     readonly_fields = ['started_at', 'completed_at']
 
 @admin.register(StudentAnswer)
-class StudentAnswerAdmin(admin.ModelAdmin):
+class StudentAnswerAdmin(ScalableModelAdmin):
     list_display = ['attempt', 'question', 'is_correct', 'points_earned']
     list_filter = ['is_correct', 'attempt__test__category']
-    ordering = ['attempt', 'question']
+    list_select_related = ['attempt__test', 'question__test']
+    # Urinishlar va javob variantlari soni millionlab - ro'yxat o'rniga id maydoni
+    raw_id_fields = ['attempt', 'question', 'selected_answers']
+    ordering = ['-pk']
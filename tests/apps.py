@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class TestsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tests'
+
+    def ready(self):
+        from ustoziya_platform.cache import invalidate_on_change
+
+        from .models import Test, TestCategory
+        from .serializers import CATEGORY_CACHE_KEY
+
+        invalidate_on_change(TestCategory, CATEGORY_CACHE_KEY, fields=['name', 'description'])
+        invalidate_on_change(Test, CATEGORY_CACHE_KEY, fields=['is_public', 'is_active', 'category'])
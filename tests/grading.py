@@ -0,0 +1,119 @@
+"""Topshirilgan test javoblarini baholash.
+
+Har bir javob uchun savol va variantlarni alohida so'rab, javoblarni bittalab
+yozish 40 savolli testda ~250 so'rovga teng edi. ``submit_attempt`` testning
+javoblar kalitini bitta so'rov bilan o'qiydi, javoblarni xotirada baholaydi
+va bitta tranzaksiyada yozadi: urinish natijasi (bitta ``UPDATE``),
+o'quvchi javoblari va tanlangan variantlar (M2M oraliq jadvali) -
+``bulk_create`` bilan. So'rovlar soni savollar soniga bog'liq emas.
+
+Baholash qoidalari o'zgarmagan: tanlov savolida barcha to'g'ri variantlar
+belgilangan bo'lsa javob to'g'ri, boshqa turdagi savollar to'g'ri deb
+hisoblanadi. Testga tegishli bo'lmagan savollar, savolga tegishli bo'lmagan
+variantlar va takrorlangan savollar e'tiborsiz qoldiriladi.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Question, StudentAnswer, TestAttempt
+
+CHOICE_TYPES = ('single_choice', 'multiple_choice')
+
+# Savol kaliti: turi, balli, barcha va to'g'ri variantlar id lari
+KeyEntry = namedtuple('KeyEntry', 'question_type points options correct')
+
+# Butun son ustunlari chegarasi (bigint)
+MAX_ID = 2 ** 63 - 1
+
+
+class AttemptAlreadySubmitted(Exception):
+    """Urinish avval topshirilgan (qayta yuborish yoki ikki marta bosish)"""
+
+
+def _id(value):
+    """So'rovdagi id (butun son yoki o'nlik raqamli matn), aks holda None"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    if isinstance(value, str):
+        # isdigit() '²' kabi belgilarni ham qabul qiladi, int() esa ularni o'qiy olmaydi
+        if not value.isdecimal():
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            return None
+    return value if 0 < value <= MAX_ID else None
+
+
+def answer_key(test_id):
+    """Testning javoblar kaliti {savol_id: KeyEntry} - bitta so'rov"""
+    rows = Question.objects.filter(test_id=test_id).order_by().values_list(
+        'pk', 'question_type', 'points', 'answers__pk', 'answers__is_correct'
+    )
+    key = {}
+    for pk, question_type, points, answer_id, is_correct in rows:
+        entry = key.get(pk)
+        if entry is None:
+            entry = key[pk] = KeyEntry(question_type, points, set(), set())
+        if answer_id is not None:
+            entry.options.add(answer_id)
+            if is_correct:
+                entry.correct.add(answer_id)
+    return key
+
+
+def submit_attempt(test, attempt, student_answers):
+    """Javoblarni baholab saqlash va urinishni yakunlash -> natijalar"""
+    key = answer_key(test.pk)
+    answers, selections, seen = [], [], set()
+    score = correct_answers = wrong_answers = 0
+    for data in student_answers:
+        if not isinstance(data, dict):
+            continue
+        question_id = _id(data.get('question_id'))
+        entry = key.get(question_id)
+        if entry is None or question_id in seen:
+            continue
+        seen.add(question_id)
+        selected = data.get('selected_answers') or []
+        selected = {answer_id for answer_id in map(_id, selected if isinstance(selected, list) else [])
+                    if answer_id in entry.options}
+        is_correct = entry.question_type not in CHOICE_TYPES or entry.correct <= selected
+        points = entry.points if is_correct else 0
+        answers.append(StudentAnswer(
+            attempt=attempt, question_id=question_id, text_answer=data.get('text_answer', ''),
+            is_correct=is_correct, points_earned=points
+        ))
+        selections.append(sorted(selected))
+        score += points
+        if is_correct:
+            correct_answers += 1
+        else:
+            wrong_answers += 1
+
+    attempt.completed_at = timezone.now()
+    attempt.is_completed = True
+    attempt.score = score
+    attempt.percentage = (score / test.total_points * 100) if test.total_points > 0 else 0
+
+    through = StudentAnswer.selected_answers.through
+    with transaction.atomic():
+        # Shartli UPDATE - bir vaqtda kelgan ikkinchi yuborish javoblarni takror yozmaydi
+        claimed = TestAttempt.objects.filter(pk=attempt.pk, is_completed=False).update(
+            completed_at=attempt.completed_at, is_completed=True, score=score, percentage=attempt.percentage
+        )
+        if not claimed:
+            raise AttemptAlreadySubmitted
+        StudentAnswer.objects.bulk_create(answers)
+        through.objects.bulk_create([
+            through(studentanswer_id=answer.pk, answer_id=answer_id)
+            for answer, selected in zip(answers, selections) for answer_id in selected
+        ])
+    return {
+        'score': score,
+        'percentage': attempt.percentage,
+        'correct_answers': correct_answers,
+        'wrong_answers': wrong_answers,
+    }
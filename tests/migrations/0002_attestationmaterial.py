@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttestationMaterial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('source_type', models.CharField(choices=[('image', 'Rasm'), ('docx', 'DOCX hujjat'), ('pdf', 'PDF hujjat'), ('txt', 'Matn fayl')], max_length=10)),
+                ('file', models.FileField(upload_to='attestation/')),
+                ('extracted_text', models.TextField(blank=True, null=True)),
+                ('subject', models.CharField(blank=True, max_length=50, null=True)),
+                ('grade_level', models.CharField(blank=True, max_length=50, null=True)),
+                ('difficulty', models.CharField(choices=[('easy', 'Oson'), ('medium', "O'rta"), ('hard', 'Qiyin')], default='medium', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attestation_materials', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Attestatsiya manbasi',
+                'verbose_name_plural': 'Attestatsiya manbalari',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0002_attestationmaterial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['author', '-created_at'], name='test_author_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_public', True)), fields=['-created_at', '-id'], name='test_public_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_public', True)), fields=['category', '-created_at', '-id'], name='test_public_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_public', True)), fields=['subject', 'grade_level', 'difficulty', '-created_at'], name='test_public_subject_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_public', True)), fields=['title', 'id'], name='test_public_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testattempt',
+            index=models.Index(fields=['test', 'is_completed'], name='attempt_test_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testattempt',
+            index=models.Index(fields=['test', '-started_at'], name='attempt_test_recent_idx'),
+        ),
+    ]
@@ -5,6 +5,9 @@ from django.conf import settings
 
 User = get_user_model()
 
+# Katalogda ko'rinadigan testlar (qisman indekslar sharti)
+PUBLIC_TESTS = models.Q(is_public=True, is_active=True)
+
 
 class TestCategory(models.Model):
     """Test kategoriyalari"""
@@ -91,6 +94,18 @@ class Test(models.Model):
         verbose_name = 'Test'
         verbose_name_plural = 'Testlar'
         ordering = ['-created_at']
+        indexes = [
+            # Foydalanuvchining testlari (my-tests)
+            models.Index(fields=['author', '-created_at'], name='test_author_recent_idx'),
+            # Umumiy katalog: filtrlar va ruxsat etilgan tartiblar (qarang: views.TEST_SORTS)
+            models.Index(fields=['-created_at', '-id'], condition=PUBLIC_TESTS, name='test_public_recent_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], condition=PUBLIC_TESTS, name='test_public_category_idx'),
+            models.Index(
+                fields=['subject', 'grade_level', 'difficulty', '-created_at'], condition=PUBLIC_TESTS,
+                name='test_public_subject_idx'
+            ),
+            models.Index(fields=['title', 'id'], condition=PUBLIC_TESTS, name='test_public_title_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -231,6 +246,11 @@ class TestAttempt(models.Model):
         verbose_name = 'Test topshirish'
         verbose_name_plural = 'Test topshirishlar'
         ordering = ['-started_at']
+        indexes = [
+            # Test statistikasi (yakunlangan urinishlar) va urinishlar ro'yxati
+            models.Index(fields=['test', 'is_completed'], name='attempt_test_completed_idx'),
+            models.Index(fields=['test', '-started_at'], name='attempt_test_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.test.title} - {self.student_name}"
@@ -1,7 +1,12 @@
+from django.db.models import Count, Prefetch, Q
 from rest_framework import serializers
 from .models import Test, Question, Answer, TestAttempt, StudentAnswer, TestCategory
 
 
+# Kategoriyalar ro'yxati keshi (test/kategoriya o'zgarganda tozalanadi)
+CATEGORY_CACHE_KEY = 'tests:categories'
+
+
 class TestCategorySerializer(serializers.ModelSerializer):
     """Test kategoriya serializeri"""
     
@@ -11,8 +16,17 @@ class TestCategorySerializer(serializers.ModelSerializer):
         model = TestCategory
         fields = ['id', 'name', 'description', 'tests_count']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Ochiq testlar sonini bitta guruhlangan so'rov bilan hisoblash"""
+        return queryset.annotate(
+            public_tests_count=Count('tests', filter=Q(tests__is_public=True, tests__is_active=True))
+        )
+    
     def get_tests_count(self, obj):
         """Kategoriyadagi testlar soni"""
+        if hasattr(obj, 'public_tests_count'):
+            return obj.public_tests_count
         return obj.tests.filter(is_public=True, is_active=True).count()
 
 
@@ -165,6 +179,14 @@ class TestAttemptSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'started_at', 'completed_at', 'duration']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Test, javoblar, ularning savollari va tanlangan variantlarini oldindan yuklash"""
+        return queryset.select_related('test').prefetch_related(Prefetch(
+            'student_answers',
+            queryset=StudentAnswer.objects.select_related('question').prefetch_related('selected_answers').order_by('pk')
+        ))
+    
     def get_test_title(self, obj):
         """Test sarlavhasini qaytaradi"""
         return obj.test.title
@@ -1,3 +1,243 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .models import Answer, Question, StudentAnswer, Test, TestAttempt, TestCategory
+
+User = get_user_model()
+
+
+class TestCategoryCacheTest(TestCase):
+    """Test kategoriyalari ro'yxati keshdan beriladi va test o'zgarganda yangilanadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass')
+        cls.category = TestCategory.objects.create(name='Matematika')
+
+    def setUp(self):
+        cache.clear()
+
+    def tests_count(self):
+        response = self.client.get('/api/tests/categories/')
+        self.assertEqual(response.status_code, 200)
+        return response.data[0]['tests_count']
+
+    def test_cached_and_invalidated(self):
+        test = Test.objects.create(
+            title='Kasrlar', description='Tavsif', category=self.category,
+            author=self.teacher, grade_level='5', subject='math'
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(self.tests_count(), 1)
+        with self.assertNumQueries(0):
+            self.tests_count()
+
+        test.is_active = False
+        test.save()
+        self.assertEqual(self.tests_count(), 0)
+
+
+class TestFacetsTest(TestCase):
+    """Filtrlar bo'yicha natijalar soni bitta guruhlangan so'rov bilan hisoblanadi va keshlanadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass')
+        cls.math = TestCategory.objects.create(name='Matematika')
+        cls.physics = TestCategory.objects.create(name='Fizika')
+        for category, grade, difficulty, count in (
+            (cls.math, '5', 'easy', 3), (cls.math, '6', 'hard', 2), (cls.physics, '5', 'medium', 1),
+        ):
+            for i in range(count):
+                Test.objects.create(
+                    title=f'Test {i}', description='Tavsif', category=category, author=cls.teacher,
+                    grade_level=grade, subject='math', difficulty=difficulty
+                )
+        Test.objects.create(
+            title='Yopiq', description='Tavsif', category=cls.math, author=cls.teacher,
+            grade_level='5', subject='math', is_public=False
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.teacher)
+
+    def counts(self, data, param):
+        return {entry['label']: entry['count'] for entry in data['facets'][param]}
+
+    def test_counts_under_filters(self):
+        # Sessiya, foydalanuvchi va bitta guruhlangan so'rov
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/tests/facets/')
+        self.assertEqual(response.data['total'], 6)
+        self.assertEqual(self.counts(response.data, 'category'), {'Matematika': 5, 'Fizika': 1})
+        self.assertEqual(self.counts(response.data, 'difficulty'), {'Oson': 3, 'Qiyin': 2, "O'rta": 1})
+
+        response = self.client.get(f'/api/tests/facets/?category={self.math.pk}&grade=5')
+        self.assertEqual(response.data['total'], 3)
+        # Tanlangan filtrning o'zi hisobga olinmaydi - muqobil qiymatlar ko'rinadi
+        self.assertEqual(self.counts(response.data, 'category'), {'Matematika': 3, 'Fizika': 1})
+        self.assertEqual(self.counts(response.data, 'grade'), {'5': 3, '6': 2})
+        self.assertEqual(self.counts(response.data, 'difficulty'), {'Oson': 3})
+
+        # Kesh kaliti parametrlar tartibiga bog'liq emas
+        with self.assertNumQueries(2):
+            self.client.get(f'/api/tests/facets/?grade=5&category={self.math.pk}')
+
+
+
+@skipUnless(connection.vendor == 'sqlite', "So'rov rejasi SQLite formatida tekshiriladi")
+class TestCatalogIndexTest(TestCase):
+    """Testlar katalogi, statistikasi va urinishlar ro'yxati indeks orqali olinadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass')
+        cls.category = TestCategory.objects.create(name='Matematika')
+        cls.test = Test.objects.create(
+            title='Kasrlar', description='Tavsif', category=cls.category, author=cls.teacher,
+            grade_level='5', subject='math', difficulty='easy'
+        )
+        TestAttempt.objects.create(test=cls.test, student_name='Ali', student_class='5-A', is_completed=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.teacher)
+
+    def plans(self, url, table):
+        """Endpointning ``table`` jadvalidagi so'rovlari rejalari"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                if f'FROM "{table}"' in query['sql']:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans.append([row[-1] for row in cursor.fetchall()])
+        self.assertTrue(plans, url)
+        return plans
+
+    def assertIndexed(self, url, table, index):
+        plans = self.plans(url, table)
+        for plan in plans:
+            self.assertNotIn(f'SCAN {table}', plan, url)
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, url)
+        self.assertTrue(any(index in step for plan in plans for step in plan), (url, plans))
+
+    def test_catalog(self):
+        self.assertIndexed('/api/tests/', 'tests_test', 'test_public_recent_idx')
+        self.assertIndexed(f'/api/tests/?category={self.category.pk}', 'tests_test', 'test_public_category_idx')
+        self.assertIndexed('/api/tests/?subject=math&grade=5&difficulty=easy', 'tests_test', 'test_public_subject_idx')
+        self.assertIndexed('/api/tests/my-tests/', 'tests_test', 'test_author_recent_idx')
+        for sort, index in [('created_at', 'test_public_recent_idx'), ('title', 'test_public_title_idx')]:
+            self.assertIndexed(f'/api/tests/search/?sort={sort}', 'tests_test', index)
+
+        response = self.client.get('/api/tests/search/?sort=-time_limit')
+        self.assertEqual(response.status_code, 400)
+
+    def test_attempts(self):
+        self.assertIndexed(f'/api/tests/{self.test.pk}/attempts/', 'tests_testattempt', 'attempt_test_recent_idx')
+        self.assertIndexed(f'/api/tests/{self.test.pk}/stats/', 'tests_testattempt', 'attempt_test_completed_idx')
+
+
+class SubmitTestGradingTest(TestCase):
+    """Test topshirish so'rovlari soni savollar soniga bog'liq emas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass')
+        cls.category = TestCategory.objects.create(name='Matematika')
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def create_test(self, questions):
+        """Har bir savolda 3 variant: birinchi ikkitasi to'g'ri (multiple_choice) yoki faqat birinchisi"""
+        test = Test.objects.create(
+            title='Kasrlar', description='Tavsif', category=self.category, author=self.teacher,
+            grade_level='5', subject='math', total_questions=questions, total_points=questions * 2
+        )
+        keys = []
+        for i in range(questions):
+            question_type = 'multiple_choice' if i % 2 else 'single_choice'
+            question = Question.objects.create(
+                test=test, question_text=f'Savol {i}', question_type=question_type, points=2, order=i
+            )
+            answers = [
+                Answer.objects.create(
+                    question=question, answer_text=f'Javob {j}', order=j,
+                    is_correct=j == 0 or (j == 1 and question_type == 'multiple_choice')
+                )
+                for j in range(3)
+            ]
+            keys.append((question, answers))
+        return test, keys
+
+    def submit(self, attempt, payload):
+        return self.client.post(
+            f'/api/tests/{attempt.test_id}/submit/', {'attempt_id': attempt.pk, 'student_answers': payload},
+            content_type='application/json'
+        )
+
+    def answers_payload(self, keys):
+        """Juft savollar to'g'ri, toq (multiple_choice) savollarda bitta to'g'ri variant yetishmaydi"""
+        return [
+            {'question_id': question.pk, 'selected_answers': [answers[0].pk] + ([] if i % 2 else [answers[2].pk])}
+            for i, (question, answers) in enumerate(keys)
+        ]
+
+    def test_constant_queries(self):
+        small, small_keys = self.create_test(4)
+        large, large_keys = self.create_test(40)
+        # Sessiya, foydalanuvchi, test, urinish, javoblar kaliti; tranzaksiya (2), urinish UPDATE,
+        # javoblar va tanlangan variantlar INSERT; javob uchun urinish, javoblar va variantlar
+        for test, keys in ((small, small_keys), (large, large_keys)):
+            attempt = TestAttempt.objects.create(test=test, student_name='Ali', student_class='5-A')
+            with self.assertNumQueries(2 + 3 + 2 + 3 + 3):
+                response = self.submit(attempt, self.answers_payload(keys))
+            self.assertEqual(response.status_code, 200)
+
+        results = response.data['results']
+        self.assertEqual((results['correct_answers'], results['wrong_answers']), (20, 20))
+        self.assertEqual((results['score'], results['percentage'], results['total_questions']), (40, 50.0, 40))
+        self.assertEqual(len(response.data['attempt']['student_answers']), 40)
+        attempt.refresh_from_db()
+        self.assertTrue(attempt.is_completed)
+        self.assertEqual(attempt.score, 40)
+
+        question, answers = large_keys[0]
+        answer = StudentAnswer.objects.get(attempt=attempt, question=question)
+        self.assertEqual((answer.is_correct, answer.points_earned), (True, 2))
+        self.assertEqual(set(answer.selected_answers.values_list('pk', flat=True)), {answers[0].pk, answers[2].pk})
+
+    def test_invalid_answers_ignored(self):
+        test, keys = self.create_test(2)
+        other, other_keys = self.create_test(1)
+        (first, first_answers), (second, second_answers) = keys
+        attempt = TestAttempt.objects.create(test=test, student_name='Ali', student_class='5-A')
+        response = self.submit(attempt, [
+            {'question_id': str(first.pk), 'selected_answers': [str(first_answers[0].pk), other_keys[0][1][0].pk, 'x']},
+            {'question_id': first.pk, 'selected_answers': []},
+            {'question_id': other_keys[0][0].pk, 'selected_answers': []},
+            {'question_id': second.pk, 'selected_answers': [second_answers[0].pk, second_answers[1].pk, '\u00b2']},
+            {'question_id': '\u00b2', 'selected_answers': []},
+            {'question_id': str(10 ** 30), 'selected_answers': ['9' * 5000]},
+            'javob',
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results']['correct_answers'], 2)
+        self.assertEqual(StudentAnswer.objects.filter(attempt=attempt).count(), 2)
+        self.assertEqual(
+            list(StudentAnswer.objects.get(attempt=attempt, question=first).selected_answers.all()), [first_answers[0]]
+        )
 
-# Create your tests here.
+        # Qayta yuborish javoblarni takror yozmaydi
+        response = self.submit(attempt, [])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(StudentAnswer.objects.filter(attempt=attempt).count(), 2)
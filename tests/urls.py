@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('categories/', views.TestCategoryListView.as_view(), name='test_category_list'),
     path('', views.TestListView.as_view(), name='test_list'),
+    path('facets/', views.test_facets, name='test_facets'),
     path('create/', views.TestCreateView.as_view(), name='test_create'),
     path('<int:pk>/', views.TestDetailView.as_view(), name='test_detail'),
     path('<int:pk>/update/', views.TestUpdateView.as_view(), name='test_update'),
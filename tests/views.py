@@ -4,28 +4,34 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Avg
-from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
-from .models import Test, Question, Answer, TestAttempt, StudentAnswer, TestCategory
+from .models import Test, Question, Answer, TestAttempt, TestCategory
 from .serializers import (
     TestCategorySerializer,
     TestSerializer,
     QuestionSerializer,
     AnswerSerializer,
     TestAttemptSerializer,
-    StudentAnswerSerializer
+    StudentAnswerSerializer,
+    CATEGORY_CACHE_KEY
 )
+from . import grading
 from .ai_service import AITestGenerationService
+from ustoziya_platform.cache import CachedListMixin
+from ustoziya_platform.facets import Facet, facets_response
+from ustoziya_platform.pagination import paginate, sort_param
 
 
-class TestCategoryListView(generics.ListAPIView):
+class TestCategoryListView(CachedListMixin, generics.ListAPIView):
     """Test kategoriyalari ro'yxati"""
-    queryset = TestCategory.objects.all()
+    queryset = TestCategorySerializer.setup_eager_loading(TestCategory.objects.all())
     serializer_class = TestCategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    cache_key = CATEGORY_CACHE_KEY
 
 
 class TestListView(generics.ListCreateAPIView):
@@ -63,6 +69,32 @@ class TestListView(generics.ListCreateAPIView):
         serializer.save(author=self.request.user)
 
 
+TEST_FACETS = [
+    Facet('category', 'category_id', 'category__name'),
+    Facet('subject', 'subject'),
+    Facet('grade', 'grade_level'),
+    Facet('difficulty', 'difficulty'),
+]
+
+
+def _test_facet_queryset(params):
+    queryset = Test.objects.filter(is_public=True, is_active=True)
+    search = params.get('search')
+    if search:
+        queryset = queryset.filter(
+            Q(title__icontains=search) |
+            Q(description__icontains=search)
+        )
+    return queryset
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def test_facets(request):
+    """Testlar filtrlari bo'yicha natijalar soni (joriy filtrlar hisobga olinadi)"""
+    return facets_response(request, 'tests', TEST_FACETS, _test_facet_queryset, extra_params=('search',))
+
+
 class TestDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Test tafsilotlari"""
     serializer_class = TestSerializer
@@ -199,6 +231,8 @@ class QuestionListView(generics.ListCreateAPIView):
     """Test savollari ro'yxati"""
     serializer_class = QuestionSerializer
     permission_classes = [IsAuthenticated]
+    # Savollar tartib raqami bo'yicha va to'liq kerak (test muharriri uchun)
+    pagination_class = None
     
     def get_queryset(self):
         test_id = self.kwargs['pk']
@@ -335,86 +369,38 @@ def submit_test(request, pk):
             'error': 'Test topshirish ID si kiritilishi kerak'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    if not isinstance(student_answers, list):
+        return Response({
+            'error': 'Javoblar ro\'yxat ko\'rinishida bo\'lishi kerak'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     try:
         attempt = TestAttempt.objects.get(id=attempt_id, test=test)
-    except TestAttempt.DoesNotExist:
+    except (TestAttempt.DoesNotExist, ValueError):
         return Response({
             'error': 'Test topshirish topilmadi'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Testni tugatish
-    attempt.completed_at = timezone.now()
-    attempt.is_completed = True
-    
-    # Javoblarni saqlash va baholash
-    total_score = 0
-    correct_answers = 0
-    wrong_answers = 0
-    
-    for answer_data in student_answers:
-        question_id = answer_data.get('question_id')
-        selected_answers = answer_data.get('selected_answers', [])
-        text_answer = answer_data.get('text_answer', '')
-        
-        try:
-            question = Question.objects.get(id=question_id, test=test)
-        except Question.DoesNotExist:
-            continue
-        
-        # O'quvchi javobini saqlash
-        student_answer = StudentAnswer.objects.create(
-            attempt=attempt,
-            question=question,
-            text_answer=text_answer
-        )
-        
-        # Tanlangan javoblarni saqlash
-        for answer_id in selected_answers:
-            try:
-                answer = Answer.objects.get(id=answer_id, question=question)
-                student_answer.selected_answers.add(answer)
-            except Answer.DoesNotExist:
-                continue
-        
-        # Javobni tekshirish
-        is_correct = True
-        correct_answers_list = question.answers.filter(is_correct=True)
-        
-        if question.question_type in ['single_choice', 'multiple_choice']:
-            selected_correct = student_answer.selected_answers.filter(is_correct=True)
-            if selected_correct.count() != correct_answers_list.count():
-                is_correct = False
-            elif not all(answer in selected_correct for answer in correct_answers_list):
-                is_correct = False
-        
-        student_answer.is_correct = is_correct
-        student_answer.points_earned = question.points if is_correct else 0
-        student_answer.save()
-        
-        if is_correct:
-            correct_answers += 1
-            total_score += question.points
-        else:
-            wrong_answers += 1
-    
-    # Natijalarni saqlash
-    attempt.score = total_score
-    attempt.percentage = (total_score / test.total_points * 100) if test.total_points > 0 else 0
-    attempt.save()
+    # Javoblar kaliti bitta so'rov bilan o'qiladi, javoblar bitta tranzaksiyada yoziladi
+    try:
+        results = grading.submit_attempt(test, attempt, student_answers)
+    except grading.AttemptAlreadySubmitted:
+        return Response({
+            'error': 'Test allaqachon topshirilgan'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    attempt = TestAttemptSerializer.setup_eager_loading(TestAttempt.objects.all()).get(pk=attempt.pk)
     
     return Response({
         'message': 'Test muvaffaqiyatli topshirildi',
         'attempt': TestAttemptSerializer(attempt).data,
-        'results': {
-            'score': total_score,
-            'percentage': attempt.percentage,
-            'correct_answers': correct_answers,
-            'wrong_answers': wrong_answers,
-            'total_questions': test.total_questions
-        }
+        'results': dict(results, total_questions=test.total_questions)
     })
 
 
+# Qidiruvda ruxsat etilgan tartiblar - har biri uchun qisman indeks bor (Test.Meta.indexes)
+TEST_SORTS = ('-created_at', 'created_at', 'title')
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def search_tests(request):
@@ -443,11 +429,9 @@ def search_tests(request):
         queryset = queryset.filter(difficulty=difficulty)
     
     # Natijalarni tartiblash
-    sort_by = request.query_params.get('sort', '-created_at')
-    queryset = queryset.order_by(sort_by)
+    queryset = queryset.order_by(sort_param(request, TEST_SORTS, '-created_at'))
     
-    serializer = TestSerializer(queryset, many=True)
-    return Response(serializer.data)
+    return paginate(request, queryset, TestSerializer)
 
 
 @api_view(['GET'])
@@ -455,8 +439,7 @@ def search_tests(request):
 def my_tests(request):
     """Foydalanuvchining testlari"""
     tests = Test.objects.filter(author=request.user).order_by('-created_at')
-    serializer = TestSerializer(tests, many=True)
-    return Response(serializer.data)
+    return paginate(request, tests, TestSerializer)
 
 
 @api_view(['GET'])
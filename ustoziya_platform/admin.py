@@ -0,0 +1,77 @@
+"""Katta jadvallar uchun admin panel asosi.
+
+Oddiy ``ModelAdmin`` ro'yxat sahifasida ikki marta to'liq ``COUNT(*)``
+bajaradi (filtrlangan va umumiy son), har bir qatordagi tashqi kalit uchun
+alohida so'rov yuboradi va tahrirlash formasida tashqi kalitlarni butun
+jadval (masalan, barcha foydalanuvchilar) ro'yxati sifatida yuklaydi.
+``ScalableModelAdmin``:
+
+- umumiy sonni hisoblamaydi (``show_full_result_count = False``);
+- filtrsiz ro'yxat sonini PostgreSQL jadval statistikasidan
+  (``pg_class.reltuples``) oladi, qolgan hollarda sanash
+  ``ADMIN_COUNT_LIMIT`` qator bilan cheklanadi (shundan keyingi sahifalarga
+  filtr yoki qidiruv orqali o'tiladi);
+- ``list_select_related`` berilmagan bo'lsa, ``list_display`` dagi tashqi
+  kalitlarni (bo'sh bo'lishi mumkinlarini ham) bitta JOIN bilan yuklaydi.
+
+Tashqi kalit va M2M maydonlari uchun har bir adminda ``autocomplete_fields``
+(yoki ``raw_id_fields``) ko'rsatiladi; ``list_filter`` da butun jadval
+bo'yicha ``DISTINCT`` talab qiladigan (choices siz matn) maydonlar
+ishlatilmaydi.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def _count_limit():
+    return getattr(settings, 'ADMIN_COUNT_LIMIT', 10000)
+
+
+def estimated_row_count(model, using='default'):
+    """Jadval qatorlari taxminiy soni (PostgreSQL statistikasidan, boshqa bazalarda None)"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # Statistikasi hali yig'ilmagan jadval uchun -1
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Sahifalash uchun son: katta filtrsiz jadvalda taxminiy, aks holda chegaralangan"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = _count_limit()
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        # COUNT(*) FROM (... LIMIT n) - limitdan ortiq qatorlar o'qilmaydi
+        return queryset.order_by()[:limit].count()
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """Millionlab qatorli jadvallar uchun ``ModelAdmin``"""
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_list_select_related(self, request):
+        if self.list_select_related is not False:
+            return self.list_select_related
+        related = []
+        for name in self.get_list_display(request):
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.many_to_one or field.one_to_one:
+                related.append(name)
+        return related
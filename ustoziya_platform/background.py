@@ -0,0 +1,90 @@
+"""Og'ir ishlarni (rasm nusxalari, video kodlash) so'rovdan tashqarida bajarish.
+
+Ish tranzaksiya yakunlangach nomlangan fon oqimlari hovuziga (pool)
+qo'yiladi - so'rov javobi kutib turmaydi. Har bir hovuz o'z oqimlari sonini
+biladi, shuning uchun uzoq ishlar (video kodlash) tez ishlarni
+(rasm nusxalari) to'sib qo'ymaydi. ``run_async=False`` bo'lsa ish
+tranzaksiyadan keyin shu oqimda bajariladi (testlar, oddiy o'rnatish).
+
+Xatoliklarni ishning o'zi qayd qiladi. Ishlar odatda fayl maydoni
+o'zgarganda qo'yiladi - buni ``on_file_change`` kuzatadi.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(pool, workers):
+    with _executors_lock:
+        if pool not in _executors:
+            _executors[pool] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=pool)
+        return _executors[pool]
+
+
+def _run(job, args):
+    try:
+        job(*args)
+    finally:
+        # Fon oqimida ochilgan ulanish ochiq qolmasligi kerak
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def schedule(pool, job, *args, workers=1, run_async=True):
+    """``job(*args)`` ni tranzaksiya yakunlangach ``pool`` hovuzida bajarish"""
+    def enqueue():
+        if run_async:
+            _get_executor(pool, workers).submit(_run, job, args)
+        else:
+            _run(job, args)
+
+    transaction.on_commit(enqueue)
+
+
+def file_name(instance, field_name):
+    """Fayl maydonidagi nom (bo'sh bo'lsa None).
+
+    ``__dict__`` dan o'qiladi: kechiktirilgan (``only``/``defer``) maydon
+    uchun qo'shimcha so'rov bajarilmaydi.
+    """
+    value = instance.__dict__.get(field_name)
+    return getattr(value, 'name', value) or None
+
+
+def on_file_change(model, field_name, uid, changed, deleted=None):
+    """Model fayl maydoni o'zgarishini kuzatish.
+
+    Bazadan o'qilgan nom eslab qolinadi; saqlashda nom o'zgargan bo'lsa
+    ``changed(instance, name, old_name, created)`` chaqiriladi (yangi
+    obyektda ``old_name`` - None). Obyekt o'chirilganda
+    ``deleted(instance, name)``. Maydon yuklanmagan (kechiktirilgan) bo'lsa,
+    saqlash o'zgarish hisoblanmaydi. ``uid`` - signallar uchun noyob nom.
+    """
+    loaded_attr = '_{}_source'.format(uid.replace('.', '_'))
+
+    def remember(sender, instance, **kwargs):
+        setattr(instance, loaded_attr, file_name(instance, field_name))
+
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        if raw or field_name not in instance.__dict__:
+            return
+        name = file_name(instance, field_name)
+        old_name = None if created else getattr(instance, loaded_attr, None)
+        setattr(instance, loaded_attr, name)
+        if name != old_name:
+            changed(instance, name, old_name, created)
+
+    def on_delete(sender, instance, **kwargs):
+        name = file_name(instance, field_name)
+        if name:
+            deleted(instance, name)
+
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    if deleted is not None:
+        post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,80 @@
+"""Tez-tez so'raladigan, kam o'zgaradigan API javoblarini keshlash.
+
+Javob birinchi so'rovda hisoblanib keshga yoziladi, keyingi so'rovlar bazaga
+murojaat qilmaydi. Kesh vaqt bo'yicha emas, ma'lumot o'zgarganda tozalanadi:
+``invalidate_on_change(Material, key, fields=['is_public'])`` - material
+yaratilganda, o'chirilganda yoki ko'rsatilgan maydonlaridan biri
+o'zgarganda ``key`` kesh yozuvi o'chiriladi. ``CACHE_LIST_TIMEOUT`` faqat
+signalni chetlab o'tadigan o'zgarishlar (``QuerySet.update``) uchun zaxira.
+
+Tozalash faqat umumiy keshda (Redis/Memcached) barcha worker larga yetadi.
+Standart ``LocMemCache`` har bir jarayonning o'z xotirasi: boshqa jarayonlar
+eski javobni muddati tugaguncha berib turadi. Shuning uchun jarayon ichidagi
+keshda muddat ``CACHE_LOCAL_TIMEOUT`` bilan cheklanadi - production da
+``CACHE_BACKEND`` umumiy keshga sozlanishi kerak.
+"""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from rest_framework.response import Response
+
+
+def _timeout():
+    timeout = getattr(settings, 'CACHE_LIST_TIMEOUT', 60 * 60)
+    if isinstance(caches['default'], LocMemCache):
+        # Boshqa jarayonlardagi nusxalar tozalanmaydi - eskirish muddati qisqa bo'lishi kerak
+        timeout = min(timeout, getattr(settings, 'CACHE_LOCAL_TIMEOUT', 60))
+    return timeout
+
+
+def cached(key, builder, timeout=None):
+    """Kesh qiymati yoki ``builder()`` natijasi (keshga yozib)"""
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, _timeout() if timeout is None else timeout)
+    return value
+
+
+def invalidate(key):
+    """Kesh yozuvini o'chirish (tranzaksiya tugaganda yana bir bor)"""
+    cache.delete(key)
+    # Tranzaksiya davomida boshqa so'rov eski qiymatni keshga yozib qo'yishi mumkin
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_on_change(model, key, fields=()):
+    """Model obyekti yaratilganda, o'chirilganda yoki ``fields`` o'zgarganda keshni tozalash"""
+    attnames = [model._meta.get_field(name).attname for name in fields]
+    loaded_attr = f'_cache_loaded_{key}'
+
+    def remember(sender, instance, **kwargs):
+        setattr(instance, loaded_attr, tuple(instance.__dict__.get(name) for name in attnames))
+
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        current = tuple(instance.__dict__.get(name) for name in attnames)
+        if created or current != getattr(instance, loaded_attr, None):
+            invalidate(key)
+        setattr(instance, loaded_attr, current)
+
+    def on_delete(sender, instance, **kwargs):
+        invalidate(key)
+
+    uid = f'cache_{key}_{model._meta.label_lower}'
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=uid)
+
+
+class CachedListMixin:
+    """``ListAPIView`` javobini ``cache_key`` bo'yicha keshlash (sahifalanmagan ro'yxatlar uchun)"""
+    cache_key = None
+
+    def list(self, request, *args, **kwargs):
+        data = cached(
+            self.cache_key,
+            lambda: self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data
+        )
+        return Response(data)
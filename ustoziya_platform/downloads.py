@@ -0,0 +1,163 @@
+"""Fayllarni yuklab berish uchun umumiy yordamchi funksiyalar.
+
+Fayl xotiraga to'liq o'qilmaydi: javob bo'laklab uzatiladi, HTTP Range
+(206) so'rovlari, ETag/Last-Modified bo'yicha shartli so'rovlar va
+nginx (X-Accel-Redirect) yoki Apache (X-Sendfile) orqali uzatish
+qo'llab-quvvatlanadi.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(stat):
+    """Fayl hajmi va o'zgartirilgan vaqtidan ETag yasash"""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """``Range`` sarlavhasini (start, end) ko'rinishiga keltirish.
+
+    Faqat bitta oraliq qo'llab-quvvatlanadi. Sarlavha yo'q yoki birligi
+    ``bytes`` emas bo'lsa ``None``; bir nechta oraliq, noto'g'ri yozilgan
+    yoki fayl chegarasidan tashqaridagi oraliq uchun ``False`` (416)
+    qaytariladi.
+    """
+    if not header or not header.strip().startswith('bytes='):
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return False
+
+    start, end = match.groups()
+    if not start and not end:
+        return False
+    if not start:
+        # bytes=-500 - faylning oxirgi 500 bayti
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+def is_resumed_download(request):
+    """So'rov to'xtatilgan yuklab olishning davomimi (Range 0 dan boshlanmaydi)"""
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+    return bool(match) and match.group(1) not in ('', '0')
+
+
+def is_new_download(request, response):
+    """Javob yangi yuklab olishmi: to'liq fayl (200) yoki 0-baytdan boshlanadigan qism (206).
+
+    304 (qayta tekshirish), 416 va to'xtatilgan yuklab olishning davomi
+    hisoblanmaydi. Veb-server uzatganda (X-Accel-Redirect/X-Sendfile) Range ni
+    u bajaradi - shuning uchun so'rovdagi ``Range`` tekshiriladi.
+    """
+    if response.status_code == 206:
+        return response['Content-Range'].startswith('bytes 0-')
+    if response.status_code != 200:
+        return False
+    if response.has_header('X-Accel-Redirect') or response.has_header('X-Sendfile'):
+        return not is_resumed_download(request)
+    return True
+
+
+def _iter_range(path, start, length, chunk_size):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _accel_response(path):
+    """Baytlarni veb-server uzatadi, Django faqat ruxsatni tekshiradi"""
+    mode = getattr(settings, 'DOWNLOAD_ACCEL_MODE', '')
+    if mode == 'nginx':
+        relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = getattr(settings, 'DOWNLOAD_ACCEL_PREFIX', '/protected-media/') + relative
+        return response
+    if mode == 'sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+        return response
+    return None
+
+
+def serve_file(request, path, filename, content_type=None):
+    """Faylni yuklab olish uchun javob qaytarish.
+
+    ``path`` - diskdagi to'liq yo'l, ``filename`` - foydalanuvchiga
+    ko'rsatiladigan fayl nomi. Fayl mavjud bo'lmasa ``FileNotFoundError``
+    ko'tariladi.
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    # If-None-Match / If-Modified-Since -> 304
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if conditional is not None:
+        conditional['ETag'] = etag
+        return conditional
+
+    response = _accel_response(path)
+    if response is not None:
+        # Range va uzatishni veb-serverning o'zi bajaradi
+        response['Content-Type'] = content_type
+    else:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+
+        # If-Range mos kelmasa, fayl to'liq qaytariladi
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if byte_range and if_range and if_range != etag:
+            if parse_http_date_safe(if_range) != int(stat.st_mtime):
+                byte_range = None
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+        chunk_size = getattr(settings, 'DOWNLOAD_CHUNK_SIZE', 64 * 1024)
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _iter_range(path, start, length, chunk_size),
+                status=206,
+                content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(length)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response.block_size = chunk_size
+            response['Content-Length'] = str(stat.st_size)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    return response
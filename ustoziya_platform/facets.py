@@ -0,0 +1,101 @@
+"""Katalog filtrlari bo'yicha natijalar soni (facet) - bitta guruhlangan so'rov bilan.
+
+Yon paneldagi har bir filtr qiymati (kategoriya, tur, fan, sinf, qiyinlik)
+yonida "tanlansa nechta natija bo'ladi" soni ko'rsatiladi. Har bir qiymat
+uchun alohida so'rov o'rniga barcha filtr maydonlari bo'yicha bitta
+``GROUP BY`` bajariladi, sonlar Python da yig'iladi. Har bir filtr uchun
+sonlar qolgan tanlangan filtrlar bo'yicha hisoblanadi (filtrning o'zi
+hisobga olinmaydi), shuning uchun foydalanuvchi muqobil qiymatlarni ham
+ko'radi.
+
+Natija normallashtirilgan filtrlar to'plami kaliti bilan qisqa muddatga
+(``FACETS_CACHE_SECONDS``) keshlanadi.
+"""
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Count
+from rest_framework.response import Response
+
+from .cache import cached
+
+# param - so'rov parametri, field - model maydoni (``__`` bilan bog'langan ham bo'lishi mumkin),
+# label_field - qiymat nomi olinadigan maydon (bo'lmasa - maydon choices yoki qiymatning o'zi)
+Facet = namedtuple('Facet', 'param field label_field', defaults=(None,))
+
+
+def _field_choices(model, path):
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    return dict(field.flatchoices) if field.choices else {}
+
+
+def _normalize(value):
+    return ' '.join(str(value).split()).lower()
+
+
+def cache_key(catalog, params):
+    """Filtrlar to'plami kaliti (parametrlar tartibi va yozilishiga bog'liq emas)"""
+    normalized = tuple(sorted((name, _normalize(value)) for name, value in params.items() if value))
+    return f'facets:{catalog}:' + hashlib.sha1(repr(normalized).encode()).hexdigest()
+
+
+def facet_counts(queryset, facets, selected):
+    """Har bir filtr qiymati bo'yicha natijalar soni (bitta so'rov)
+
+    ``queryset`` - filtr maydonlaridan tashqari shartlar (qidiruv, teg) qo'llangan
+    to'plam, ``selected`` - {param: qiymat} tanlangan filtrlar.
+    """
+    fields = [facet.field for facet in facets]
+    fields += [facet.label_field for facet in facets if facet.label_field]
+    rows = queryset.order_by().values(*fields).annotate(facet_total=Count('pk'))
+
+    selected = {param: str(value) for param, value in selected.items() if value not in (None, '')}
+    choices = {facet.param: _field_choices(queryset.model, facet.field) for facet in facets}
+    counts = {facet.param: {} for facet in facets}
+    total = 0
+    for row in rows:
+        missed = [
+            facet.param for facet in facets
+            if facet.param in selected and str(row[facet.field]) != selected[facet.param]
+        ]
+        if not missed:
+            total += row['facet_total']
+        if len(missed) > 1:
+            continue
+        for facet in facets:
+            value = row[facet.field]
+            if value in (None, '') or (missed and missed != [facet.param]):
+                continue
+            entry = counts[facet.param].get(value)
+            if entry is None:
+                label = row[facet.label_field] if facet.label_field else choices[facet.param].get(value, value)
+                entry = counts[facet.param][value] = {'value': value, 'label': str(label), 'count': 0}
+            entry['count'] += row['facet_total']
+
+    return {
+        'total': total,
+        'facets': {
+            param: sorted(entries.values(), key=lambda entry: (-entry['count'], entry['label']))
+            for param, entries in counts.items()
+        },
+    }
+
+
+def facets_response(request, catalog, facets, build_queryset, extra_params=()):
+    """Katalog facet endpointi javobi (keshdan yoki bitta so'rov bilan)
+
+    ``build_queryset(params)`` - filtr maydonlaridan tashqari shartlar qo'llangan
+    queryset, ``extra_params`` - shu shartlar parametrlari (kesh kalitiga kiradi).
+    """
+    selected = {facet.param: request.query_params.get(facet.param, '').strip() for facet in facets}
+    extra = {name: request.query_params.get(name, '').strip() for name in extra_params}
+    data = cached(
+        cache_key(catalog, dict(selected, **extra)),
+        lambda: facet_counts(build_queryset(extra), facets, selected),
+        timeout=getattr(settings, 'FACETS_CACHE_SECONDS', 60)
+    )
+    return Response(data)
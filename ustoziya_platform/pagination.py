@@ -0,0 +1,201 @@
+"""API ro'yxatlari uchun kursorli (keyset) sahifalash.
+
+Har bir sahifa ``WHERE (created_at, id) < (<kursor>) ORDER BY created_at DESC,
+id DESC LIMIT n`` ko'rinishidagi so'rov bilan olinadi: kursor tartibdagi
+barcha kalitlar qiymatini saqlaydi va satrlar to'liq kalit bo'yicha
+solishtiriladi, shuning uchun bir xil qiymatli satrlar ham tushib qolmaydi va
+sahifa qanchalik uzoqda bo'lmasin, narxi o'zgarmaydi (OFFSET ishlatilmaydi).
+
+Eski sahifalar uchun ``?paginate=false`` parametri yoki ``API_PAGINATION``
+sozlamasi orqali sahifalashni o'chirib, butun ro'yxatni olish mumkin.
+
+Foydalanuvchi tanlaydigan tartib (``?sort=``) faqat ruxsat etilgan
+qiymatlardan biri bo'lishi mumkin - har biri uchun modelda indeks bor,
+shuning uchun sahifa jadvalni to'liq saralamasdan olinadi.
+"""
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+
+def sort_param(request, allowed, default):
+    """``sort`` parametri (``allowed`` ro'yxatidan tashqari qiymat - 400)"""
+    sort_by = request.query_params.get('sort') or default
+    if sort_by is not None and sort_by not in allowed:
+        raise ValidationError({'sort': f"Ruxsat etilgan qiymatlar: {', '.join(allowed)}"})
+    return sort_by
+
+
+def pagination_disabled(request):
+    """Sahifalash o'chirilganmi (eski frontend sahifalari uchun)"""
+    if not getattr(settings, 'API_PAGINATION', True):
+        return True
+    return request.query_params.get('paginate', '').lower() in ('0', 'false', 'no')
+
+
+class KeysetPagination(CursorPagination):
+    """``(created_at, id)`` bo'yicha kursorli sahifalash.
+
+    Agar queryset ``order_by()`` yoki model ``Meta.ordering`` orqali
+    tartiblangan bo'lsa (masalan, qidiruvda dolzarblik yoki ``submitted_at``
+    bo'yicha), kursor shu tartibga quriladi; ``id`` doimo oxirgi kalit
+    sifatida qo'shiladi. Kursorda barcha kalitlar qiymati saqlanadi va
+    keyingi sahifa ``(k1, ..., id)`` bo'yicha qat'iy solishtirish bilan
+    olinadi (DRF dagi birinchi kalit + OFFSET usuli ishlatilmaydi).
+    NULL qiymatlar eng kichik qiymat deb hisoblanadi.
+    """
+    page_size = getattr(settings, 'API_PAGE_SIZE', 20)
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+    page_size_query_param = 'page_size'
+    ordering = DEFAULT_ORDERING
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if pagination_disabled(request):
+            return None
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.keys = [
+            (field.lstrip('-'), field.startswith('-'), self._nullable(queryset.model, field.lstrip('-')))
+            for field in self.ordering
+        ]
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if self.cursor is not None and self.cursor.position is not None:
+            queryset = queryset.filter(self._after(self.cursor.position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not ordering or not all(isinstance(field, str) and '__' not in field for field in ordering):
+            return self.ordering
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return tuple(ordering)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Orqaga yurib bo'sh sahifaga kelindi - boshidan
+            return replace_query_param(self.base_url, self.cursor_query_param, self._encode(None, False))
+        return replace_query_param(self.base_url, self.cursor_query_param, self._encode(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Oldinga yurib bo'sh sahifaga kelindi - oxirgi sahifa
+            return replace_query_param(self.base_url, self.cursor_query_param, self._encode(None, True))
+        return replace_query_param(self.base_url, self.cursor_query_param, self._encode(self.page[0], True))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            position = tokens.get('p', [None])[0]
+            if position is not None:
+                position = json.loads(position)
+                if (not isinstance(position, list) or len(position) != len(self.keys)
+                        or not all(value is None or isinstance(value, str) for value in position)):
+                    raise ValueError(position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def _encode(self, instance, reverse):
+        tokens = {}
+        if reverse:
+            tokens['r'] = '1'
+        if instance is not None:
+            tokens['p'] = json.dumps(self._position(instance))
+        return b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+
+    def _position(self, instance):
+        values = []
+        for name, _, _ in self.keys:
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(None if value is None else str(value))
+        return values
+
+    @staticmethod
+    def _nullable(model, name):
+        try:
+            return model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            # Annotatsiya (masalan, search_rank)
+            return False
+
+    def _order_by(self, reverse):
+        ordering = []
+        for name, descending, nullable in self.keys:
+            descending = descending != reverse
+            if not nullable:
+                ordering.append(f'-{name}' if descending else name)
+            elif descending:
+                ordering.append(F(name).desc(nulls_last=True))
+            else:
+                ordering.append(F(name).asc(nulls_first=True))
+        return ordering
+
+    def _after(self, position, reverse):
+        """Tartibda ``position`` dan qat'iy keyin keladigan satrlar: (k1 > v1) OR (k1 = v1 AND k2 > v2) ..."""
+        conditions, equal = [], Q()
+        for (name, descending, nullable), value in zip(self.keys, position):
+            descending = descending != reverse
+            if value is None:
+                # NULL dan keyin faqat o'sish tartibida NULL bo'lmaganlar keladi
+                if not descending:
+                    conditions.append(equal & Q(**{f'{name}__isnull': False}))
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            greater = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+            if descending and nullable:
+                greater |= Q(**{f'{name}__isnull': True})
+            conditions.append(equal & greater)
+            equal &= Q(**{name: value})
+        if not conditions:
+            return Q(pk__in=[])
+        return reduce(lambda left, right: left | right, conditions)
+
+
+def paginate(request, queryset, serializer_class, **serializer_kwargs):
+    """Funksiya ko'rinishidagi (``@api_view``) view'lar uchun sahifalangan javob"""
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    if page is None:
+        serializer = serializer_class(queryset, many=True, **serializer_kwargs)
+        return Response(serializer.data)
+    serializer = serializer_class(page, many=True, **serializer_kwargs)
+    return paginator.get_paginated_response(serializer.data)
@@ -128,6 +128,17 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Yuklangan fayllar SHA-256 bo'yicha, takrorlanmasdan saqlanadi (qarang: materials/storage.py).
+# Rasm nusxalari (thumbnails) nomi asl fayldan kelib chiqadi - oddiy storage da.
+STORAGES = {
+    'default': {'BACKEND': 'materials.storage.ContentAddressedStorage'},
+    'thumbnails': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'lods': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# Biriktirilmay qolgan fayllar shu muddatdan keyin dedupe_media bilan o'chiriladi (soat)
+MEDIA_BLOB_ORPHAN_HOURS = 24
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -141,11 +152,127 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'ustoziya_platform.pagination.KeysetPagination',
+}
+
+# Rasmlarning kichik nusxalari (qarang: ustoziya_platform/thumbnails.py)
+THUMBNAIL_SIZES = (64, 256, 768)  # px, uzun tomoni bo'yicha
+THUMBNAIL_DEFAULT_SIZE = 256
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_ASYNC = True  # False - nusxalar so'rov tranzaksiyasidan keyin shu oqimda yaratiladi
+THUMBNAIL_WORKERS = 2
+
+# Video darsliklarni HLS ga o'tkazish (qarang: materials/hls.py, ffmpeg o'rnatilgan bo'lishi kerak)
+HLS_FFMPEG = os.environ.get('HLS_FFMPEG', 'ffmpeg')
+HLS_FFPROBE = os.environ.get('HLS_FFPROBE', 'ffprobe')
+HLS_RENDITIONS = (  # (balandlik, video kbit/s, audio kbit/s)
+    (240, 400, 64),
+    (480, 1000, 96),
+    (720, 2500, 128),
+)
+HLS_SEGMENT_SECONDS = 6
+HLS_DIR = 'hls'  # MEDIA_ROOT ichida
+HLS_CACHE_SECONDS = 365 * 24 * 3600  # tayyor paket fayllari o'zgarmaydi
+HLS_ASYNC = True  # False - paketlash so'rov tranzaksiyasidan keyin shu oqimda bajariladi
+HLS_WORKERS = 1  # kodlash protsessorni to'liq band qiladi
+HLS_HEARTBEAT_SECONDS = 60  # foiz o'zgarmasa ham shu oraliqda faollik yoziladi
+
+# Video ma'lumotlari va muqova kadri (qarang: materials/video_metadata.py, OpenCV kerak)
+VIDEO_POSTER_POSITIONS = (0.1, 0.25, 0.4, 0.6)  # davomiylikka nisbatan
+VIDEO_POSTER_MAX_SIZE = 1280
+VIDEO_PROBE_ASYNC = True
+VIDEO_PROBE_WORKERS = 2
+
+# Yuklab olishlar statistikasi (qarang: materials/download_rollups.py, rollup_downloads buyrug'i cron orqali)
+DOWNLOAD_HISTORY_RETENTION_DAYS = 365  # manba yozuvlari saqlanadigan muddat, 0 - cheksiz
+DOWNLOAD_HOURLY_ROLLUP_RETENTION_DAYS = 90  # soatlik statistika, 0 - cheksiz
+# last_id dan shuncha ID oldingacha kechikib tasdiqlangan yozuvlar ham statistikaga qo'shiladi
+DOWNLOAD_ROLLUP_LATE_WINDOW = 10000
+DOWNLOAD_HISTORY_DELETE_BATCH = 5000
+DOWNLOAD_STATS_MAX_BUCKETS = 366  # bitta so'rovdagi oraliqlar soni chegarasi
+
+# O'xshash materiallar (qarang: materials/recommendations.py, rebuild_related_materials buyrug'i cron orqali)
+RELATED_MATERIALS_TOP_K = 20
+RELATED_MIN_CO_DOWNLOADS = 2  # tasodifiy juftliklarni chiqarib tashlash uchun
+RELATED_MAX_USER_ITEMS = 500  # shundan ko'p material yuklaganlar (robotlar) hisobga olinmaydi
+RELATED_WINDOW_DAYS = 180  # 0 - butun tarix
+RELATED_STREAM_CHUNK = 100000
+RELATED_BLOCK_SIZE = 1000
+
+# Materiallarni ommaviy import qilish (qarang: materials/bulk_import.py, import_materials buyrug'i)
+MATERIAL_IMPORT_BATCH_SIZE = 500  # bitta tranzaksiyada yoziladigan materiallar
+MATERIAL_IMPORT_WORKERS = 4  # fayllarni xeshlab saqlaydigan oqimlar
+MATERIAL_IMPORT_DIR = os.path.join(BASE_DIR, 'imports')  # admin panelda yuklangan arxivlar (ochiq emas)
+MATERIAL_IMPORT_ASYNC = True  # False - admin importi so'rovdan keyin shu oqimda bajariladi
+
+# Ishlarni ommaviy baholash (qarang: materials/grading.py) - bitta so'rovdagi ishlar soni chegarasi
+GRADE_BATCH_MAX_ITEMS = 1000
+
+# Admin ro'yxatlarida sanaladigan qatorlar chegarasi (qarang: ustoziya_platform/admin.py)
+ADMIN_COUNT_LIMIT = 10000
+
+# 3D modellarning soddalashtirilgan nusxalari (qarang: materials/meshes.py)
+MESH_LOD_RATIOS = (0.05, 0.25)  # yoqlar ulushi, brauzer avval eng kichigini yuklaydi
+MESH_LOD_MIN_FACES = 1000  # kichik modellar uchun nusxa kerak emas
+MESH_LOD_ASYNC = True
+MESH_LOD_WORKERS = 1
+MESH_PROCESS_MAX_SIZE = 200 * 1024 * 1024  # bundan katta modellar o'qilmaydi (xotira), faqat hajmi yoziladi
+
+# Shuncha daqiqa faollik bo'lmagan fon ishi (jarayon qayta ishga tushganda yo'qolgan)
+# to'xtab qolgan hisoblanadi: python manage.py requeue_stale_jobs (masalan, deploydan keyin yoki cron)
+BACKGROUND_JOB_STALE_MINUTES = 30
+
+# Kesh (standart - jarayon xotirasi). Keshni tozalash faqat joriy jarayonga yetadi, shuning
+# uchun bir nechta worker bo'lsa (production) CACHE_BACKEND umumiy keshga sozlanishi shart:
+# masalan django.core.cache.backends.redis.RedisCache va CACHE_LOCATION=redis://...
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'ustoziya'),
+    }
 }
+# Keshlangan ro'yxatlar (kategoriyalar) uchun zaxira muddati, soniya
+CACHE_LIST_TIMEOUT = 60 * 60
+# Jarayon ichidagi keshda (LocMemCache) muddat shundan oshmaydi - boshqa worker lar eski javobni
+# ko'pi bilan shuncha soniya beradi
+CACHE_LOCAL_TIMEOUT = 60
+# Katalog filtrlari bo'yicha natijalar soni (facets) keshi, soniya (qarang: ustoziya_platform/facets.py)
+FACETS_CACHE_SECONDS = 60
+
+# API ro'yxatlarini sahifalash (kursor bo'yicha, qarang: ustoziya_platform/pagination.py)
+# API_PAGINATION = False - barcha ro'yxatlar sahifalanmasdan qaytariladi
+API_PAGINATION = True
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
+# 2.5MB dan katta fayllar xotirada emas, vaqtinchalik faylda saqlanadi
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(2.5 * 1024 * 1024)  # 2.5MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB (fayllardan tashqari so'rov tanasi)
+# Fayl xeshi yuklash davomida hisoblanadi
+FILE_UPLOAD_HANDLERS = [
+    'materials.storage.HashingMemoryFileUploadHandler',
+    'materials.storage.HashingTemporaryFileUploadHandler',
+]
+
+# Katta fayllarni bo'laklab yuklash (qarang: materials/uploads.py)
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', os.path.join(BASE_DIR, 'uploads_tmp'))
+CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+CHUNKED_UPLOAD_MAX_CHUNK = 8 * 1024 * 1024  # 8MB - bitta PATCH so'rovi
+CHUNKED_UPLOAD_EXPIRE_HOURS = 24  # tugallanmagan yuklashlar shundan keyin o'chiriladi
+
+# Fayllarni yuklab berish sozlamalari
+# DOWNLOAD_ACCEL_MODE: '' - fayl Django orqali bo'laklab uzatiladi,
+# 'nginx' - X-Accel-Redirect (nginx'da DOWNLOAD_ACCEL_PREFIX uchun `internal`
+# location MEDIA_ROOT ga ko'rsatilishi kerak), 'sendfile' - X-Sendfile (Apache)
+DOWNLOAD_ACCEL_MODE = os.environ.get('DOWNLOAD_ACCEL_MODE', '')
+DOWNLOAD_ACCEL_PREFIX = os.environ.get('DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # 64KB
+
+# Yuklab olish/ko'rish hisoblagichlarini buferlab yozish (materials/counters.py)
+COUNTER_FLUSH_INTERVAL = int(os.environ.get('COUNTER_FLUSH_INTERVAL', 5))  # soniya, 0 - darhol
+COUNTER_FLUSH_BATCH_SIZE = int(os.environ.get('COUNTER_FLUSH_BATCH_SIZE', 500))
+COUNTER_FLUSH_MAX_ATTEMPTS = 3  # shundan keyin yozilmagan yozuvlar jurnalga yozilib tashlanadi
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -0,0 +1,214 @@
+"""Yuklangan rasmlarning kichik nusxalarini (rendition) fonda yaratish.
+
+Foydalanuvchi yuklagan rasm (material/video/3D model muqovasi, avatar)
+o'zgarmasdan saqlanadi, undan esa ``THUMBNAIL_SIZES`` o'lchamlarida WebP va
+JPEG nusxalar yaratiladi (EXIF orientatsiyasi hisobga olinadi)::
+
+    thumbnails/<asl fayl yo'li>/<o'lcham>.webp
+    thumbnails/<asl fayl yo'li>/<o'lcham>.jpg
+
+Qaysi nusxalar tayyorligi modelning ``<maydon>_renditions`` JSON maydonida
+saqlanadi. Nusxalar hali tayyor bo'lmasa, ``thumbnail_url`` asl rasm URL
+manzilini qaytaradi. Yangi model ulash: ``thumbnails.register(Model, 'thumbnail')``.
+
+Nusxalar asl rasmlardan alohida, ``STORAGES['thumbnails']`` da saqlanadi
+(nomi asl fayldan kelib chiqadi). Bir xil rasmli obyektlar (kontent bo'yicha
+saqlash) nusxalarni birgalikda ishlatadi, shuning uchun eski nusxalar asl
+rasm storage da qolmagandagina o'chiriladi.
+
+Sozlamalar:
+    THUMBNAIL_SIZES - o'lchamlar (px, uzun tomoni bo'yicha)
+    THUMBNAIL_DEFAULT_SIZE - ``*_thumbnail_url`` uchun o'lcham
+    THUMBNAIL_QUALITY - WebP/JPEG sifati
+    THUMBNAIL_ASYNC - False bo'lsa nusxalar tranzaksiyadan keyin shu oqimda yaratiladi
+    THUMBNAIL_WORKERS - fon oqimlari soni
+"""
+import io
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from . import background
+
+logger = logging.getLogger(__name__)
+
+# format -> (Pillow formati, fayl kengaytmasi)
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# model -> nusxalari yaratiladigan rasm maydonlari
+REGISTRY = {}
+
+def _sizes():
+    return tuple(sorted(getattr(settings, 'THUMBNAIL_SIZES', (64, 256, 768))))
+
+
+def _default_size():
+    return getattr(settings, 'THUMBNAIL_DEFAULT_SIZE', 256)
+
+
+def _quality():
+    return getattr(settings, 'THUMBNAIL_QUALITY', 80)
+
+
+def rendition_storage():
+    return storages['thumbnails']
+
+
+def renditions_field(field_name):
+    """Tayyor nusxalar haqidagi JSON maydon nomi"""
+    return f'{field_name}_renditions'
+
+
+def rendition_name(source_name, size, fmt):
+    """Nusxa fayli nomi (asl fayl nomidan kelib chiqadi)"""
+    stem = posixpath.splitext(source_name)[0]
+    return f'thumbnails/{stem}/{size}.{FORMATS[fmt][1]}'
+
+
+def _ready_sizes(obj, field_name):
+    file = getattr(obj, field_name)
+    renditions = getattr(obj, renditions_field(field_name), None) or {}
+    if file and renditions.get('source') == file.name:
+        return renditions.get('sizes') or []
+    return []
+
+
+def thumbnail_url(obj, field_name='thumbnail', size=None, fmt='webp'):
+    """Kerakli o'lchamga eng yaqin (kattaroq) nusxa URL i; nusxa bo'lmasa - asl rasm"""
+    file = getattr(obj, field_name)
+    if not file:
+        return None
+    sizes = _ready_sizes(obj, field_name)
+    if not sizes:
+        return file.url
+    size = size or _default_size()
+    best = min((s for s in sizes if s >= size), default=max(sizes))
+    return rendition_storage().url(rendition_name(file.name, best, fmt))
+
+
+def thumbnail_urls(obj, field_name='thumbnail'):
+    """Barcha tayyor nusxalar: {o'lcham: {format: url}} (srcset/<picture> uchun)"""
+    file = getattr(obj, field_name)
+    return {
+        size: {fmt: rendition_storage().url(rendition_name(file.name, size, fmt)) for fmt in FORMATS}
+        for size in _ready_sizes(obj, field_name)
+    }
+
+
+def render(image, size, fmt):
+    """Rasmni ``size`` ga sig'adigan qilib kichraytirish va kodlash (kattalashtirilmaydi)"""
+    copy = image.copy()
+    copy.thumbnail((size, size), Image.Resampling.LANCZOS)
+    has_alpha = copy.mode in ('RGBA', 'LA') or (copy.mode == 'P' and 'transparency' in copy.info)
+    if fmt == 'jpeg' and copy.mode != 'RGB':
+        if has_alpha:
+            # JPEG da shaffoflik yo'q - oq fonga joylash
+            rgba = copy.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            copy = background
+        else:
+            copy = copy.convert('RGB')
+    elif fmt == 'webp' and copy.mode not in ('RGB', 'RGBA'):
+        copy = copy.convert('RGBA' if has_alpha else 'RGB')
+
+    buffer = io.BytesIO()
+    if fmt == 'jpeg':
+        copy.save(buffer, 'JPEG', quality=_quality(), optimize=True, progressive=True)
+    else:
+        copy.save(buffer, FORMATS[fmt][0], quality=_quality())
+    return buffer.getvalue()
+
+
+def _open_image(file, max_size):
+    with file.open('rb') as f:
+        image = Image.open(f)
+        # JPEG uchun dekoderning o'zi kichraytirib o'qiydi (to'liq o'lchamda ochmasdan)
+        image.draft('RGB', (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    return image
+
+
+def delete_renditions(source_name):
+    """Eski rasm nusxalarini o'chirish"""
+    storage = rendition_storage()
+    for size in _sizes():
+        for fmt in FORMATS:
+            name = rendition_name(source_name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+
+
+def delete_unused_renditions(source_storage, source_name):
+    """Asl rasm boshqa obyektlarda ishlatilmayotgan bo'lsa, nusxalarini o'chirish"""
+    if not source_storage.exists(source_name):
+        delete_renditions(source_name)
+
+
+def generate(model, pk, field_name):
+    """Obyekt rasmi uchun barcha nusxalarni yaratish"""
+    obj = model._default_manager.filter(pk=pk).only('pk', field_name).first()
+    file = getattr(obj, field_name, None)
+    if not file:
+        return False
+
+    sizes = _sizes()
+    storage = rendition_storage()
+    image = _open_image(file, max(sizes))
+    for size in sizes:
+        for fmt in FORMATS:
+            name = rendition_name(file.name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(render(image, size, fmt)))
+
+    # Shu orada rasm almashtirilgan bo'lsa, tayyor deb belgilanmaydi
+    model._default_manager.filter(pk=pk, **{field_name: file.name}).update(
+        **{renditions_field(field_name): {'source': file.name, 'sizes': list(sizes)}}
+    )
+    return True
+
+
+def _run_job(model, pk, field_name):
+    try:
+        generate(model, pk, field_name)
+    except Exception:
+        logger.exception(f"Rasm nusxalarini yaratishda xatolik: {model._meta.label} #{pk} {field_name}")
+
+
+def schedule(model, pk, field_name):
+    """Tranzaksiya yakunlangach nusxalarni yaratishni navbatga qo'yish"""
+    background.schedule(
+        'thumbnails', _run_job, model, pk, field_name,
+        workers=getattr(settings, 'THUMBNAIL_WORKERS', 2),
+        run_async=getattr(settings, 'THUMBNAIL_ASYNC', True)
+    )
+
+
+def register(model, field_name):
+    """Model rasm maydonini nusxalar yaratish mexanizmiga ulash"""
+    REGISTRY.setdefault(model, []).append(field_name)
+    rfield = renditions_field(field_name)
+    source_storage = model._meta.get_field(field_name).storage
+
+    def on_change(instance, name, old_name, created):
+        old_source = (getattr(instance, rfield, None) or {}).get('source')
+        if old_source:
+            model._default_manager.filter(pk=instance.pk).update(**{rfield: {}})
+            setattr(instance, rfield, {})
+            if old_source != name:
+                transaction.on_commit(lambda: delete_unused_renditions(source_storage, old_source))
+        if name:
+            schedule(model, instance.pk, field_name)
+
+    uid = f'thumbnails_{model._meta.label_lower}_{field_name}'
+    background.on_file_change(model, field_name, uid, on_change)
@@ -11,6 +11,7 @@ import io
 
 from accounts.models import User
 from materials.models import Material, Assignment, VideoLesson, Model3D
+from materials.search import search_queryset
 from tests.models import Test, Question, Answer, TestCategory, AttestationMaterial
 from tests.ai_service import AITestGenerationService
 from tests.services import extract_text_from_file
@@ -182,9 +183,7 @@ def materials_list(request):
     if subject:
         materials = materials.filter(author__subject=subject)
     if search:
-        materials = materials.filter(
-            title__icontains=search
-        )
+        materials = search_queryset(materials, search)
     
     context = {
         'materials': materials,
@@ -406,21 +405,14 @@ def test_analysis(request):
             ocr_service = OCRService()
             grading_service = TestGradingService()
             
-            # Rasmni saqlash
-            import os
-            from django.conf import settings
-            import uuid
-            
-            filename = f"{uuid.uuid4()}.jpg"
-            image_path = os.path.join(settings.MEDIA_ROOT, 'temp', filename)
-            os.makedirs(os.path.dirname(image_path), exist_ok=True)
+            # Rasmni saqlash (bir xil rasm qayta yuklansa, mavjud fayl ishlatiladi;
+            # OCR muvaffaqiyatsiz bo'lsa, biriktirilmagan fayl dedupe_media bilan tozalanadi)
+            from django.core.files.storage import default_storage
             
-            with open(image_path, 'wb') as f:
-                for chunk in image.chunks():
-                    f.write(chunk)
+            image_name = default_storage.save(f'ocr_images/{image.name}', image)
             
             # OCR qilish
-            ocr_text, confidence = ocr_service.extract_text(image_path)
+            ocr_text, confidence = ocr_service.extract_text(default_storage.path(image_name))
             
             if not ocr_text:
                 return JsonResponse({'success': False, 'error': 'Rasmdan matn olinmadi'})
@@ -430,7 +422,7 @@ def test_analysis(request):
             ocr_processing = OCRProcessing.objects.create(
                 user=request.user,
                 test=test,
-                image=image,
+                image=image_name,
                 processed_text=ocr_text,
                 confidence_score=confidence,
                 student_class=class_name  # Sinf ma'lumotini qo'shamiz
@@ -0,0 +1,106 @@
+"""Bir nechta faylni ZIP arxiv qilib bo'laklab uzatish.
+
+Arxiv vaqtinchalik faylga ham, xotiraga ham to'liq yozilmaydi: har bir
+fayl bo'laklab o'qilib arxiv yozuviga yoziladi va tayyor baytlar darhol
+javobga beriladi. Chiqish oqimi qaytib yozishni (seek) qo'llab-quvvatlamaydi,
+shuning uchun ``zipfile`` CRC va hajmlarni har bir fayldan keyingi "data
+descriptor" yozuvida beradi; katta fayllar uchun ZIP64 avtomatik ishlatiladi.
+
+O'zi siqilgan formatlar (PPTX/DOCX - ichida ZIP, MP4, JPEG, ...) qayta
+siqilmaydi (``ZIP_STORED``) - protsessor vaqti sarflanmaydi, hajm deyarli
+o'zgarmaydi. Qolganlari ``ZIP_DEFLATED`` bilan siqiladi.
+
+ETag a'zolar ro'yxatidan (nomi, kontent xeshi yoki hajm/vaqti, sanasi)
+hisoblanadi - arxivni yaratmasdan qayta yuklab olishga 304 qaytarish mumkin.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import zipfile
+from collections import namedtuple
+
+# Qayta siqishdan foyda yo'q formatlar
+STORED_EXTENSIONS = frozenset({
+    '.pptx', '.docx', '.xlsx', '.odp', '.odt', '.ods', '.zip', '.rar', '.7z', '.gz',
+    '.mp4', '.m4v', '.webm', '.mov', '.mkv', '.mp3', '.m4a', '.ogg', '.aac',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.glb', '.pdf',
+})
+
+# path - diskdagi yo'l, arcname - arxiv ichidagi nom, date_time - (yil, oy, kun, soat, daqiqa, soniya)
+ZipMember = namedtuple('ZipMember', 'path arcname date_time')
+
+UNSAFE_NAME_RE = re.compile(r'[\x00-\x1f<>:"/\\|?*]+')
+
+
+def safe_name(title, ext, used):
+    """Arxiv ichidagi takrorlanmaydigan fayl nomi (``used`` to'plamiga qo'shiladi)"""
+    stem = ' '.join(UNSAFE_NAME_RE.sub(' ', title).split()).strip(' .') or 'fayl'
+    name = f'{stem}{ext}'
+    number = 2
+    while name.lower() in used:
+        name = f'{stem} ({number}){ext}'
+        number += 1
+    used.add(name.lower())
+    return name
+
+
+def compress_type(name):
+    ext = posixpath.splitext(name)[1].lower()
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def archive_etag(parts):
+    """A'zolar tavsifidan (o'zgarmas qiymatlar ketma-ketligi) ETag yasash"""
+    return 'W/"' + hashlib.sha256(repr(tuple(parts)).encode()).hexdigest()[:32] + '"'
+
+
+class _Output:
+    """``zipfile`` yozgan baytlarni yig'ib turadigan, qaytib yozilmaydigan oqim"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def stream_zip(members, chunk_size=64 * 1024):
+    """ZIP arxiv baytlarini bo'laklab qaytaruvchi generator
+
+    Fayllar oldindan tekshirilgan bo'lishi kerak - uzatish boshlangach xatoni
+    javob holatida bildirib bo'lmaydi.
+    """
+    output = _Output()
+    with zipfile.ZipFile(output, 'w') as archive:
+        for member in members:
+            info = zipfile.ZipInfo(member.arcname, date_time=max(member.date_time, (1980, 1, 1, 0, 0, 0)))
+            info.compress_type = compress_type(member.arcname)
+            info.external_attr = 0o644 << 16
+            # Oldindan ma'lum hajm ZIP64 kerakligini aniqlaydi
+            info.file_size = os.path.getsize(member.path)
+            with open(member.path, 'rb') as source, archive.open(info, 'w') as entry:
+                for chunk in iter(lambda: source.read(chunk_size), b''):
+                    entry.write(chunk)
+                    if output.size >= chunk_size:
+                        yield output.pop()
+            if output.size:
+                yield output.pop()
+    yield output.pop()